@@ -0,0 +1,96 @@
+#!/usr/bin/env bash
+#
+# Check nginx.conf (nginx -t) and that signed asset urls (/assets/signed/...) are
+# served by nginx (e.g. potree's .bin files, with range requests).
+#
+# Usage: devops/local_conf/test_nginx_conf.sh   (or `make test-nginx`)
+# Requires docker, curl and python3.
+
+set -euo pipefail
+
+CONF_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+SECRET="test_asset_url_secret"
+PORT="${NGINX_TEST_PORT:-8889}"
+CONTAINER="geoapi_nginx_conf_test"
+ASSETS_DIR="$(mktemp -d)"
+failed=0
+
+cleanup() {
+    docker rm -f "$CONTAINER" >/dev/null 2>&1 || true
+    rm -rf "$ASSETS_DIR"
+}
+trap cleanup EXIT
+
+# same token as geoapi.utils.assets.get_signed_assets_url
+sign() {
+    python3 - "$1" "$2" "$SECRET" <<'EOF'
+import base64
+import hashlib
+import sys
+
+expires, project_id, secret = sys.argv[1:]
+digest = hashlib.md5(f"{expires}/assets/{project_id}/ {secret}".encode()).digest()
+print(base64.urlsafe_b64encode(digest).decode().rstrip("="))
+EOF
+}
+
+check() {
+    local expected="$1" url="$2"
+    shift 2
+    local status
+    status=$(curl -s -o /dev/null -w '%{http_code}' "$@" "http://localhost:${PORT}${url}")
+    if [ "$status" = "$expected" ]; then
+        echo "ok: ${url} ${status}"
+    else
+        echo "FAILED: ${url} returned ${status} (expected ${expected})"
+        failed=1
+    fi
+}
+
+mkdir -p "$ASSETS_DIR/1/pointcloud"
+head -c 1024 /dev/urandom > "$ASSETS_DIR/1/pointcloud/r.bin"
+echo '{}' > "$ASSETS_DIR/1/pointcloud/cloud.js"
+chmod -R a+rX "$ASSETS_DIR"
+
+# upstreams don't need to be running but their names need to resolve
+docker run -d --name "$CONTAINER" \
+    --add-host geoapi_backend:127.0.0.1 \
+    --add-host geoapi_titiler:127.0.0.1 \
+    -p "${PORT}:80" \
+    -e ASSET_URL_SECRET="$SECRET" \
+    -v "$ASSETS_DIR:/assets:ro" \
+    -v "$CONF_DIR/nginx.conf:/etc/nginx/nginx.conf:ro" \
+    -v "$CONF_DIR/asset_url_secret.conf.template:/etc/nginx/templates/asset_url_secret.conf.template:ro" \
+    nginx:stable >/dev/null
+
+for _ in $(seq 30); do
+    if curl -s -o /dev/null "http://localhost:${PORT}/assets/signed/"; then
+        break
+    fi
+    sleep 1
+done
+
+docker exec "$CONTAINER" nginx -t
+
+expires=$(( $(date +%s) + 3600 ))
+token=$(sign "$expires" 1)
+signed="/assets/signed/${token}/${expires}/1"
+
+check 200 "${signed}/pointcloud/cloud.js"
+check 200 "${signed}/pointcloud/r.bin"
+check 206 "${signed}/pointcloud/r.bin" -H "Range: bytes=0-99"
+if ! curl -s -D - -o /dev/null "http://localhost:${PORT}${signed}/pointcloud/r.bin" \
+    | grep -qi "^accept-ranges: bytes"; then
+    echo "FAILED: ${signed}/pointcloud/r.bin has no Accept-Ranges header"
+    failed=1
+fi
+check 404 "${signed}/pointcloud/missing.bin"
+# token of another project
+check 403 "/assets/signed/${token}/${expires}/2/pointcloud/r.bin"
+check 403 "/assets/signed/${token}/$(( expires + 1 ))/1/pointcloud/r.bin"
+expired=$(( $(date +%s) - 10 ))
+check 410 "/assets/signed/$(sign "$expired" 1)/${expired}/1/pointcloud/r.bin"
+# unsigned assets still need geoapi to check access (which isn't running here)
+check 500 "/assets/1/pointcloud/r.bin"
+
+exit "$failed"
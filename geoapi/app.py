@@ -45,6 +45,7 @@ from geoapi.services.users import UserService
 from geoapi.utils.users import AnonymousUser
 from geoapi.utils.jwt_utils import get_pub_key, PUBLIC_KEY_FOR_TESTING
 from geoapi.middleware import (
+    DBQueryCountMiddleware,
     GeoAPICSRFMiddleware,
     GeoAPISessionAuthMiddleware,
     GeoAPIJWTAuthMiddleware,
@@ -165,18 +166,14 @@ async def retrieve_jwt_user_handler(
                     f"There is an issue decoding the JWT: {e}"
                 ) from e
 
-            user = UserService.getUser(db_session, username, tenant)
-            if not user:
-                user = UserService.create(
-                    db_session, username=username, access_token=token, tenant=tenant
-                )
-            else:
-                # Update the jwt access token
-                #   (It is more common that user will be using an auth flow where hazmapper will auth
-                #   with geoapi to get the token. BUT we can't assume that as it is also possible that
-                #   user just uses geoapi as a service with token generated somewhere else. So we need
-                #   to get/update just their access token for these cases)
-                UserService.update_access_token(db_session, user, token.token)
+            # Get user and update their jwt access token
+            #   (It is more common that user will be using an auth flow where hazmapper will auth
+            #   with geoapi to get the token. BUT we can't assume that as it is also possible that
+            #   user just uses geoapi as a service with token generated somewhere else. So we need
+            #   to get/update just their access token for these cases)
+            user = UserService.get_user_for_token(
+                db_session, username, tenant, token.token
+            )
         return user
 
 
@@ -238,6 +235,8 @@ session_auth = SessionAuth["User", ServerSideSessionBackend](
         "/auth/login",
         "/auth/callback",
         "/schema",
+        # access is checked when the (tile) token in the url is issued
+        "^/tiles/",
     ],
     authentication_middleware_class=GeoAPISessionAuthMiddleware,
 )
@@ -249,6 +248,8 @@ jwt_auth = JWTAuth["User"](
         "/auth/login",
         "/auth/callback",
         "/schema",
+        # access is checked when the (tile) token in the url is issued
+        "^/tiles/",
     ],
     auth_header="X-Tapis-Token",
     verify_expiry=True,
@@ -296,15 +297,20 @@ exception_handlers = {
 }
 
 
+middleware = [
+    logging_middleware_config.middleware,
+    cookie_session_config.middleware,
+    session_auth_config.middleware,
+    jwt_auth.middleware,
+    csrf_middleware,
+]
+if settings.DEBUG:
+    # outermost, so that queries of authentication and guards are counted too
+    middleware.insert(0, DBQueryCountMiddleware)
+
 app = Litestar(
     route_handlers=[api_router],
-    middleware=[
-        logging_middleware_config.middleware,
-        cookie_session_config.middleware,
-        session_auth_config.middleware,
-        jwt_auth.middleware,
-        csrf_middleware,
-    ],
+    middleware=middleware,
     plugins=[alchemy, channels],
     stores=stores,
     exception_handlers=exception_handlers,
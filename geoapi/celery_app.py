@@ -58,4 +58,8 @@ app.conf.beat_schedule = {
         "task": "geoapi.tasks.external_data.refresh_projects_watch_users",
         "schedule": timedelta(minutes=30),
     },
+    "prune_tile_cache": {
+        "task": "geoapi.tasks.projects.prune_tile_cache",
+        "schedule": timedelta(minutes=10),
+    },
 }
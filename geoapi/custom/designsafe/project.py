@@ -5,6 +5,7 @@ from geoapi.custom.designsafe.default_basemap_layers import default_layers
 from geoapi.models import User, Project
 from geoapi.custom.designsafe.utils import (
     get_designsafe_project_data,
+    invalidate_designsafe_project_data,
     is_designsafe_project,
     extract_project_uuid,
 )
@@ -171,3 +172,4 @@ def update_designsafe_project_hazmapper_metadata(
         headers={"X-Requested-With": "XMLHttpRequest"},
     )
     response.raise_for_status()
+    invalidate_designsafe_project_data(project.system_id)
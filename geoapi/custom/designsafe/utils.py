@@ -1,8 +1,14 @@
 from geoapi.log import logger
 from geoapi.settings import settings
 from geoapi.models import User
+from geoapi.utils.redis_utils import RedisCache
 
-DESIGNSAFE_PROJECT_ID_CACHE = {}
+# DesignSafe project data (keyed by project uuid)
+designsafe_project_cache = RedisCache(
+    "designsafe_project",
+    ttl=settings.DESIGNSAFE_PROJECT_CACHE_TTL,
+    max_entries=settings.DESIGNSAFE_PROJECT_CACHE_MAX_ENTRIES,
+)
 
 
 def extract_project_uuid(system_id: str) -> str | None:
@@ -21,6 +27,9 @@ def get_designsafe_project_data(database_session, user: User, system_id: str) ->
     """
     Get project data for a certain system
 
+    Project data is cached (see designsafe_project_cache) so it might be up to
+    DESIGNSAFE_PROJECT_CACHE_TTL seconds old.
+
     :param database_session: db session
     :param user: user to use when querying system from DesignSafe
     :param system_id: str
@@ -29,17 +38,36 @@ def get_designsafe_project_data(database_session, user: User, system_id: str) ->
     """
     from geoapi.utils.external_apis import ApiUtils
 
+    uuid = system_id[len("project-") :]
+
+    project = designsafe_project_cache.get(uuid)
+    if project is not None:
+        return project
+
     logger.debug(f"Getting project metadata for system:{system_id}")
 
-    uuid = system_id[len("project-") :]
     client = ApiUtils(database_session, user, settings.DESIGNSAFE_URL)
     resp = client.get(f"/api/projects/v2/{uuid}/")
     resp.raise_for_status()
 
     project = resp.json()["baseProject"]["value"]
+    designsafe_project_cache.set(uuid, project)
     return project
 
 
+def invalidate_designsafe_project_data(system_id: str):
+    """
+    Remove project data for a certain system from cache
+
+    To be used when we change the project on DesignSafe
+
+    :param system_id: str
+    """
+    uuid = extract_project_uuid(system_id)
+    if uuid is not None:
+        designsafe_project_cache.invalidate(uuid)
+
+
 def get_designsafe_project_id(
     database_session, user: User, system_id: str
 ) -> str | None:
@@ -51,23 +79,13 @@ def get_designsafe_project_id(
         logger.debug(f"System {system_id} is not a DesignSafe project, skipping")
         return None
 
-    # Check cache first
-    if system_id in DESIGNSAFE_PROJECT_ID_CACHE:
-        return DESIGNSAFE_PROJECT_ID_CACHE[system_id]
-
-    # Not in cache - fetch from DesignSafe API
     try:
         designsafe_project_data = get_designsafe_project_data(
             database_session=database_session, user=user, system_id=system_id
         )
         designsafe_project_id = designsafe_project_data["projectId"]
 
-        # Cache it
-        DESIGNSAFE_PROJECT_ID_CACHE[system_id] = designsafe_project_id
-
-        logger.debug(
-            f"Fetched and cached project_id for system {system_id}: {designsafe_project_id}"
-        )
+        logger.debug(f"Got project_id for system {system_id}: {designsafe_project_id}")
         return designsafe_project_id
     except Exception as e:
         logger.exception(
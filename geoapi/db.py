@@ -1,5 +1,5 @@
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, Engine
+from sqlalchemy import create_engine, event, Engine
 from litestar import Litestar
 from litestar.plugins.sqlalchemy import (
     SyncSessionConfig,
@@ -9,6 +9,7 @@ from litestar.plugins.sqlalchemy import (
 )
 from typing import cast
 from contextlib import contextmanager
+from contextvars import ContextVar
 from geoapi.settings import settings
 from geoapi.log import logger
 
@@ -146,3 +147,33 @@ def managed_litestar_db_session(app_state=None, scope=None):
         raise
     finally:
         db_session.close()
+
+
+# Number of queries run (by any engine) while handling the current request, see
+# count_db_queries
+_db_query_count: ContextVar[list[int] | None] = ContextVar(
+    "db_query_count", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_db_query(conn, cursor, statement, parameters, context, executemany):
+    count = _db_query_count.get()
+    if count is not None:
+        count[0] += 1
+
+
+@contextmanager
+def count_db_queries():
+    """
+    Count the database queries run in this context (including in threads started from
+    it, e.g. sync route handlers)
+
+    Yields a function returning the current count.
+    """
+    count = [0]
+    token = _db_query_count.set(count)
+    try:
+        yield lambda: count[0]
+    finally:
+        _db_query_count.reset(token)
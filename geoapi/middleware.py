@@ -11,7 +11,9 @@ from litestar.middleware import AuthenticationResult, MiddlewareProtocol
 from litestar.security.session_auth import SessionAuthMiddleware
 from litestar.security.jwt import JWTAuthenticationMiddleware
 from litestar.security.jwt.token import Token, JWTDecodeOptions
-from litestar.types import Empty, Scope, Receive, Send, ASGIApp
+from litestar.datastructures import MutableScopeHeaders
+from litestar.types import Empty, Scope, Receive, Send, ASGIApp, Message
+from geoapi.db import count_db_queries
 from geoapi.utils.users import is_anonymous
 
 if TYPE_CHECKING:
@@ -43,6 +45,30 @@ class GeoAPICSRFMiddleware(MiddlewareProtocol):
         await self.csrf_middleware(scope, receive, send)
 
 
+class DBQueryCountMiddleware(MiddlewareProtocol):
+    """Debug middleware adding the number of database queries of a request to its
+    response (X-DB-Query-Count header)
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_db_queries() as get_query_count:
+
+            async def send_with_query_count(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableScopeHeaders.from_message(message)
+                    headers["X-DB-Query-Count"] = str(get_query_count())
+                await send(message)
+
+            await self.app(scope, receive, send_with_query_count)
+
+
 class GeoAPISessionAuthMiddleware(SessionAuthMiddleware):
     """Middleware for session authentication in GeoAPI."""
 
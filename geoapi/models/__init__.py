@@ -1,12 +1,17 @@
 from .project import Project, ProjectUser
 from .feature import Feature, FeatureAsset
 from .file_location_check import FileLocationCheck
-from .point_cloud import PointCloud
+from .published_file_index import PublishedFileIndex, PublishedFile
+from .point_cloud import (
+    PointCloud,
+    PointCloudOutputFormat,
+    PointCloudConversionMetrics,
+)
 from .task import Task, TaskStatus
 from .users import User
 from .auth import Auth
 from .overlay import Overlay
-from .tile_server import TileServer
+from .tile_server import TileServer, TileServerMosaicMember
 from .notification import Notification, ProgressNotification
 from .imported_file import ImportedFile
 from .streetview import (
@@ -1,11 +1,19 @@
-from sqlalchemy import Integer, String, ForeignKey, DateTime, JSON
-from sqlalchemy.orm import relationship, mapped_column
+from sqlalchemy import Integer, BigInteger, Float, String, ForeignKey, DateTime, JSON
+from sqlalchemy.orm import relationship, mapped_column, validates
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
+from enum import Enum
 import uuid
 from geoapi.db import Base
 
 
+class PointCloudOutputFormat(str, Enum):
+    # Potree octree (thousands of files) viewed with the potree viewer
+    POTREE = "potree"
+    # Single Cloud Optimized Point Cloud (.copc.laz) file read with range requests
+    COPC = "copc"
+
+
 class PointCloud(Base):
     __tablename__ = "point_clouds"
 
@@ -20,6 +28,12 @@ class PointCloud(Base):
     task_id = mapped_column(ForeignKey("tasks.id"), index=True)
     description = mapped_column(String)
     conversion_parameters = mapped_column(String)
+    output_format = mapped_column(
+        String,
+        nullable=False,
+        default=PointCloudOutputFormat.POTREE.value,
+        server_default=PointCloudOutputFormat.POTREE.value,
+    )
     files_info = mapped_column(JSON)
     path = mapped_column(String(), nullable=False)
     tenant_id = mapped_column(String, nullable=False)
@@ -29,9 +43,54 @@ class PointCloud(Base):
     feature = relationship("Feature", lazy="joined")
     task = relationship("Task", lazy="joined")
 
+    @validates("output_format")
+    def _validate_output_format(self, _key, value: str | None) -> str:
+        if value is None:
+            return PointCloudOutputFormat.POTREE.value
+        if value not in {f.value for f in PointCloudOutputFormat}:
+            raise ValueError(f"Invalid point cloud output format: {value}")
+        return PointCloudOutputFormat(value).value
+
     def __repr__(self):
         return (
             f"<PointCloud(id={self.id} description={self.description}) "
             f"project_id={self.project_id}  feature_id={self.feature_id} task={self.task_id}>"
             f"path={self.path} updated={self.updated}"
         )
+
+
+class PointCloudConversionMetrics(Base):
+    """
+    Timings of a (successful) point cloud conversion, for capacity planning of the heavy workers
+
+    Durations are in seconds. `download_seconds` is only known when the conversion
+    followed an import of files. Sizes and point counts are of the converted files
+    (which are only the new files when a file is added to a potree point cloud).
+    """
+
+    __tablename__ = "point_cloud_conversion_metrics"
+
+    id = mapped_column(Integer, primary_key=True)
+    point_cloud_id = mapped_column(
+        ForeignKey("point_clouds.id", ondelete="CASCADE", onupdate="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    output_format = mapped_column(String, nullable=False)
+    file_count = mapped_column(Integer, nullable=False)
+    converted_file_count = mapped_column(Integer, nullable=False)
+    input_size = mapped_column(BigInteger, nullable=False)
+    point_count = mapped_column(BigInteger, nullable=False)
+    download_seconds = mapped_column(Float, nullable=True)
+    header_scan_seconds = mapped_column(Float, nullable=False)
+    wait_seconds = mapped_column(Float, nullable=False)
+    conversion_seconds = mapped_column(Float, nullable=False)
+    move_seconds = mapped_column(Float, nullable=False)
+    points_per_second = mapped_column(Float, nullable=True)
+    created = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return (
+            f"<PointCloudConversionMetrics(id={self.id} point_cloud_id={self.point_cloud_id} "
+            f"point_count={self.point_count} conversion_seconds={self.conversion_seconds})>"
+        )
@@ -0,0 +1,59 @@
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import Mapped, relationship, mapped_column
+from sqlalchemy.sql import func
+from geoapi.db import Base
+
+
+class PublishedFileIndex(Base):
+    """
+    Index of the files of a published DesignSafe project (i.e. /published-data/PRJ-1234/)
+
+    The index is shared by all map projects (and file location checks) that reference
+    the published project. `listing_signature` is a fingerprint of the top-level listing
+    of the published project (which changes when a new version or amendment is published)
+    and is used to decide if the index needs to be rebuilt.
+    """
+
+    __tablename__ = "published_file_indexes"
+
+    id = mapped_column(Integer, primary_key=True)
+    designsafe_project_id = mapped_column(
+        String, nullable=False, unique=True, index=True
+    )
+    listing_signature = mapped_column(String, nullable=True)
+    file_count: Mapped[int | None] = mapped_column(Integer, default=0)
+
+    # Timestamps
+    # built_at is when the published project was last walked; checked_at is when the
+    # listing signature was last compared against the published project
+    built_at = mapped_column(DateTime(timezone=True), nullable=True)
+    checked_at = mapped_column(DateTime(timezone=True), nullable=True)
+    created = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    files = relationship(
+        "PublishedFile", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    def __repr__(self):
+        return (
+            f"<PublishedFileIndex(id={self.id}, designsafe_project_id={self.designsafe_project_id}, "
+            f"file_count={self.file_count} built_at={self.built_at})>"
+        )
+
+
+class PublishedFile(Base):
+    __tablename__ = "published_files"
+    __table_args__ = (
+        Index("ix_published_files_index_id_filename", "index_id", "filename"),
+    )
+
+    id = mapped_column(Integer, primary_key=True)
+    index_id = mapped_column(
+        ForeignKey("published_file_indexes.id", ondelete="CASCADE"), nullable=False
+    )
+    filename = mapped_column(String, nullable=False)
+    # path on the published system (without leading "/")
+    path = mapped_column(String, nullable=False)
+
+    def __repr__(self):
+        return f"<PublishedFile(index_id={self.index_id}, path={self.path})>"
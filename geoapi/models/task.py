@@ -27,6 +27,8 @@ class Task(Base):
         nullable=True,
     )
     latest_message = mapped_column(String(), nullable=True)
+    # progress (0-100) of tasks that report it
+    percent = mapped_column(Integer, nullable=True)
     created = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
@@ -1,6 +1,8 @@
+import shapely
 from sqlalchemy import Boolean, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship, mapped_column
+from sqlalchemy.orm import relationship, mapped_column, Mapped
 from sqlalchemy.dialects.postgresql import JSONB, UUID
+from geoalchemy2 import Geometry
 from geoapi.db import Base
 from geoapi.models.file_location_tracking_mixin import FileLocationTrackingMixin
 
@@ -60,3 +62,31 @@ class TileServer(Base, FileLocationTrackingMixin):
 
     def __repr__(self):
         return "<TileServer(id={})>".format(self.id)
+
+
+class TileServerMosaicMember(Base):
+    """Internal (COG) tile server that is part of a mosaic tile server (a VRT)"""
+
+    __tablename__ = "tile_server_mosaic_members"
+    id = mapped_column(Integer, primary_key=True)
+    mosaic_id = mapped_column(
+        ForeignKey("tile_servers.id", ondelete="CASCADE", onupdate="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    member_id = mapped_column(
+        ForeignKey("tile_servers.id", ondelete="CASCADE", onupdate="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    footprint: Mapped[shapely.GeometryType] = mapped_column(
+        Geometry(geometry_type="POLYGON", srid=4326), nullable=False
+    )  # Spatial index included by default
+
+    mosaic = relationship("TileServer", foreign_keys=[mosaic_id])
+    member = relationship("TileServer", foreign_keys=[member_id])
+
+    def __repr__(self):
+        return "<TileServerMosaicMember(mosaic_id={}, member_id={})>".format(
+            self.mosaic_id, self.member_id
+        )
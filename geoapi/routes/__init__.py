@@ -7,6 +7,7 @@ from .streetview_mapillary_auth import StreetviewMapillaryAuthController
 from .notifications import NotificationsController
 from .auth import AuthController
 from .webhooks import TaskStatusWebhookController
+from .tiles import TilesController
 from .websockets import websocket_handler
 
 api_router = Router(
@@ -19,6 +20,7 @@ api_router = Router(
         StreetviewMapillaryAuthController,
         AuthController,
         TaskStatusWebhookController,
+        TilesController,
         websocket_handler,
     ],
 )
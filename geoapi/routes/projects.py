@@ -6,7 +6,7 @@ from litestar import Controller, get, Request, post, delete, put, Router
 from litestar.datastructures import UploadFile
 from litestar.params import Body
 from litestar.enums import RequestEncodingType
-from litestar.exceptions import NotAuthorizedException
+from litestar.exceptions import NotAuthorizedException, NotFoundException
 from geojson_pydantic import Feature as GeoJSONFeature
 from geoapi.log import logger
 from geoapi.services.features import FeaturesService
@@ -16,6 +16,8 @@ from geoapi.services.projects import ProjectsService
 from geoapi.services.tile_server import TileService
 from geoapi.tasks import external_data, streetview, point_cloud
 from geoapi.models import Task, Project, Feature, TileServer, PointCloud, User
+from geoapi.utils.request_context import get_request_context
+from geoapi.utils.assets import get_signed_assets_url
 from geoapi.utils.decorators import (
     project_permissions_allow_public_guard,
     project_permissions_guard,
@@ -29,6 +31,7 @@ from geoapi.utils.decorators import (
 )
 from geoapi.schema.projects import (
     OkResponse,
+    AssetUrlModel,
     FeatureModel,
     FeatureReturnDTO,
     FeatureCollectionModel,
@@ -42,6 +45,11 @@ from geoapi.schema.projects import (
     PointCloudModel,
     TileServerDTO,
     TileServerModel,
+    TileServerMosaicModel,
+    TileTokenModel,
+    RasterSampleModel,
+    RasterStatisticsPayloadModel,
+    RasterStatisticsModel,
     TapisFileUploadModel,
     TapisFileImportModel,
 )
@@ -71,9 +79,9 @@ class ProjectsListingController(Controller):
             subset = [
                 check_access_and_get_project(
                     request.user,
-                    db_session=db_session,
                     uuid=uuid,
                     allow_public_use=True,
+                    context=get_request_context(request),
                 )
                 for uuid in uuid_subset.split(",")
             ]
@@ -116,7 +124,7 @@ class ProjectResourceController(Controller):
         logger.info(
             "Get metadata project:{} for user:{}".format(project_id, u.username)
         )
-        return ProjectsService.get(db_session, project_id=project_id, user=u)
+        return get_request_context(request).get_project(project_id=project_id, user=u)
 
     @delete(
         tags=["projects"],
@@ -130,7 +138,9 @@ class ProjectResourceController(Controller):
         """Delete a project by its ID."""
         u = request.user
         # Retrieve the project using the projectId to get its UUID
-        project = ProjectsService.get(db_session, project_id=project_id, user=u)
+        project = get_request_context(request).get_project(
+            project_id=project_id, user=u
+        )
         logger.info(
             "Delete project:{} with project_uuid:{} for user:{}".format(
                 project_id, project.uuid, u.username
@@ -176,6 +186,32 @@ class ProjectCheckAccessResourceController(Controller):
         return OkResponse(message="Access granted")
 
 
+class ProjectAssetUrlResourceController(Controller):
+    path = "/{project_id:int}/asset-url/"
+
+    @get(
+        tags=["projects"],
+        operation_id="get_project_asset_url",
+        description=(
+            "Get a signed, expiring url of the project's assets. Assets (e.g. "
+            "images and point cloud chunks) requested with it are served without "
+            "checking access to the project for each asset; access is only checked "
+            "when the url is issued."
+        ),
+        guards=[project_permissions_allow_public_guard],
+    )
+    def get_asset_url(self, request: Request, project_id: int) -> AssetUrlModel:
+        """Get a signed url of the project's assets."""
+        logger.info(
+            f"Get asset url of project:{project_id} for user:{request.user.username}"
+        )
+        try:
+            url, expires = get_signed_assets_url(project_id)
+        except ValueError as e:
+            raise NotFoundException("Signed asset urls are not enabled") from e
+        return AssetUrlModel(url=url, expires=expires)
+
+
 class ProjectUsersResourceController(Controller):
     path = "/{project_id:int}/users/"
 
@@ -272,7 +308,9 @@ class ProjectFeaturesResourceController(Controller):
         application = request.headers.get("X-Geoapi-Application", "Unknown")
         is_public_view = request.headers.get("X-Geoapi-IsPublicView", "Unknown")
 
-        prj = ProjectsService.get(db_session, project_id=project_id, user=request.user)
+        prj = get_request_context(request).get_project(
+            project_id=project_id, user=request.user
+        )
         logger.info(
             f"Get features of project for user:{request.user.username} application:{application}"
             f" public_view:{is_public_view} project_uuid:{prj.uuid} project:{prj.id} tapis_system_id:{prj.system_id} "
@@ -873,6 +911,42 @@ class ProjectTileServersFilesImportResourceController(Controller):
         return tasks
 
 
+class ProjectTileServersMosaicResourceController(Controller):
+    path = "/{project_id:int}/tile-servers/mosaic/"
+
+    @post(
+        tags=["projects"],
+        operation_id="create_tile_server_mosaic",
+        description=(
+            "Create a mosaic tile server from two or more internal (imported raster) tile "
+            "servers of the project. This is an asynchronous operation."
+        ),
+        guards=[project_permissions_guard],
+        return_dto=TaskDTO,
+        status_code=201,
+    )
+    def create_tile_server_mosaic(
+        self,
+        request: Request,
+        db_session: "Session",
+        project_id: int,
+        data: TileServerMosaicModel,
+    ) -> Task:
+        """Queue creating a mosaic of internal tile servers"""
+        u = request.user
+        logger.info(
+            f"Creating mosaic of tile servers:{data.tile_server_ids} for "
+            f"project:{project_id} user:{u.username}"
+        )
+        return TileService.create_mosaic(
+            database_session=db_session,
+            user=u,
+            project_id=project_id,
+            name=data.name,
+            tile_server_ids=data.tile_server_ids,
+        )
+
+
 class ProjectTileServerResourceController(Controller):
     path = "/{project_id:int}/tile-servers/{tile_server_id:int}/"
 
@@ -895,7 +969,7 @@ class ProjectTileServerResourceController(Controller):
                 tile_server_id, project_id, request.user.username
             )
         )
-        TileService.deleteTileServer(db_session, tile_server_id)
+        TileService.deleteTileServer(db_session, tile_server_id, user=request.user)
 
     @put(
         tags=["projects"],
@@ -930,6 +1004,108 @@ class ProjectTileServerResourceController(Controller):
         )
 
 
+def _get_internal_tile_server(
+    db_session: "Session", project_id: int, tile_server_id: int
+) -> TileServer:
+    ts = db_session.get(TileServer, tile_server_id)
+    if ts is None or ts.project_id != project_id or not ts.internal:
+        raise NotFoundException("Internal tile server not found")
+    return ts
+
+
+class ProjectTileServerTileTokenResourceController(Controller):
+    path = "/{project_id:int}/tile-servers/{tile_server_id:int}/tile-token/"
+
+    @get(
+        tags=["projects"],
+        operation_id="get_tile_server_tile_token",
+        description=(
+            "Get a token (and url template) for getting the tiles of an internal tile "
+            "server. Tiles are cached, and access to the project is only checked when "
+            "the token is issued."
+        ),
+        guards=[project_permissions_allow_public_guard],
+    )
+    def get_tile_token(
+        self,
+        request: Request,
+        db_session: "Session",
+        project_id: int,
+        tile_server_id: int,
+    ) -> TileTokenModel:
+        """Get a token for getting the tiles of a tile server."""
+        ts = _get_internal_tile_server(db_session, project_id, tile_server_id)
+        logger.info(
+            "Get tile token for tile server:{} in project:{} for user:{}".format(
+                tile_server_id, project_id, request.user.username
+            )
+        )
+        token = TileService.create_tile_token(ts)
+        return TileTokenModel(token=token, url=f"/tiles/{token}/{{z}}/{{x}}/{{y}}.png")
+
+
+class ProjectTileServerSampleResourceController(Controller):
+    path = "/{project_id:int}/tile-servers/{tile_server_id:int}/sample/"
+
+    @get(
+        tags=["projects"],
+        operation_id="sample_tile_server",
+        description=(
+            "Get the values (e.g. elevation) of the bands of an internal tile server at "
+            "a point (lon/lat in EPSG:4326)."
+        ),
+        guards=[project_permissions_allow_public_guard],
+        sync_to_thread=True,
+    )
+    def sample_tile_server(
+        self,
+        request: Request,
+        db_session: "Session",
+        project_id: int,
+        tile_server_id: int,
+        lon: float,
+        lat: float,
+    ) -> RasterSampleModel:
+        """Get the band values of a tile server at a point."""
+        ts = _get_internal_tile_server(db_session, project_id, tile_server_id)
+        values = TileService.sample(ts, lon, lat)
+        return RasterSampleModel(lon=lon, lat=lat, values=values)
+
+
+class ProjectTileServerStatisticsResourceController(Controller):
+    path = "/{project_id:int}/tile-servers/{tile_server_id:int}/statistics/"
+
+    @post(
+        tags=["projects"],
+        operation_id="get_tile_server_statistics",
+        description=(
+            "Get statistics (count, min, max, mean and std) of the bands of an internal "
+            "tile server in a polygon (GeoJSON geometry in EPSG:4326). Large polygons "
+            "are computed from an overview of the raster."
+        ),
+        guards=[project_permissions_allow_public_guard],
+        status_code=200,
+        sync_to_thread=True,
+    )
+    def get_tile_server_statistics(
+        self,
+        request: Request,
+        db_session: "Session",
+        project_id: int,
+        tile_server_id: int,
+        data: RasterStatisticsPayloadModel,
+    ) -> RasterStatisticsModel:
+        """Get statistics of the bands of a tile server in a polygon."""
+        ts = _get_internal_tile_server(db_session, project_id, tile_server_id)
+        logger.info(
+            "Get statistics of tile server:{} in project:{} for user:{}".format(
+                tile_server_id, project_id, request.user.username
+            )
+        )
+        statistics = TileService.get_statistics(ts, data.geometry)
+        return RasterStatisticsModel.model_validate(statistics)
+
+
 def feature_enc_hook(feature: Feature) -> FeatureModel:
     """Encode Feature to a dictionary."""
 
@@ -953,6 +1129,7 @@ projects_router = Router(
         ProjectsListingController,
         ProjectResourceController,
         ProjectCheckAccessResourceController,
+        ProjectAssetUrlResourceController,
         ProjectUsersResourceController,
         ProjectUserResourceController,
         ProjectFeaturesResourceController,
@@ -970,7 +1147,11 @@ projects_router = Router(
         ProjectTasksResourceController,
         ProjectTileServersResourceController,
         ProjectTileServersFilesImportResourceController,
+        ProjectTileServersMosaicResourceController,
         ProjectTileServerResourceController,
+        ProjectTileServerTileTokenResourceController,
+        ProjectTileServerSampleResourceController,
+        ProjectTileServerStatisticsResourceController,
         ProjectFileLocationStatusController,
     ],
     type_encoders={Feature: feature_enc_hook},
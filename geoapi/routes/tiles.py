@@ -0,0 +1,71 @@
+import jwt
+from litestar import Controller, get, Request
+from litestar.response import Response
+from litestar.exceptions import NotAuthorizedException, NotFoundException
+from geoapi.services.tile_server import TileService, TILE_FORMATS
+from geoapi.log import logging
+
+logger = logging.getLogger(__name__)
+
+# cached tiles only change when the layer's render options change (which changes the
+# query parameters of the tile url)
+TILE_MAX_AGE = 24 * 60 * 60
+
+
+class TilesController(Controller):
+    path = "/tiles"
+
+    @get(
+        "/{token:str}/{z:int}/{x:int}/{tile:str}",
+        tags=["tiles"],
+        operation_id="get_tile",
+        description=(
+            "Get a tile (e.g. 3.png or 3.webp) of an internal tile server. Query "
+            "parameters are render options passed to TiTiler (e.g. colormap_name). The "
+            "token is issued by /projects/{project_id}/tile-servers/{tile_server_id}/tile-token/"
+        ),
+        sync_to_thread=True,
+    )
+    def get_tile(
+        self, request: Request, token: str, z: int, x: int, tile: str
+    ) -> Response:
+        """Get a tile of an internal tile server (from the tile cache if possible)."""
+        y, _, tile_format = tile.partition(".")
+        if not y.isdigit() or tile_format not in TILE_FORMATS:
+            raise NotFoundException(f"Unsupported tile: {tile}")
+
+        try:
+            claims = TileService.decode_tile_token(token)
+        except jwt.InvalidTokenError as e:
+            raise NotAuthorizedException("Invalid or expired tile token") from e
+
+        render_options = {}
+        for key, value in request.query_params.multi_items():
+            if key != "url":
+                render_options.setdefault(key, []).append(value)
+        render_options = {
+            key: values[0] if len(values) == 1 else values
+            for key, values in render_options.items()
+        }
+
+        status_code, content, cached = TileService.get_tile(
+            claims["project_id"],
+            claims["uuid"],
+            claims["url"],
+            z,
+            x,
+            int(y),
+            tile_format,
+            render_options,
+        )
+        if status_code != 200:
+            # e.g. tile outside of the layer's bounds
+            return Response(content=b"", status_code=status_code)
+        return Response(
+            content=content,
+            media_type=TILE_FORMATS[tile_format],
+            headers={
+                "Cache-Control": f"private, max-age={TILE_MAX_AGE}",
+                "X-Tile-Cache": "HIT" if cached else "MISS",
+            },
+        )
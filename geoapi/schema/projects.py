@@ -4,7 +4,15 @@ from litestar.plugins.sqlalchemy import SQLAlchemyDTO
 from litestar.dto import DTOConfig
 from uuid import UUID
 
-from geoapi.models import Task, Project, Feature, TileServer, PointCloud, User
+from geoapi.models import (
+    Task,
+    Project,
+    Feature,
+    TileServer,
+    PointCloud,
+    PointCloudOutputFormat,
+    User,
+)
 from geoapi.schema.tapis import TapisFilePath
 
 
@@ -124,6 +132,7 @@ class TaskDTO(SQLAlchemyDTO[Task]):
             "description",
             "project_id",
             "latest_message",
+            "percent",
             "created",
             "updated",
         },
@@ -138,6 +147,7 @@ class TaskModel(BaseModel):
     description: str | None = None
     project_id: int | None = None
     latest_message: str | None = None
+    percent: int | None = None
     created: datetime | None = None
     updated: datetime | None = None
 
@@ -148,6 +158,7 @@ class PointCloudDTO(SQLAlchemyDTO[PointCloud]):
             "id",
             "description",
             "conversion_parameters",
+            "output_format",
             "files_info",
             "feature_id",
             "task",
@@ -163,6 +174,7 @@ class PointCloudModel(BaseModel):
     id: int | None = None
     description: str | None = None
     conversion_parameters: str | None = None
+    output_format: PointCloudOutputFormat | None = None
     feature_id: int | None = None
     task: TaskModel = None
     project_id: int | None = None
@@ -217,6 +229,57 @@ class TileServerModel(BaseModel):
     last_public_system_check: datetime | None = None
 
 
+class TileServerMosaicModel(BaseModel):
+    name: str
+    # internal (imported raster) tile servers of the project
+    tile_server_ids: list[int]
+
+
+class RasterSampleModel(BaseModel):
+    lon: float
+    lat: float
+    # value of each band (None for nodata or outside of the raster)
+    values: list[float | None]
+
+
+class RasterStatisticsPayloadModel(BaseModel):
+    # GeoJSON Polygon or MultiPolygon (EPSG:4326)
+    geometry: dict
+
+
+class BandStatisticsModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    count: int
+    min: float | None = None
+    max: float | None = None
+    mean: float | None = None
+    std: float | None = None
+
+
+class RasterStatisticsModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    bands: list[BandStatisticsModel]
+    # overview level that was read (None for full resolution)
+    overview_level: int | None = None
+    pixel_size: tuple[float, float]
+
+
+class TileTokenModel(BaseModel):
+    token: str
+    # template of tile urls (relative to geoapi's url, e.g. http://localhost:8888) with
+    # {z}/{x}/{y} placeholders
+    url: str
+
+
+class AssetUrlModel(BaseModel):
+    # prefix of the project's assets (i.e. url + "<project id>/<path>")
+    url: str
+    # unix time after which the url is no longer valid
+    expires: int
+
+
 # TODO: replace with TapisFilePath (and update client software)
 class TapisFileUploadModel(BaseModel):
     system_id: str | None = None
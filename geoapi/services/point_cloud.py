@@ -26,6 +26,17 @@ class PointCloudService:
 
     PROCESSED_DIR = "point_cloud"
 
+    # temporary tiles of original files that are too large to convert at once
+    TILES_DIR = "tiles"
+
+    # name of the file (in the point cloud's asset directory) when output_format is COPC
+    COPC_FILE_NAME = "pointcloud.copc.laz"
+
+    # manifest (in the point cloud's asset directory) of the potree sub-clouds; each
+    # original file is converted to its own sub-cloud so that adding a file only
+    # converts that file
+    POTREE_MANIFEST_FILE_NAME = "manifest.json"
+
     @staticmethod
     def get(database_session, pointCloudId: int) -> PointCloud:
         """
@@ -86,13 +97,14 @@ class PointCloudService:
         point_cloud = PointCloudService.get(database_session, pointCloudId)
 
         previous_conversion_parameters = point_cloud.conversion_parameters
+        previous_output_format = point_cloud.output_format
         for key, value in data.items():
             setattr(point_cloud, key, value)
         database_session.commit()
 
         if (
-            "conversion_parameters" in data
-            and previous_conversion_parameters != data["conversion_parameters"]
+            previous_conversion_parameters != point_cloud.conversion_parameters
+            or previous_output_format != point_cloud.output_format
         ):
             PointCloudService._process_point_clouds(database_session, pointCloudId)
 
@@ -121,6 +133,20 @@ class PointCloudService:
         if file_ext not in PointCloudService.POINT_CLOUD_FILE_EXTENSIONS:
             raise ApiException("Invalid file type for point clouds.")
 
+    @staticmethod
+    def getOriginalFilePath(point_cloud_path: str, fileName: str) -> str:
+        """Get path of a file in the original files directory
+
+        :param point_cloud_path: str
+        :param fileName: str
+        :return: path to file
+        """
+        return get_asset_path(
+            point_cloud_path,
+            PointCloudService.ORIGINAL_FILES_DIR,
+            os.path.basename(fileName),
+        )
+
     @staticmethod
     def putPointCloudInOriginalsFileDir(
         point_cloud_path: str, fileObj: IO, fileName: str
@@ -132,11 +158,7 @@ class PointCloudService:
         :param fileName: str
         :return: path to point cloud
         """
-        file_path = get_asset_path(
-            point_cloud_path,
-            PointCloudService.ORIGINAL_FILES_DIR,
-            os.path.basename(fileName),
-        )
+        file_path = PointCloudService.getOriginalFilePath(point_cloud_path, fileName)
 
         with open(file_path, "wb") as f:
             # set current file position to start so all contents are copied.
@@ -115,6 +115,8 @@ class ProjectsService:
                     project.id,
                 ]
             )
+        # e.g. an anonymous user that checked the (not yet existing) project id
+        UserService.invalidate_project_acl(project.id)
         setattr(project, "deletable", True)
         return project
 
@@ -307,6 +309,7 @@ class ProjectsService:
         project.public = data.get("public", project.public)
 
         database_session.commit()
+        UserService.invalidate_project_acl(projectId)
 
         return project
 
@@ -329,6 +332,7 @@ class ProjectsService:
         # TODO move the database remove call to celery (https://tacc-main.atlassian.net/browse/WG-235)
         database_session.query(Project).filter(Project.id == projectId).delete()
         database_session.commit()
+        UserService.invalidate_project_acl(projectId)
 
         remove_project_assets.apply_async(args=[projectId])
 
@@ -361,6 +365,7 @@ class ProjectsService:
         )
         project_user.admin = admin
         database_session.commit()
+        UserService.invalidate_project_acl(projectId)
 
     @staticmethod
     def getUsers(database_session, projectId: int) -> List[User]:
@@ -401,6 +406,7 @@ class ProjectsService:
 
         project.users.remove(user)
         database_session.commit()
+        UserService.invalidate_project_acl(projectId)
 
     @staticmethod
     def is_project_watching_content_on_system_path(
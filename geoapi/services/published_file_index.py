@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from geoapi.models import PublishedFileIndex, PublishedFile
+from geoapi.settings import settings
+from geoapi.log import logger
+
+
+class PublishedFileIndexService:
+    """Service for the persisted (and shared) file indexes of published DesignSafe projects."""
+
+    @staticmethod
+    def get(
+        db_session: Session, designsafe_project_id: str
+    ) -> PublishedFileIndex | None:
+        return (
+            db_session.query(PublishedFileIndex)
+            .filter(PublishedFileIndex.designsafe_project_id == designsafe_project_id)
+            .first()
+        )
+
+    @staticmethod
+    def get_for_update(
+        db_session: Session, designsafe_project_id: str
+    ) -> PublishedFileIndex:
+        """Get (creating if needed) the index and lock it until the session commits.
+
+        Only one worker rebuilds an index at a time; others wait and then find it current.
+        """
+        db_session.execute(
+            insert(PublishedFileIndex)
+            .values(designsafe_project_id=designsafe_project_id)
+            .on_conflict_do_nothing(index_elements=["designsafe_project_id"])
+        )
+        return (
+            db_session.query(PublishedFileIndex)
+            .filter(PublishedFileIndex.designsafe_project_id == designsafe_project_id)
+            .populate_existing()
+            .with_for_update()
+            .one()
+        )
+
+    @staticmethod
+    def is_recently_checked(index: PublishedFileIndex | None) -> bool:
+        """Index was checked against the published project within PUBLISHED_FILE_INDEX_TTL"""
+        if index is None or index.built_at is None or index.checked_at is None:
+            return False
+        age = datetime.now(timezone.utc) - index.checked_at
+        return age < timedelta(seconds=settings.PUBLISHED_FILE_INDEX_TTL)
+
+    @staticmethod
+    def is_current(index: PublishedFileIndex | None, listing_signature: str) -> bool:
+        """Index matches the published project's listing and is not too old to trust"""
+        if index is None or index.built_at is None:
+            return False
+        if index.listing_signature != listing_signature:
+            return False
+        age = datetime.now(timezone.utc) - index.built_at
+        return age < timedelta(seconds=settings.PUBLISHED_FILE_INDEX_MAX_AGE)
+
+    @staticmethod
+    def mark_checked(db_session: Session, index: PublishedFileIndex) -> None:
+        index.checked_at = datetime.now(timezone.utc)
+        db_session.commit()
+
+    @staticmethod
+    def update(
+        db_session: Session,
+        index: PublishedFileIndex,
+        file_index: dict[str, list[str]],
+        listing_signature: str,
+    ) -> None:
+        """Update index to match `file_index` (filename -> paths) and commit.
+
+        Only the files that were added or removed since the last build are written.
+        """
+        existing = {
+            (filename, path): file_id
+            for file_id, filename, path in db_session.query(
+                PublishedFile.id, PublishedFile.filename, PublishedFile.path
+            ).filter(PublishedFile.index_id == index.id)
+        }
+        current = {
+            (filename, path) for filename, paths in file_index.items() for path in paths
+        }
+
+        removed_ids = [
+            file_id for key, file_id in existing.items() if key not in current
+        ]
+        added = [
+            {"index_id": index.id, "filename": filename, "path": path}
+            for filename, path in current
+            if (filename, path) not in existing
+        ]
+
+        if removed_ids:
+            db_session.execute(
+                delete(PublishedFile).where(PublishedFile.id.in_(removed_ids))
+            )
+        if added:
+            db_session.execute(insert(PublishedFile), added)
+
+        now = datetime.now(timezone.utc)
+        index.listing_signature = listing_signature
+        index.file_count = len(current)
+        index.built_at = now
+        index.checked_at = now
+        db_session.commit()
+
+        logger.info(
+            f"Updated published file index for {index.designsafe_project_id}: "
+            f"{len(current)} files ({len(added)} added, {len(removed_ids)} removed)"
+        )
+
+    @staticmethod
+    def find_paths(db_session: Session, index_id: int, filename: str) -> list[str]:
+        """Get paths (without leading "/") of published files with this filename"""
+        rows = (
+            db_session.query(PublishedFile.path)
+            .filter(
+                PublishedFile.index_id == index_id, PublishedFile.filename == filename
+            )
+            .order_by(PublishedFile.path)
+            .all()
+        )
+        return [path for (path,) in rows]
@@ -1,13 +1,48 @@
+import hmac
+import time
+import hashlib
+import jwt
+import requests
 from typing import List, Dict, Tuple, Optional
 from celery import uuid as celery_uuid
 
-from geoapi.models import TileServer, Task, User
+from geoalchemy2.shape import from_shape
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+
+from geoapi.models import TileServer, TileServerMosaicMember, Task, User
 from geoapi.schema.tapis import TapisFilePath
+from geoapi.settings import settings
 from geoapi.log import logger
+from geoapi.utils import tile_cache
+from geoapi.exceptions import ApiException
 from geoapi.utils.assets import delete_assets
+from geoapi.utils.raster import (
+    RasterStatistics,
+    get_raster_statistics,
+    sample_raster,
+)
 from sqlalchemy import inspect, func
 from sqlalchemy.dialects.postgresql import JSONB
 
+TILE_TOKEN_ALGORITHM = "HS256"
+TILE_FORMATS = {"png": "image/png", "webp": "image/webp"}
+TITILER_TIMEOUT = 30
+
+
+def _get_tile_token_key() -> str:
+    """
+    Key that tile tokens are signed with
+
+    TILE_TOKEN_SECRET if set, otherwise a key derived from SECRET_KEY (so a tile token
+    can't be used as anything else signed with SECRET_KEY, and vice versa)
+    """
+    if settings.TILE_TOKEN_SECRET:
+        return settings.TILE_TOKEN_SECRET
+    return hmac.new(
+        settings.SECRET_KEY.encode(), b"geoapi-tile-token", hashlib.sha256
+    ).hexdigest()
+
 
 class TileService:
     """
@@ -92,10 +127,25 @@ class TileService:
         return query.all()
 
     @staticmethod
-    def deleteTileServer(database_session, tile_server_id: int) -> None:
+    def deleteTileServer(
+        database_session, tile_server_id: int, user: Optional[User] = None
+    ) -> None:
+        """
+        Delete a tile server (and its assets)
+
+        Mosaics that the tile server is a member of are rebuilt without it (as tasks
+        of `user`) or deleted if it was their last member. Their cached tiles are
+        removed right away.
+        """
         ts = database_session.get(TileServer, tile_server_id)
 
         uuid_str = str(ts.uuid) if ts.uuid else None
+        mosaic_ids = [
+            mosaic_id
+            for (mosaic_id,) in database_session.query(
+                TileServerMosaicMember.mosaic_id
+            ).filter(TileServerMosaicMember.member_id == tile_server_id)
+        ]
 
         database_session.delete(ts)
         database_session.commit()
@@ -103,6 +153,154 @@ class TileService:
         # cleanup asset file (if they exist)
         if uuid_str:
             delete_assets(projectId=ts.project_id, uuid=uuid_str)
+            tile_cache.invalidate_layer(ts.project_id, uuid_str)
+
+        for mosaic_id in mosaic_ids:
+            # cached tiles of the mosaic show the deleted tile server (until rebuilt)
+            mosaic = database_session.get(TileServer, mosaic_id)
+            if mosaic.uuid:
+                tile_cache.invalidate_layer(mosaic.project_id, str(mosaic.uuid))
+
+            remaining_member_ids = [
+                member.member_id
+                for member in TileService.get_mosaic_members(
+                    database_session, mosaic_id
+                )
+            ]
+            if not remaining_member_ids:
+                TileService.deleteTileServer(database_session, mosaic_id, user)
+            elif user is None:
+                logger.warning(
+                    f"Mosaic tile server:{mosaic_id} still refers to deleted "
+                    f"tile server:{tile_server_id} and needs to be recreated"
+                )
+            else:
+                TileService._queue_mosaic(
+                    database_session,
+                    user,
+                    mosaic.project_id,
+                    mosaic.name,
+                    remaining_member_ids,
+                    mosaic_id=mosaic_id,
+                )
+
+    @staticmethod
+    def get_mosaic_members(
+        database_session, mosaic_id: int, geometry: Optional[BaseGeometry] = None
+    ) -> List[TileServerMosaicMember]:
+        """
+        Get the members of a mosaic tile server
+
+        :param geometry: only get the members whose footprints intersect this geometry
+        (EPSG:4326)
+        """
+        query = database_session.query(TileServerMosaicMember).filter(
+            TileServerMosaicMember.mosaic_id == mosaic_id
+        )
+        if geometry is not None:
+            query = query.filter(
+                func.ST_Intersects(
+                    TileServerMosaicMember.footprint, from_shape(geometry, srid=4326)
+                )
+            )
+        return query.order_by(TileServerMosaicMember.member_id).all()
+
+    @staticmethod
+    def create_mosaic(
+        database_session,
+        user: User,
+        project_id: int,
+        name: str,
+        tile_server_ids: List[int],
+    ) -> Task:
+        """
+        Queue creating a mosaic tile server (a VRT) of internal (COG) tile servers of a
+        project
+
+        :raises ApiException: if there are less than two tile servers or they are not
+        internal COG tile servers of the project
+        """
+        tile_server_ids = list(dict.fromkeys(tile_server_ids))
+        if len(tile_server_ids) < 2:
+            raise ApiException("A mosaic needs at least two tile servers")
+
+        tile_servers = (
+            database_session.query(TileServer)
+            .filter(TileServer.id.in_(tile_server_ids))
+            .filter(TileServer.project_id == project_id)
+            .filter(TileServer.internal.is_(True))
+            .filter(TileServer.kind == "cog")
+            .all()
+        )
+        invalid_ids = set(tile_server_ids) - {ts.id for ts in tile_servers}
+        if invalid_ids:
+            raise ApiException(
+                "Only internal (imported raster) tile servers of the project can be "
+                f"part of a mosaic: {sorted(invalid_ids)}"
+            )
+
+        return TileService._queue_mosaic(
+            database_session, user, project_id, name, tile_server_ids
+        )
+
+    @staticmethod
+    def _queue_mosaic(
+        database_session,
+        user: User,
+        project_id: int,
+        name: str,
+        tile_server_ids: List[int],
+        mosaic_id: Optional[int] = None,
+    ) -> Task:
+        from geoapi.tasks.raster import create_mosaic_tile_server
+
+        celery_task_uuid = celery_uuid()
+        action = "Create" if mosaic_id is None else "Rebuild"
+        task = Task(
+            process_id=celery_task_uuid,
+            status="QUEUED",
+            description=f"{action} mosaic {name}",
+            project_id=project_id,
+        )
+        database_session.add(task)
+        database_session.commit()
+
+        logger.info(
+            f"{action} mosaic for proj:{project_id} user:{user.username} "
+            f"of tile servers:{tile_server_ids}"
+        )
+        try:
+            create_mosaic_tile_server.apply_async(
+                kwargs={
+                    "user_id": user.id,
+                    "project_id": project_id,
+                    "task_id": task.id,
+                    "name": name,
+                    "member_ids": tile_server_ids,
+                    "mosaic_id": mosaic_id,
+                },
+                task_id=celery_task_uuid,
+            )
+        except Exception:
+            logger.exception("Failed to publish Celery job for task_id=%s", task.id)
+            task.status = "error"
+            task.description = "Failed to enqueue background job"
+            database_session.commit()
+        return task
+
+    @staticmethod
+    def _get_render_options(ts: TileServer) -> dict:
+        return (ts.uiOptions or {}).get("renderOptions") or {}
+
+    @staticmethod
+    def _invalidate_tiles_if_render_options_changed(
+        ts: TileServer, previous_render_options: dict
+    ) -> None:
+        """Remove cached tiles of an internal layer whose render options changed"""
+        if not ts.internal or ts.uuid is None:
+            return
+        if TileService._get_render_options(ts) != previous_render_options:
+            tile_cache.invalidate_layer(ts.project_id, str(ts.uuid))
 
     @staticmethod
     def updateTileServer(database_session, tileServerId: int, data: dict):
@@ -110,6 +308,7 @@ class TileService:
         Update a single tile server with partial data.
         """
         ts = database_session.get(TileServer, tileServerId)
+        previous_render_options = TileService._get_render_options(ts)
 
         # Identify JSONB columns that need special merge handling
         jsonb_fields = TileService._get_jsonb_fields(TileServer)
@@ -125,6 +324,9 @@ class TileService:
                 setattr(ts, key, value)
 
         database_session.commit()
+        TileService._invalidate_tiles_if_render_options_changed(
+            ts, previous_render_options
+        )
         return ts
 
     @staticmethod
@@ -147,6 +349,7 @@ class TileService:
 
         for tsv in dataList:
             ts = database_session.get(TileServer, int(tsv["id"]))
+            previous_render_options = TileService._get_render_options(ts)
 
             for key, value in tsv.items():
                 if key in jsonb_fields and value is not None:
@@ -160,9 +363,112 @@ class TileService:
 
             ret_list.append(ts)
             database_session.commit()
+            TileService._invalidate_tiles_if_render_options_changed(
+                ts, previous_render_options
+            )
 
         return ret_list
 
+    @staticmethod
+    def create_tile_token(ts: TileServer) -> str:
+        """
+        Create a token for getting the tiles of an internal layer
+
+        The token is only issued once access to the layer's project is checked, so tile
+        requests don't need to check access (or even query the database).
+        """
+        claims = {
+            "project_id": ts.project_id,
+            "uuid": str(ts.uuid),
+            "url": ts.url,
+            "exp": int(time.time()) + settings.TILE_TOKEN_TTL,
+        }
+        return jwt.encode(claims, _get_tile_token_key(), algorithm=TILE_TOKEN_ALGORITHM)
+
+    @staticmethod
+    def decode_tile_token(token: str) -> Dict:
+        """
+        Get the claims (project_id, uuid and url of layer) of a tile token
+
+        :raises jwt.InvalidTokenError: if the token is invalid or expired
+        """
+        return jwt.decode(
+            token, _get_tile_token_key(), algorithms=[TILE_TOKEN_ALGORITHM]
+        )
+
+    @staticmethod
+    def get_tile(
+        project_id: int,
+        uuid: str,
+        url: str,
+        z: int,
+        x: int,
+        y: int,
+        tile_format: str,
+        render_options: Dict,
+    ) -> Tuple[int, bytes, bool]:
+        """
+        Get a tile of an internal layer from the tile cache or else render it with
+        TiTiler (and cache it)
+
+        :return: status code, content and whether the tile came from the cache
+        """
+        use_cache = settings.TILE_CACHE_MAX_SIZE > 0
+        tile_path = tile_cache.get_tile_path(
+            project_id, uuid, render_options, z, x, y, tile_format
+        )
+        if use_cache:
+            content = tile_cache.get_tile(tile_path)
+            if content is not None:
+                return 200, content, True
+            # taken before rendering (tile is not stored if layer is invalidated meanwhile)
+            generation = tile_cache.get_layer_generation(project_id, uuid)
+
+        response = requests.get(
+            f"{settings.TITILER_URL}/cog/tiles/WebMercatorQuad/{z}/{x}/{y}.{tile_format}",
+            params={**render_options, "url": f"file://{url}"},
+            timeout=TITILER_TIMEOUT,
+        )
+        if response.status_code != 200:
+            logger.info(
+                f"TiTiler could not render tile {z}/{x}/{y} of layer:{uuid} "
+                f"(status:{response.status_code})"
+            )
+            return response.status_code, response.content, False
+
+        if use_cache:
+            tile_cache.put_tile(tile_path, response.content, generation)
+        return 200, response.content, False
+
+    @staticmethod
+    def sample(ts: TileServer, lon: float, lat: float) -> List[Optional[float]]:
+        """
+        Get the band values of an internal tile server at a point
+
+        :raises ApiException: if the point is not a valid lon/lat
+        """
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            raise ApiException(f"Invalid point: {lon}, {lat}")
+        return sample_raster(ts.url, lon, lat)
+
+    @staticmethod
+    def get_statistics(ts: TileServer, geometry: Dict) -> RasterStatistics:
+        """
+        Get statistics of the bands of an internal tile server in a polygon
+
+        :raises ApiException: if the geometry is not a valid polygon or is too large
+        """
+        try:
+            polygon = shape(geometry)
+        except Exception as e:
+            raise ApiException(f"Invalid geometry: {e}") from e
+        if polygon.geom_type not in ("Polygon", "MultiPolygon") or not polygon.is_valid:
+            raise ApiException("Geometry must be a valid Polygon or MultiPolygon")
+        try:
+            return get_raster_statistics(ts.url, geometry)
+        except ValueError as e:
+            raise ApiException(str(e)) from e
+
     def import_tile_server_files(
         database_session,
         user: User,
@@ -1,12 +1,32 @@
+import hashlib
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 import requests
 from sqlalchemy.exc import InvalidRequestError
 
 from geoapi.models import Auth, User, Project, ProjectUser
 from geoapi.utils import jwt_utils
 from geoapi.utils.tenants import get_tapis_api_server
+from geoapi.utils.redis_utils import RedisCache
+from geoapi.utils.users import is_anonymous
+from geoapi.settings import settings
 from geoapi.log import logger
 
+# Users of recently seen JWTs (keyed by hash of token)
+jwt_user_cache = RedisCache(
+    "jwt_user",
+    ttl=settings.JWT_USER_CACHE_TTL,
+    max_entries=settings.JWT_USER_CACHE_MAX_ENTRIES,
+)
+
+# Access of users to projects (keyed by project id and user id), see
+# UserService.get_project_acl
+project_acl_cache = RedisCache(
+    "project_acl",
+    ttl=settings.PROJECT_ACL_CACHE_TTL,
+    max_entries=settings.PROJECT_ACL_CACHE_MAX_ENTRIES,
+)
+
 
 class ExpiredTokenError(Exception):
     """Token is expired"""
@@ -75,37 +95,100 @@ class UserService:
             database_session.refresh(user)
         return user
 
+    @staticmethod
+    def get_user_for_token(
+        database_session, username: str, tenant: str, access_token: str
+    ) -> User:
+        """
+        Get (or create) the user of a JWT and store the JWT as their access token (see
+        update_access_token)
+
+        Tokens seen in the last JWT_USER_CACHE_TTL seconds only need the user to be
+        looked up by id (see jwt_user_cache); the access token is only checked and
+        stored when the token changes.
+        """
+        key = hashlib.sha256(access_token.encode()).hexdigest()
+        cached = jwt_user_cache.get(key)
+        if cached:
+            user = database_session.get(User, cached["user_id"])
+            if user and user.username == username and user.tenant_id == tenant:
+                return user
+
+        user = UserService.getUser(database_session, username, tenant)
+        if not user:
+            user = UserService.create(
+                database_session,
+                username=username,
+                access_token=access_token,
+                tenant=tenant,
+            )
+        else:
+            UserService.update_access_token(database_session, user, access_token)
+        jwt_user_cache.set(key, {"user_id": user.id})
+        return user
+
     @staticmethod
     def get(database_session, userId: int) -> User:
         return database_session.get(User, userId)
 
     @staticmethod
-    def canAccess(database_session, user: User, projectId: int) -> bool:
-        up = (
-            database_session.query(ProjectUser)
-            .join(Project)
-            .filter(ProjectUser.user_id == user.id)
-            .filter(Project.tenant_id == user.tenant_id)
-            .filter(ProjectUser.project_id == projectId)
-            .one_or_none()
+    def get_project_acl(database_session, user: User, projectId: int) -> Optional[dict]:
+        """
+        Get the access of a user (or anonymous user) to a project
+
+        Access is cached (see project_acl_cache) and invalidated by
+        invalidate_project_acl whenever the project's users or public status change.
+
+        :return: {"member", "admin", "creator", "public"} (or None if there is no
+        project)
+        """
+        # the generation is read before the database, so access read before an
+        # invalidation is cached under the previous generation (i.e. never used)
+        generation = project_acl_cache.get_generation(str(projectId))
+        key = (
+            f"{projectId}:{generation}:{'anonymous' if is_anonymous(user) else user.id}"
         )
-        if up:
-            return True
-        return False
+        acl = project_acl_cache.get(key) if generation is not None else None
+        if acl is not None:
+            return acl
+
+        project = database_session.get(Project, projectId)
+        if project is None:
+            return None
+        up = None
+        if not is_anonymous(user):
+            up = (
+                database_session.query(ProjectUser)
+                .join(Project)
+                .filter(ProjectUser.user_id == user.id)
+                .filter(Project.tenant_id == user.tenant_id)
+                .filter(ProjectUser.project_id == projectId)
+                .one_or_none()
+            )
+        acl = {
+            "member": up is not None,
+            "admin": bool(up and up.admin),
+            "creator": bool(up and up.creator),
+            "public": bool(project.public),
+        }
+        if generation is not None:
+            project_acl_cache.set(key, acl)
+        return acl
+
+    @staticmethod
+    def invalidate_project_acl(projectId: int) -> None:
+        """Remove the cached access of all users to a project"""
+        project_acl_cache.invalidate_generation(str(projectId))
+
+    @staticmethod
+    def canAccess(database_session, user: User, projectId: int) -> bool:
+        acl = UserService.get_project_acl(database_session, user, projectId)
+        return bool(acl and acl["member"])
 
     @staticmethod
     def is_admin_or_creator(database_session, user: User, projectId: int) -> bool:
-        up = (
-            database_session.query(ProjectUser)
-            .join(Project)
-            .filter(ProjectUser.user_id == user.id)
-            .filter(Project.tenant_id == user.tenant_id)
-            .filter(ProjectUser.project_id == projectId)
-            .one_or_none()
-        )
-        if up:
-            return up.admin or up.creator
-        return False
+        acl = UserService.get_project_acl(database_session, user, projectId)
+        return bool(acl and (acl["admin"] or acl["creator"]))
 
     @staticmethod
     def update_access_token(database_session, user: User, access_token: str) -> None:
@@ -123,6 +206,9 @@ class UserService:
             # as we have a valid refresh token and can use that
             return
 
+        if user.auth.access_token == access_token:
+            return
+
         # if missing access token or the new one expires later, then we can update it
         if not user.auth.access_token or jwt_utils.compare_token_expiry(
             access_token, user.auth.access_token
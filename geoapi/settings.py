@@ -27,6 +27,135 @@ class Config(object):
     DESIGNSAFE_URL = os.environ.get("DESIGNSAFE_URL")
     APP_ENV = os.environ.get("APP_ENV")
 
+    # Periodic watch content/users refresh: max number of projects refreshed at the
+    # same time for a single storage system
+    WATCH_REFRESH_MAX_CONCURRENCY_PER_SYSTEM = int(
+        os.environ.get("WATCH_REFRESH_MAX_CONCURRENCY_PER_SYSTEM", 4)
+    )
+
+    # Importing a directory: number of files downloaded ahead of the file being
+    # imported and the disk space (bytes in ASSETS_BASE_DIR/tmp) they may use
+    IMPORT_PREFETCH_MAX_FILES = int(os.environ.get("IMPORT_PREFETCH_MAX_FILES", 4))
+    IMPORT_PREFETCH_TEMP_SPACE_BUDGET = int(
+        os.environ.get("IMPORT_PREFETCH_TEMP_SPACE_BUDGET", 2 * 1024**3)
+    )
+
+    # DesignSafe project data is cached (shared by backend and workers) for this many
+    # seconds, for at most this many projects
+    DESIGNSAFE_PROJECT_CACHE_TTL = int(
+        os.environ.get("DESIGNSAFE_PROJECT_CACHE_TTL", 5 * 60)
+    )
+    DESIGNSAFE_PROJECT_CACHE_MAX_ENTRIES = int(
+        os.environ.get("DESIGNSAFE_PROJECT_CACHE_MAX_ENTRIES", 1000)
+    )
+
+    # Tapis metadata of files being imported is cached (per worker process) for this many
+    # seconds, for at most this many files
+    TAPIS_METADATA_CACHE_TTL = int(os.environ.get("TAPIS_METADATA_CACHE_TTL", 60 * 60))
+    TAPIS_METADATA_CACHE_MAX_ENTRIES = int(
+        os.environ.get("TAPIS_METADATA_CACHE_MAX_ENTRIES", 10000)
+    )
+
+    # Users of JWTs seen in the last JWT_USER_CACHE_TTL seconds are looked up by id
+    # (without checking or storing the access token again), for at most this many tokens
+    JWT_USER_CACHE_TTL = int(os.environ.get("JWT_USER_CACHE_TTL", 60))
+    JWT_USER_CACHE_MAX_ENTRIES = int(
+        os.environ.get("JWT_USER_CACHE_MAX_ENTRIES", 10000)
+    )
+
+    # Access of users to projects (member, admin, creator and whether the project is
+    # public) is cached for this many seconds (it is invalidated when it changes), for at
+    # most this many users and projects
+    PROJECT_ACL_CACHE_TTL = int(os.environ.get("PROJECT_ACL_CACHE_TTL", 10 * 60))
+    PROJECT_ACL_CACHE_MAX_ENTRIES = int(
+        os.environ.get("PROJECT_ACL_CACHE_MAX_ENTRIES", 50000)
+    )
+
+    # Persisted file index of a published DesignSafe project: used without checking
+    # DesignSafe for PUBLISHED_FILE_INDEX_TTL seconds and rebuilt (even if the published
+    # project looks unchanged) once older than PUBLISHED_FILE_INDEX_MAX_AGE seconds
+    PUBLISHED_FILE_INDEX_TTL = int(os.environ.get("PUBLISHED_FILE_INDEX_TTL", 60 * 60))
+    PUBLISHED_FILE_INDEX_MAX_AGE = int(
+        os.environ.get("PUBLISHED_FILE_INDEX_MAX_AGE", 7 * 24 * 60 * 60)
+    )
+
+    # File location checks commit this many assets/tile servers at a time and check
+    # this many legacy asset files on Tapis at the same time
+    FILE_LOCATION_CHECK_BATCH_SIZE = int(
+        os.environ.get("FILE_LOCATION_CHECK_BATCH_SIZE", 200)
+    )
+    FILE_LOCATION_CHECK_MAX_CONCURRENCY = int(
+        os.environ.get("FILE_LOCATION_CHECK_MAX_CONCURRENCY", 8)
+    )
+
+    # Heavy tasks (point cloud and raster conversions) reserve their estimated memory and
+    # cpus on the worker host; if they don't fit, the task is retried (at most
+    # HEAVY_RESOURCES_MAX_RETRIES times, every HEAVY_RESOURCES_RETRY_SECONDS) instead of
+    # holding a worker while waiting. Host capacity defaults to 80% of physical memory
+    # and all cpus.
+    HEAVY_RESOURCES_MEMORY = int(os.environ.get("HEAVY_RESOURCES_MEMORY", 0))
+    HEAVY_RESOURCES_CPUS = int(os.environ.get("HEAVY_RESOURCES_CPUS", 0))
+    HEAVY_TASK_CPUS = int(os.environ.get("HEAVY_TASK_CPUS", 4))
+    HEAVY_RESOURCES_RETRY_SECONDS = int(
+        os.environ.get("HEAVY_RESOURCES_RETRY_SECONDS", 30)
+    )
+    HEAVY_RESOURCES_MAX_RETRIES = int(
+        os.environ.get("HEAVY_RESOURCES_MAX_RETRIES", 24 * 60 * 2)
+    )
+
+    # Point cloud files with more points than a conversion can handle in the host's memory
+    # (or than POINT_CLOUD_TILE_MAX_POINTS, if set) are split into tiles that are converted
+    # separately, POINT_CLOUD_TILE_CONCURRENCY tiles at a time
+    POINT_CLOUD_TILE_MAX_POINTS = int(os.environ.get("POINT_CLOUD_TILE_MAX_POINTS", 0))
+    POINT_CLOUD_TILE_CONCURRENCY = int(
+        os.environ.get("POINT_CLOUD_TILE_CONCURRENCY", 1)
+    )
+
+    # Large files (point clouds, rasters) are downloaded from Tapis as this many byte
+    # ranges at the same time when they are at least TAPIS_DOWNLOAD_PARALLEL_MIN_SIZE bytes
+    TAPIS_DOWNLOAD_PARALLEL_SEGMENTS = int(
+        os.environ.get("TAPIS_DOWNLOAD_PARALLEL_SEGMENTS", 4)
+    )
+    TAPIS_DOWNLOAD_PARALLEL_MIN_SIZE = int(
+        os.environ.get("TAPIS_DOWNLOAD_PARALLEL_MIN_SIZE", 512 * 1024**2)
+    )
+
+    # Tiles of internal (COG) layers are rendered by TiTiler and cached on disk (shared by
+    # backend and workers), least recently used tiles being removed once the cache is
+    # larger than TILE_CACHE_MAX_SIZE bytes (0 disables the cache). Tile URLs contain a
+    # token, valid for TILE_TOKEN_TTL seconds, issued once access to the project is checked
+    # and signed with TILE_TOKEN_SECRET (if not set, a key derived from SECRET_KEY is used)
+    TITILER_URL = os.environ.get("TITILER_URL", "http://geoapi_titiler:80")
+    TILE_CACHE_DIR = os.environ.get(
+        "TILE_CACHE_DIR", os.path.join(ASSETS_BASE_DIR, "tile_cache")
+    )
+    TILE_CACHE_MAX_SIZE = int(os.environ.get("TILE_CACHE_MAX_SIZE", 10 * 1024**3))
+    TILE_TOKEN_TTL = int(os.environ.get("TILE_TOKEN_TTL", 12 * 60 * 60))
+    TILE_TOKEN_SECRET = os.environ.get("TILE_TOKEN_SECRET")
+
+    # Signed asset urls (/assets/signed/<token>/<expires>/<project id>/...) are checked
+    # by nginx (secure_link) with ASSET_URL_SECRET, so asset requests don't need geoapi to
+    # check access to the project. They are valid for at least ASSET_URL_TTL seconds.
+    ASSET_URL_SECRET = os.environ.get("ASSET_URL_SECRET")
+    ASSET_URL_TTL = int(os.environ.get("ASSET_URL_TTL", 4 * 60 * 60))
+
+    # Once a raster is imported, its tiles from minZoom up to TILE_PRESEED_MAX_ZOOM (-1
+    # disables) are rendered into the tile cache, TILE_PRESEED_CONCURRENCY at a time. Zoom
+    # levels that would exceed TILE_PRESEED_MAX_TILES tiles in total are skipped.
+    TILE_PRESEED_MAX_ZOOM = int(os.environ.get("TILE_PRESEED_MAX_ZOOM", 8))
+    TILE_PRESEED_MAX_TILES = int(os.environ.get("TILE_PRESEED_MAX_TILES", 500))
+    TILE_PRESEED_CONCURRENCY = int(os.environ.get("TILE_PRESEED_CONCURRENCY", 8))
+
+    # Values of internal (COG) layers are read in process: point samples from blocks kept
+    # in a cache of RASTER_BLOCK_CACHE_SIZE bytes (per process), polygon statistics from
+    # the finest overview level with at most RASTER_STATISTICS_MAX_PIXELS pixels
+    RASTER_BLOCK_CACHE_SIZE = int(
+        os.environ.get("RASTER_BLOCK_CACHE_SIZE", 64 * 1024**2)
+    )
+    RASTER_STATISTICS_MAX_PIXELS = int(
+        os.environ.get("RASTER_STATISTICS_MAX_PIXELS", 4_000_000)
+    )
+
 
 class DeployedConfig(Config):
     DEBUG = False
@@ -63,15 +192,19 @@ class LocalDevelopmentConfig(Config):
 class UnitTestingConfig(LocalDevelopmentConfig):
     DB_NAME = "test"
     DB_HOST = os.environ.get("DB_HOST", "postgres")
+    REDIS_HOST = os.environ.get("REDIS_HOST", "geoapi_redis")
     TESTING = True
     STREETVIEW_DIR = os.environ.get("STREETVIEW_DIR", "/tmp/streetview")
     ASSETS_BASE_DIR = "/tmp"
+    TILE_CACHE_DIR = "/tmp/tile_cache"
+    TILE_PRESEED_MAX_ZOOM = -1
     DESIGNSAFE_URL = os.environ.get(
         "DESIGNSAFE_URL", "https://designsafe-not-real.tacc.utexas.edu"
     )
     TAPIS_CLIENT_ID = "test_client_id"
     TAPIS_CLIENT_KEY = "test_client_key_1234"
     SECRET_KEY = os.environ.get("SESSION_SECRET_KEY", "session_secret_key_1234")
+    ASSET_URL_SECRET = "asset_url_secret_1234"
 
 
 APP_ENV = os.environ.get("APP_ENV", "").lower()
@@ -2,12 +2,16 @@ import os
 import json
 import time
 import datetime
+import shutil
 import concurrent
 import concurrent.futures
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
 from enum import Enum
 
-from celery import current_task
+from celery import current_task, chord
+from celery.exceptions import MaxRetriesExceededError, Retry
 from sqlalchemy import true
 
 from geoapi.celery_app import app
@@ -19,12 +23,13 @@ from geoapi.utils.external_apis import (
     TapisUtils,
     SystemUser,
     get_system_users,
-    get_metadata,
     TapisFileGetError,
     TapisListingError,
+    ASSETS_TEMP_DIR,
 )
 from geoapi.utils import features as features_util
 from geoapi.log import logger
+from geoapi.settings import settings
 from geoapi.services.features import FeaturesService
 from geoapi.services.imports import ImportsService
 from geoapi.services.vectors import SHAPEFILE_FILE_ADDITIONAL_FILES
@@ -34,8 +39,11 @@ from geoapi.utils.additional_file import AdditionalFile
 from geoapi.utils.geo_location import (
     parse_rapid_geolocation,
     get_geolocation_from_file_metadata,
+    needs_file_metadata,
+    FileMetadataResolver,
 )
 from geoapi.tasks.utils import send_progress_update
+from geoapi.utils.redis_utils import non_blocking_lock, concurrency_slot
 
 
 class ImportState(Enum):
@@ -47,16 +55,130 @@ class ImportState(Enum):
 def get_file(client, system_id, path, required):
     """
     Get file callable function to be used for asynchronous future task
+
+    Note: the caller needs to have called `client._ensure_valid_token()` as the token
+    is not refreshed here (which would use the database session from this thread)
     """
     result_file = None
     error = None
     try:
-        result_file = client.getFile(system_id, path)
+        result_file = client._download_to_temp_file(system_id, path)
     except Exception as e:  # noqa: E722
         error = e
     return system_id, path, required, result_file, error
 
 
+class FilePrefetcher:
+    """
+    Download files from a system ahead of when they are needed
+
+    Files are downloaded (in the given order) by a small pool of threads while the
+    caller is importing an earlier file. At most `max_files` files are downloaded
+    ahead, and a download is only started if the files already downloaded (or being
+    downloaded, or being imported) fit within the temp space budget. A single file
+    larger than the budget is still downloaded, but only once nothing else is held.
+
+    Every file passed in should be consumed (in order) via `file()`; anything not
+    consumed is cleaned up on exit.
+
+    Usage:
+        with FilePrefetcher(client, system_id, listings) as prefetcher:
+            for item in listings:
+                with prefetcher.file(item.path) as tmp_file:
+                    ...
+    """
+
+    def __init__(
+        self,
+        client,
+        system_id: str,
+        listings: list,
+        max_files: int = None,
+        temp_space_budget: int = None,
+    ):
+        self.client = client
+        self.system_id = system_id
+        self.max_files = max(
+            1, max_files if max_files else settings.IMPORT_PREFETCH_MAX_FILES
+        )
+        budget = (
+            temp_space_budget
+            if temp_space_budget
+            else settings.IMPORT_PREFETCH_TEMP_SPACE_BUDGET
+        )
+        # never plan on using more than half of what is left in the temp dir
+        self.temp_space_budget = min(
+            budget, shutil.disk_usage(ASSETS_TEMP_DIR).free // 2
+        )
+        self._to_download = deque(listings)
+        self._downloads = {}
+        self._reserved_space = 0
+        self._executor = None
+
+    def __enter__(self):
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_files
+        )
+        self._start_downloads()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for future, _ in self._downloads.values():
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        for future, _ in self._downloads.values():
+            if not future.cancelled():
+                _, _, _, result_file, _ = future.result()
+                if result_file:
+                    result_file.close()
+        self._downloads = {}
+        self._to_download.clear()
+        return False
+
+    def _start_downloads(self):
+        if self._to_download and len(self._downloads) < self.max_files:
+            # refresh token (if needed) here as the download threads can't use the session
+            self.client._ensure_valid_token()
+        while self._to_download and len(self._downloads) < self.max_files:
+            size = self._to_download[0].size or 0
+            if (
+                self._reserved_space
+                and self._reserved_space + size > self.temp_space_budget
+            ):
+                break
+            item = self._to_download.popleft()
+            self._reserved_space += size
+            future = self._executor.submit(
+                get_file, self.client, self.system_id, item.path, True
+            )
+            self._downloads[str(item.path)] = (future, size)
+
+    @contextmanager
+    def file(self, path):
+        """
+        Get downloaded file (waiting for download to finish if needed)
+
+        The file is closed (and its space given back to the budget) on exit.
+
+        :raises
+            TapisFileGetError: Raised if unable to get file via tapis.
+        """
+        self._start_downloads()
+        future, size = self._downloads.pop(str(path))
+        try:
+            _, _, _, result_file, error = future.result()
+            if error:
+                raise error
+            result_file.filename = Path(path).name
+            try:
+                yield result_file
+            finally:
+                result_file.close()
+        finally:
+            self._reserved_space -= size
+            self._start_downloads()
+
+
 def get_additional_files(
     current_file, system_id: str, path: str, client, available_files=None
 ):
@@ -123,6 +245,7 @@ def get_additional_files(
 
     # Try to get all additional files.
     additional_files_result = []
+    client._ensure_valid_token()
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
         getting_files_futures = [
             executor.submit(
@@ -176,9 +299,11 @@ def import_file_from_tapis(userId: int, systemId: str, path: str, projectId: int
             temp_file.filename = Path(path).name
             additional_files = get_additional_files(temp_file, systemId, path, client)
 
-            optional_location_from_metadata = get_geolocation_from_file_metadata(
-                session, user, system_id=systemId, path=path
-            )
+            optional_location_from_metadata = None
+            if needs_file_metadata(os.path.join(systemId, path.lstrip("/"))):
+                optional_location_from_metadata = get_geolocation_from_file_metadata(
+                    session, user, system_id=systemId, path=path
+                )
 
             FeaturesService.fromFileObj(
                 session,
@@ -261,21 +386,46 @@ def import_files_recursively_from_path(
             import_files_recursively_from_path(
                 session, tenant_id, userId, systemId, item.path, projectId
             )
+
+    items_to_import = []
+    for item in listing:
         item_system_path = os.path.join(systemId, str(item.path).lstrip("/"))
-        if features_util.is_file_supported_for_automatic_scraping(item_system_path):
-            try:
-                # first check if there already is a file in the DB
-                target_file = ImportsService.getImport(
-                    session, projectId, systemId, str(item.path)
-                )
-                if target_file:
-                    logger.debug(
-                        f"Already imported {item_system_path} for project:{projectId} so skipping. "
-                        f"The original import was on {target_file.created} and "
-                        f"successful_import={target_file.successful_import}"
-                    )
-                    continue
+        if not features_util.is_file_supported_for_automatic_scraping(item_system_path):
+            continue
+        # first check if there already is a file in the DB
+        target_file = ImportsService.getImport(
+            session, projectId, systemId, str(item.path)
+        )
+        if target_file:
+            logger.debug(
+                f"Already imported {item_system_path} for project:{projectId} so skipping. "
+                f"The original import was on {target_file.created} and "
+                f"successful_import={target_file.successful_import}"
+            )
+            continue
+        items_to_import.append(item)
+
+    # get the metadata of all the files which need it at once
+    metadata_resolver = FileMetadataResolver(session, user, systemId)
+    metadata_resolver.prefetch(items_to_import)
+
+    # Files that don't need metadata (i.e. to see if they should be imported) are
+    # downloaded ahead while earlier files are being imported
+    items_to_download_ahead = [
+        item
+        for item in items_to_import
+        if not features_util.is_supported_file_type_in_rapp_folder_and_needs_metadata(
+            os.path.join(systemId, str(item.path).lstrip("/"))
+        )
+        and features_util.is_supported_for_automatic_scraping_without_metadata(
+            os.path.join(systemId, str(item.path).lstrip("/"))
+        )
+    ]
 
+    with FilePrefetcher(client, systemId, items_to_download_ahead) as prefetcher:
+        for item in items_to_import:
+            item_system_path = os.path.join(systemId, str(item.path).lstrip("/"))
+            try:
                 # If it is a RApp project folder and not a questionnaire file, use the metadata from tapis meta service
                 if features_util.is_supported_file_type_in_rapp_folder_and_needs_metadata(
                     item_system_path
@@ -283,7 +433,7 @@ def import_files_recursively_from_path(
                     logger.info(
                         f"RApp: importing:{item_system_path} for user:{user.username}. Using metadata service for geolocation."
                     )
-                    meta = get_metadata(session, user, systemId, item.path)
+                    meta = metadata_resolver.get_metadata(item)
 
                     logger.debug(
                         "metadata from service account for file:{} : {}".format(
@@ -338,39 +488,35 @@ def import_files_recursively_from_path(
                             item_system_path, user.username
                         )
                     )
-                    tmp_file = client.getFile(systemId, item.path)
-                    tmp_file.filename = Path(item.path).name
-                    additional_files = get_additional_files(
-                        tmp_file,
-                        systemId,
-                        item.path,
-                        client,
-                        available_files=filenames_in_directory,
-                    )
+                    with prefetcher.file(item.path) as tmp_file:
+                        additional_files = get_additional_files(
+                            tmp_file,
+                            systemId,
+                            item.path,
+                            client,
+                            available_files=filenames_in_directory,
+                        )
 
-                    optional_location_from_metadata = (
-                        get_geolocation_from_file_metadata(
-                            session, user, system_id=systemId, path=path
+                        optional_location_from_metadata = (
+                            metadata_resolver.get_geolocation(item)
                         )
-                    )
 
-                    FeaturesService.fromFileObj(
-                        session,
-                        projectId,
-                        tmp_file,
-                        {},
-                        original_system=systemId,
-                        original_path=path,
-                        additional_files=additional_files,
-                        location=optional_location_from_metadata,
-                    )
+                        FeaturesService.fromFileObj(
+                            session,
+                            projectId,
+                            tmp_file,
+                            {},
+                            original_system=systemId,
+                            original_path=path,
+                            additional_files=additional_files,
+                            location=optional_location_from_metadata,
+                        )
                     send_progress_update(
                         user,
                         current_task.request.id,
                         "success",
                         "Imported {f}".format(f=item_system_path),
                     )
-                    tmp_file.close()
                 else:
                     # skipping as not supported
                     logger.debug(
@@ -432,202 +578,362 @@ def _get_user_with_valid_token(project):
     return importing_user
 
 
-@app.task()
-def refresh_projects_watch_content():
+# Lock on a single project's refresh; longer than the beat interval so that a
+# long-running refresh of a project causes the next hourly run to be skipped
+# instead of stacked on top of it
+WATCH_REFRESH_LOCK_TIMEOUT = 3 * 60 * 60
+
+# Seconds to wait before retrying a project refresh when its system is at its
+# concurrency limit (and how many times we retry before giving up on this run)
+WATCH_REFRESH_SYSTEM_BUSY_COUNTDOWN = 60
+WATCH_REFRESH_SYSTEM_BUSY_MAX_RETRIES = 30
+
+
+class WatchRefreshStatus(str, Enum):
+    COMPLETED = "COMPLETED"
+    SKIPPED = "SKIPPED"
+    FAILED = "FAILED"
+
+
+def _order_projects_fairly(projects: list) -> list:
     """
-    Refresh users for all projects where watch_content is True
+    Order (project_id, system_id) pairs round-robin across systems
+
+    So that a system with many watched projects doesn't get to fill up the queue
+    before projects on other systems are even started.
     """
-    start_time = time.time()
-    with create_task_session() as session:
-        try:
-            logger.info("Starting to refresh all projects where watch_content is True")
-            projects_with_watch_content = (
-                session.query(Project).filter(Project.watch_content.is_(true())).all()
-            )
-            for i, project in enumerate(projects_with_watch_content):
-                try:
-                    importing_user = _get_user_with_valid_token(project)
-
-                    if importing_user is None:
-                        logger.error(
-                            f"Unable to watch content of project"
-                            f" ({i}/{len(projects_with_watch_content)}): observer:{importing_user} "
-                            f"system:{project.system_id} path:{project.system_path} project:{project.id} "
-                            f"watch_content:{project.watch_content}: No user with an active token found. "
-                            f"So we are skipping (i.e. no update of users or importing of watched "
-                            f"content)"
-                        )
-                        continue
+    by_system = {}
+    for project_id, system_id in projects:
+        by_system.setdefault(system_id, []).append(project_id)
 
-                    # perform the importing
-                    if project.watch_content:
+    ordered = []
+    queues = list(by_system.values())
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [q for q in queues if q]
+    return ordered
+
+
+def _refresh_project(task, refresh_name: str, project_id: int, refresh_function):
+    """
+    Run `refresh_function(session, project)` for a single project while holding the
+    project's lock and one of its system's concurrency slots.
+
+    Returns a summary of the run (used by summarize_watch_refresh)
+    """
+    start_time = time.time()
+    summary = {
+        "project_id": project_id,
+        "system_id": None,
+        "status": WatchRefreshStatus.COMPLETED.value,
+        "duration": 0,
+    }
+
+    # the summary is always returned (even on unexpected errors, e.g. setting up the
+    # session) as a raised exception would fail the chord and summarize_watch_refresh
+    # would never run
+    try:
+        with create_task_session() as session:
+            project = session.get(Project, project_id)
+            if project is None:
+                logger.info(
+                    f"Not refreshing {refresh_name} of project:{project_id} as it no longer exists"
+                )
+                summary["status"] = WatchRefreshStatus.SKIPPED.value
+                return summary
+            summary["system_id"] = project.system_id
+
+            with non_blocking_lock(
+                f"{refresh_name}:project:{project_id}",
+                timeout=WATCH_REFRESH_LOCK_TIMEOUT,
+            ) as locked:
+                if not locked:
+                    logger.info(
+                        f"Skipping refresh of {refresh_name} of project:{project_id} as a previous "
+                        f"refresh of that project is still running"
+                    )
+                    summary["status"] = WatchRefreshStatus.SKIPPED.value
+                    return summary
+
+                with concurrency_slot(
+                    f"{refresh_name}:system:{project.system_id}",
+                    limit=settings.WATCH_REFRESH_MAX_CONCURRENCY_PER_SYSTEM,
+                    timeout=WATCH_REFRESH_LOCK_TIMEOUT,
+                ) as has_slot:
+                    if not has_slot:
                         logger.info(
-                            f"Refreshing content of project ({i}/{len(projects_with_watch_content)}): "
-                            f"observer:{importing_user} system:{project.system_id} path:{project.system_path} "
-                            f"project:{project.id} watch_content:{project.watch_content}"
+                            f"System:{project.system_id} is busy so postponing refresh of "
+                            f"{refresh_name} of project:{project_id}"
                         )
-                        import_files_recursively_from_path(
-                            session,
-                            project.tenant_id,
-                            importing_user.id,
-                            project.system_id,
-                            project.system_path,
-                            project.id,
+                        try:
+                            raise task.retry(
+                                countdown=WATCH_REFRESH_SYSTEM_BUSY_COUNTDOWN
+                            )
+                        except MaxRetriesExceededError:
+                            logger.error(
+                                f"Giving up on refreshing {refresh_name} of project:{project_id} during "
+                                f"this run as system:{project.system_id} remained busy"
+                            )
+                            summary["status"] = WatchRefreshStatus.SKIPPED.value
+                            return summary
+
+                    try:
+                        refresh_function(session, project)
+                    except Exception:  # noqa: E722
+                        logger.exception(
+                            f"Unhandled exception when refreshing {refresh_name} of project:{project_id}. "
+                            "Performing rollback of current database transaction"
                         )
-                except Exception:  # noqa: E722
-                    logger.exception(
-                        f"Unhandled exception when importing for project:{project.id}. "
-                        "Performing rollback of current database transaction"
-                    )
-                    session.rollback()
-            total_time = time.time() - start_time
-            logger.info(
-                "refresh_projects_watch_content completed. "
-                "Elapsed time {}".format(datetime.timedelta(seconds=total_time))
+                        session.rollback()
+                        summary["status"] = WatchRefreshStatus.FAILED.value
+    except Retry:
+        raise
+    except Exception:  # noqa: E722
+        logger.exception(
+            f"Unexpected error when refreshing {refresh_name} of project:{project_id}"
+        )
+        summary["status"] = WatchRefreshStatus.FAILED.value
+
+    summary["duration"] = time.time() - start_time
+    logger.info(
+        f"Refreshing {refresh_name} of project:{project_id} finished with status:{summary['status']}. "
+        f"Elapsed time {datetime.timedelta(seconds=summary['duration'])}"
+    )
+    return summary
+
+
+def _refresh_project_watch_content(session, project: Project) -> None:
+    """Import any new content in the project's system/path"""
+    importing_user = _get_user_with_valid_token(project)
+
+    if importing_user is None:
+        logger.error(
+            f"Unable to watch content of project: observer:{importing_user} "
+            f"system:{project.system_id} path:{project.system_path} project:{project.id} "
+            f"watch_content:{project.watch_content}: No user with an active token found. "
+            f"So we are skipping (i.e. no update of users or importing of watched "
+            f"content)"
+        )
+        return
+
+    logger.info(
+        f"Refreshing content of project: "
+        f"observer:{importing_user} system:{project.system_id} path:{project.system_path} "
+        f"project:{project.id} watch_content:{project.watch_content}"
+    )
+    import_files_recursively_from_path(
+        session,
+        project.tenant_id,
+        importing_user.id,
+        project.system_id,
+        project.system_path,
+        project.id,
+    )
+
+
+def _refresh_project_watch_users(session, project: Project) -> None:
+    """Update the project's users (and their admin status) to match the system's users"""
+    # TODO_TAPISv3 refactored into a command (used here and by ProjectService)
+    # or just put into its own method for clarity?
+
+    # we need a user with a valid Tapis token for importing files or updating users
+    importing_user = _get_user_with_valid_token(project)
+
+    if importing_user is None:
+        logger.error(
+            f"Unable to watch users of project: observer:{importing_user} "
+            f"system:{project.system_id} path:{project.system_path} project:{project.id} "
+            f"watch_content:{project.watch_content}: No user with an active token found. "
+            f"So we are skipping (i.e. no update of users or importing of watched "
+            f"content)"
+        )
+        return
+
+    logger.info(
+        f"Refreshing users of project: "
+        f"observer:{importing_user} system:{project.system_id} path:{project.system_path} "
+        f"project:{project.id} watch_content:{project.watch_content}"
+    )
+
+    try:
+        # we need to add any users who have been added to the project/system or update
+        # if their admin-status has changed
+        current_users = set(
+            [
+                SystemUser(
+                    username=project_user.user.username,
+                    admin=project_user.admin,
+                )
+                for project_user in project.project_users
+            ]
+        )
+        updated_users = set(
+            get_system_users(session, importing_user, project.system_id)
+        )
+    except GetUsersForProjectNotSupported:
+        logger.info(
+            f"Not updating users for project:{project.id} "
+            f"system_id:{project.system_id}"
+        )
+        return
+
+    current_creator = (
+        session.query(ProjectUser)
+        .filter(ProjectUser.project_id == project.id)
+        .filter(ProjectUser.creator is True)
+        .one_or_none()
+    )
+    if current_users != updated_users:
+        logger.info("Updating users from:{} to:{}".format(current_users, updated_users))
+
+        # set project users
+        project.users = [
+            UserService.getOrCreateUser(
+                session, user.username, tenant=project.tenant_id
             )
-        except Exception:  # noqa: E722
-            logger.error(
-                "Error when trying to get list of projects where watch_content is True; "
-                "this is unexpected and should be reported "
-                "(i.e. https://jira.tacc.utexas.edu/browse/WG-131)."
+            for user in updated_users
+        ]
+        session.add(project)
+        session.commit()
+
+        updated_users_to_admin_status = {user.username: user for user in updated_users}
+        logger.info(
+            "current_users_to_admin_status:{}".format(updated_users_to_admin_status)
+        )
+        for project_user in project.project_users:
+            project_user.admin = updated_users_to_admin_status[
+                project_user.user.username
+            ].admin
+            session.add(project_user)
+        session.commit()
+
+        if current_creator:
+            # reset the creator by finding that updated user again and updating it.
+            current_creator = (
+                session.query(ProjectUser)
+                .filter(ProjectUser.project_id == project.id)
+                .filter(ProjectUser.user_id == current_creator.user_id)
+                .one_or_none()
             )
-            raise
+            if current_creator:
+                current_creator.creator = True
+                session.add(current_creator)
+                session.commit()
 
+        UserService.invalidate_project_acl(project.id)
 
-@app.task()
-def refresh_projects_watch_users():
+
+@app.task(bind=True, max_retries=WATCH_REFRESH_SYSTEM_BUSY_MAX_RETRIES)
+def refresh_project_watch_content(self, project_id: int) -> dict:
     """
-    Refresh users for all projects where watch_users is True
+    Refresh content of a single project where watch_content is True
+
+    Started by refresh_projects_watch_content()
     """
-    start_time = time.time()
-    with create_task_session() as session:
-        try:
-            logger.info("Starting to refresh all projects where watch_users is True")
-            projects_with_watch_users = (
-                session.query(Project).filter(Project.watch_users.is_(true())).all()
-            )
-            for i, project in enumerate(projects_with_watch_users):
-                # TODO_TAPISv3 refactored into a command (used here and by ProjectService)
-                # or just put into its own method for clarity?
-                try:
-                    # we need a user with a valid Tapis token for importing files or updating users
-                    importing_user = next(
-                        (
-                            user
-                            for user in project.users
-                            if user.has_unexpired_refresh_token()
-                            or user.has_valid_token()
-                        ),
-                        None,
-                    )
+    return _refresh_project(
+        self, "watch_content", project_id, _refresh_project_watch_content
+    )
 
-                    if importing_user is None:
-                        logger.error(
-                            f"Unable to watch users of project"
-                            f" ({i}/{len(projects_with_watch_users)}): observer:{importing_user} "
-                            f"system:{project.system_id} path:{project.system_path} project:{project.id} "
-                            f"watch_content:{project.watch_content}: No user with an active token found. "
-                            f"So we are skipping (i.e. no update of users or importing of watched "
-                            f"content)"
-                        )
-                        continue
 
-                    logger.info(
-                        f"Refreshing users of project ({i}/{len(projects_with_watch_users)}): "
-                        f"observer:{importing_user} system:{project.system_id} path:{project.system_path} "
-                        f"project:{project.id} watch_content:{project.watch_content}"
-                    )
+@app.task(bind=True, max_retries=WATCH_REFRESH_SYSTEM_BUSY_MAX_RETRIES)
+def refresh_project_watch_users(self, project_id: int) -> dict:
+    """
+    Refresh users of a single project where watch_users is True
 
-                    # we need to add any users who have been added to the project/system or update
-                    # if their admin-status has changed
-                    current_users = set(
-                        [
-                            SystemUser(
-                                username=project_user.user.username,
-                                admin=project_user.admin,
-                            )
-                            for project_user in project.project_users
-                        ]
-                    )
-                    updated_users = set(
-                        get_system_users(session, importing_user, project.system_id)
-                    )
+    Started by refresh_projects_watch_users()
+    """
+    return _refresh_project(
+        self, "watch_users", project_id, _refresh_project_watch_users
+    )
 
-                    current_creator = (
-                        session.query(ProjectUser)
-                        .filter(ProjectUser.project_id == project.id)
-                        .filter(ProjectUser.creator is True)
-                        .one_or_none()
-                    )
-                    if current_users != updated_users:
-                        logger.info(
-                            "Updating users from:{} to:{}".format(
-                                current_users, updated_users
-                            )
-                        )
 
-                        # set project users
-                        project.users = [
-                            UserService.getOrCreateUser(
-                                session, user.username, tenant=project.tenant_id
-                            )
-                            for user in updated_users
-                        ]
-                        session.add(project)
-                        session.commit()
-
-                        updated_users_to_admin_status = {
-                            user.username: user for user in updated_users
-                        }
-                        logger.info(
-                            "current_users_to_admin_status:{}".format(
-                                updated_users_to_admin_status
-                            )
-                        )
-                        for project_user in project.project_users:
-                            project_user.admin = updated_users_to_admin_status[
-                                project_user.user.username
-                            ].admin
-                            session.add(project_user)
-                        session.commit()
-
-                        if current_creator:
-                            # reset the creator by finding that updated user again and updating it.
-                            current_creator = (
-                                session.query(ProjectUser)
-                                .filter(ProjectUser.project_id == project.id)
-                                .filter(ProjectUser.user_id == current_creator.user_id)
-                                .one_or_none()
-                            )
-                            if current_creator:
-                                current_creator.creator = True
-                                session.add(current_creator)
-                                session.commit()
-                except GetUsersForProjectNotSupported:
-                    logger.info(
-                        f"Not updating users for project:{project.id} "
-                        f"system_id:{project.system_id}"
-                    )
-                    pass
-                except Exception:  # noqa: E722
-                    logger.exception(
-                        f"Unhandled exception when updating users for project:{project.id}. "
-                        "Performing rollback of current database transaction"
-                    )
-                    session.rollback()
-            total_time = time.time() - start_time
+@app.task()
+def summarize_watch_refresh(results: list, refresh_name: str, start_time: float):
+    """
+    Log a summary (including duration per project) of a fanned-out refresh
+
+    Called once all the per-project refresh tasks of a run have finished.
+    """
+    total_time = time.time() - start_time
+    counts = {status.value: 0 for status in WatchRefreshStatus}
+    for result in results:
+        counts[result["status"]] += 1
+
+    logger.info(
+        f"refresh_projects_{refresh_name} completed for {len(results)} projects "
+        f"({', '.join(f'{k}:{v}' for k, v in counts.items())}). "
+        f"Elapsed time {datetime.timedelta(seconds=total_time)}"
+    )
+    for result in sorted(results, key=lambda r: r["duration"], reverse=True):
+        logger.info(
+            f"refresh_projects_{refresh_name}: project:{result['project_id']} "
+            f"system:{result['system_id']} status:{result['status']} "
+            f"duration:{datetime.timedelta(seconds=result['duration'])}"
+        )
+    return {"total_time": total_time, "counts": counts, "projects": results}
+
+
+def _fan_out_watch_refresh(refresh_name: str, watch_column, project_task) -> None:
+    """
+    Start a refresh task for every project where `watch_column` is True
+
+    Tasks are queued round-robin across systems and, once they are all done,
+    summarize_watch_refresh is run.
+    """
+    start_time = time.time()
+    with create_task_session() as session:
+        try:
             logger.info(
-                "refresh_projects_watch_users completed. "
-                "Elapsed time {}".format(datetime.timedelta(seconds=total_time))
+                f"Starting to refresh all projects where {refresh_name} is True"
+            )
+            projects = (
+                session.query(Project.id, Project.system_id)
+                .filter(watch_column.is_(true()))
+                .all()
             )
         except Exception:  # noqa: E722
             logger.error(
-                "Error when trying to get list of projects where watch_users is True; "
+                f"Error when trying to get list of projects where {refresh_name} is True; "
                 "this is unexpected and should be reported "
                 "(i.e. https://jira.tacc.utexas.edu/browse/WG-131)."
             )
             raise
 
+    project_ids = _order_projects_fairly(projects)
+    if not project_ids:
+        logger.info(f"No projects where {refresh_name} is True")
+        return
+
+    logger.info(f"Queueing refresh of {refresh_name} for {len(project_ids)} projects")
+    chord(project_task.s(project_id) for project_id in project_ids)(
+        summarize_watch_refresh.s(refresh_name, start_time)
+    )
+
+
+@app.task()
+def refresh_projects_watch_content():
+    """
+    Refresh content for all projects where watch_content is True
+
+    Each project is refreshed in its own task (see refresh_project_watch_content)
+    """
+    _fan_out_watch_refresh(
+        "watch_content", Project.watch_content, refresh_project_watch_content
+    )
+
+
+@app.task()
+def refresh_projects_watch_users():
+    """
+    Refresh users for all projects where watch_users is True
+
+    Each project is refreshed in its own task (see refresh_project_watch_users)
+    """
+    _fan_out_watch_refresh(
+        "watch_users", Project.watch_users, refresh_project_watch_users
+    )
+
 
 if __name__ == "__main__":
     pass
@@ -4,7 +4,8 @@ and update their current_system/current_path accordingly.
 """
 
 from datetime import datetime, timezone
-from typing import Dict, Union
+from typing import Callable, Dict, Union
+import hashlib
 import os
 from pathlib import Path
 
@@ -12,11 +13,16 @@ from sqlalchemy import and_, or_
 
 from geoapi.celery_app import app
 from geoapi.db import create_task_session
-from geoapi.services.tile_server import TileService
 from geoapi.models import Project, Feature, User, TaskStatus, PointCloud, TileServer
 from geoapi.models.feature import FeatureAsset
 from geoapi.services.file_location_status import FileLocationStatusService
-from geoapi.utils.external_apis import TapisUtils, get_session, TapisListingError
+from geoapi.services.published_file_index import PublishedFileIndexService
+from geoapi.utils.external_apis import (
+    TapisUtils,
+    get_session,
+    TapisListingError,
+    files_exist,
+)
 from geoapi.log import logger
 from geoapi.tasks.utils import update_task_and_send_progress_update
 from geoapi.settings import settings
@@ -24,6 +30,7 @@ from geoapi.custom.designsafe.utils import (
     get_designsafe_project_id,
     extract_project_uuid,
     is_designsafe_project,
+    designsafe_project_cache,
 )
 
 DESIGNSAFE_PUBLISHED_SYSTEM = "designsafe.storage.published"
@@ -113,6 +120,10 @@ def get_project_id(user, system_id) -> str | None:
     if designsafe_uuid is None:
         return None
 
+    project = designsafe_project_cache.get(designsafe_uuid)
+    if project is not None:
+        return project["projectId"]
+
     client = get_session(user)
     response = client.get(
         settings.DESIGNSAFE_URL + f"/api/projects/v2/{designsafe_uuid}/"
@@ -125,12 +136,98 @@ def get_project_id(user, system_id) -> str | None:
         return None
 
     response.raise_for_status()
-    return response.json()["baseProject"]["value"]["projectId"]
+    project = response.json()["baseProject"]["value"]
+    designsafe_project_cache.set(designsafe_uuid, project)
+    return project["projectId"]
+
+
+def get_listing_signature(listing) -> str:
+    """Fingerprint of a listing (paths, types and modification times)"""
+    entries = sorted(f"{item.path}|{item.type}|{item.lastModified}" for item in listing)
+    return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+
+class PublishedFileTree:
+    """Read-only filename -> paths view of a persisted published file index"""
+
+    def __init__(self, session, index_id: int, file_count: int):
+        self.session = session
+        self.index_id = index_id
+        self.file_count = file_count
+        self._paths = {}
+
+    def _get_paths(self, filename: str) -> list[str]:
+        if filename not in self._paths:
+            self._paths[filename] = PublishedFileIndexService.find_paths(
+                self.session, self.index_id, filename
+            )
+        return self._paths[filename]
+
+    def __contains__(self, filename) -> bool:
+        return len(self._get_paths(filename)) > 0
+
+    def __getitem__(self, filename) -> list[str]:
+        paths = self._get_paths(filename)
+        if not paths:
+            raise KeyError(filename)
+        return paths
+
+    def __len__(self) -> int:
+        return self.file_count
+
+
+def get_published_file_index(session, tapis_client, designsafe_prj: str):
+    """Get the persisted file index of a published DS project (e.g. PRJ-1234)
+
+    The index is shared across map projects. It is used as-is if it was recently checked,
+    otherwise it is rebuilt if the top-level listing of the published project changed
+    (or the index is too old).
+
+    Returns None if the project is not published (or there is no index and we are unable
+    to build one).
+    """
+    index = PublishedFileIndexService.get(session, designsafe_prj)
+    if PublishedFileIndexService.is_recently_checked(index):
+        return index
+
+    path = f"/published-data/{designsafe_prj}/"
+    try:
+        listing = tapis_client.listing(DESIGNSAFE_PUBLISHED_SYSTEM, path)
+    except TapisListingError as e:
+        if e.response.status_code == 404:
+            logger.debug(f"{designsafe_prj} has not been published yet")
+            return None
+        logger.exception(
+            f"Unable to list {DESIGNSAFE_PUBLISHED_SYSTEM}/{path}; using existing index (if any)"
+        )
+        return index if index is not None and index.built_at else None
+
+    signature = get_listing_signature(listing)
+    if PublishedFileIndexService.is_current(index, signature):
+        PublishedFileIndexService.mark_checked(session, index)
+        return index
+
+    try:
+        index = PublishedFileIndexService.get_for_update(session, designsafe_prj)
+        # might have been rebuilt by another worker while we waited for the lock
+        if PublishedFileIndexService.is_current(index, signature):
+            PublishedFileIndexService.mark_checked(session, index)
+            return index
+
+        logger.info(f"Building published file index for {designsafe_prj}")
+        file_index = build_file_index_from_tapis(
+            tapis_client, DESIGNSAFE_PUBLISHED_SYSTEM, path
+        )
+        PublishedFileIndexService.update(session, index, file_index, signature)
+    except Exception:
+        session.rollback()
+        raise
+    return index
 
 
 def get_file_tree_for_published_project(
     session, user, system_id
-) -> dict[str, list[str]] | None:
+) -> PublishedFileTree | None:
     """Get file tree for published ds project given a geoapi map project
 
     If `system_id` is not a DS project's system (i.e. My Data) then return None
@@ -149,18 +246,19 @@ def get_file_tree_for_published_project(
 
     tapis_client = TapisUtils(session, user)
 
-    # Calculate the file tree of published DS project associated with this map project and place in a cache
-    # that will hold it and then possibly from other systems/projects
+    # The file tree of the published DS project associated with this map project is
+    # persisted and shared with other map projects/systems referencing the same DS project
     # (we assume most files will be from here, but they could be from other DS projects as well)
-    file_index = build_file_index_from_tapis(
-        tapis_client, DESIGNSAFE_PUBLISHED_SYSTEM, f"/published-data/{designsafe_prj}/"
-    )
+    index = get_published_file_index(session, tapis_client, designsafe_prj)
+    if index is None:
+        return None
 
     logger.info(
-        f"Built file tree for {system_id}: " f"{len(file_index)} unique filenames"
+        f"Using published file index of {designsafe_prj} for {system_id}: "
+        f"{index.file_count} files"
     )
 
-    return file_index
+    return PublishedFileTree(session, index.id, index.file_count)
 
 
 def file_exists(client, system_id: str, path: str) -> bool:
@@ -174,7 +272,7 @@ def file_exists(client, system_id: str, path: str) -> bool:
 
 
 def determine_if_exists_in_tree(
-    file_tree: Dict | None, current_file_path: str
+    file_tree: Dict | PublishedFileTree | None, current_file_path: str
 ) -> tuple[bool, str | None]:
     """
     Check if asset's file exists in the file tree.
@@ -206,20 +304,48 @@ def determine_if_exists_in_tree(
     return (False, None)
 
 
-def get_filename_from_point_cloud_asset(session, asset: FeatureAsset) -> str | None:
+def get_point_clouds_by_feature(session, assets: list) -> Dict:
+    """Prefetch the PointCloud (if any) of each point cloud asset's feature
+
+    `assets` are FeatureAssets (or rows with their feature_id and asset_type)
+
+    Returns dict of feature_id to PointCloud
+    """
+    feature_ids = {
+        asset.feature_id for asset in assets if asset.asset_type == "point_cloud"
+    }
+    if not feature_ids:
+        return {}
+    point_clouds = {}
+    for point_cloud in (
+        session.query(PointCloud)
+        .filter(PointCloud.feature_id.in_(feature_ids))
+        .order_by(PointCloud.id)
+    ):
+        point_clouds.setdefault(point_cloud.feature_id, point_cloud)
+    return point_clouds
+
+
+def get_filename_from_point_cloud_asset(
+    session, asset: FeatureAsset, point_clouds: Dict | None = None
+) -> str | None:
     """
     Get the point cloud filename from a point cloud asset by querying the associated
-    PointCloud and extracting the first .laz file from files_info.
+    PointCloud (or using prefetched `point_clouds`, see get_point_clouds_by_feature)
+    and extracting the first .laz file from files_info.
 
     Returns the name of the first .laz file found, or None if no point cloud
     or .laz file exists.
 
     Note: If there are multiple .laz files, only the first one is returned.
     """
-    # Query for the PointCloud associated with this feature
-    point_cloud = (
-        session.query(PointCloud).filter_by(feature_id=asset.feature_id).first()
-    )
+    if point_clouds is not None:
+        point_cloud = point_clouds.get(asset.feature_id)
+    else:
+        # Query for the PointCloud associated with this feature
+        point_cloud = (
+            session.query(PointCloud).filter_by(feature_id=asset.feature_id).first()
+        )
 
     # Return None if no point cloud exists or files_info is empty/None
     if not point_cloud or not point_cloud.files_info:
@@ -258,6 +384,8 @@ def fix_and_backfill_feature_asset(
     asset: FeatureAsset,
     project_system: str,
     project_system_file_tree: Dict,
+    point_clouds: Dict | None = None,
+    files_on_project_system: Dict | None = None,
 ):
     """
     Fix and backfill FeatureAsset-specific information.
@@ -266,12 +394,15 @@ def fix_and_backfill_feature_asset(
     - (A) missing original_system
     - (B) missing current_system, current_path
     - (C) original_path missing for point clouds
+
+    `point_clouds` and `files_on_project_system` are optional prefetched results (see
+    get_point_clouds_by_feature and files_exist); anything not prefetched is looked up.
     """
     logger.debug(f"Checking asset={asset.id} to see if we can fix anything")
 
     # (C) See if point cloud can be fixed (we do this first as results might be used by B or A steps)
     if asset.original_path is None and asset.asset_type == "point_cloud":
-        file_name = get_filename_from_point_cloud_asset(session, asset)
+        file_name = get_filename_from_point_cloud_asset(session, asset, point_clouds)
         logger.info(
             f"Point cloud asset missing original_path. Will try to fix by looking for {file_name} in systems files"
         )
@@ -292,7 +423,12 @@ def fix_and_backfill_feature_asset(
         logger.debug(
             f"Missing original_system for asset={asset.id} so seeing if we see file on current DS project"
         )
-        if file_exists(tapis_client, project.system_id, asset.original_path):
+        key = (project.system_id, asset.original_path)
+        if files_on_project_system is not None and key in files_on_project_system:
+            exists = files_on_project_system[key]
+        else:
+            exists = file_exists(tapis_client, project.system_id, asset.original_path)
+        if exists:
             logger.debug(
                 f"Found file on current DS project so updating original_system to {project.system_id}"
             )
@@ -352,6 +488,10 @@ def check_and_update_designsafe_project_id(
         item.designsafe_project_id = designsafe_project_id
 
 
+class PublishedFileTreeUnavailable(Exception):
+    """Published file tree of a system could not be prefetched"""
+
+
 def check_and_update_public_system(
     item: Union[FeatureAsset, TileServer],
     published_file_tree_cache: Dict,
@@ -361,6 +501,12 @@ def check_and_update_public_system(
     """
     Check if item is on a public system and update location if found in published tree.
     Works for both FeatureAsset and TileServer.
+
+    The published file tree of the item's system must be in `published_file_tree_cache`
+    (see prefetch_published_file_trees) as building it writes (and commits) the
+    persisted index, which can't happen while a batch of items is being processed.
+
+    :raises PublishedFileTreeUnavailable: if the system's tree was not prefetched
     """
     item_type = type(item).__name__
     item_id = item.id
@@ -378,11 +524,9 @@ def check_and_update_public_system(
         )
         return
 
-    # Cache published file tree for this system if not already cached
     if item.current_system not in published_file_tree_cache:
-        logger.info(f"Discovering new system {item.current_system}, building file tree")
-        published_file_tree_cache[item.current_system] = (
-            get_file_tree_for_published_project(session, user, item.current_system)
+        raise PublishedFileTreeUnavailable(
+            f"Published file tree of {item.current_system} is unavailable"
         )
 
     published_project_file_tree = published_file_tree_cache.get(item.current_system, {})
@@ -400,6 +544,74 @@ def check_and_update_public_system(
         item.current_path = found_path
 
 
+def prefetch_published_file_trees(
+    session, user, items: list, published_file_tree_cache: Dict
+) -> None:
+    """Add the published file trees of the (non-public) systems of items to the cache
+
+    Systems whose tree can't be gotten are left out of the cache (so that the
+    failure is tracked for the items on that system). This is done before items are
+    processed in batches, as building a tree commits (or rolls back) the session.
+    """
+    systems = {
+        item.current_system or item.original_system
+        for item in items
+        if (item.current_system or item.original_system)
+        and (item.current_system or item.original_system) not in PUBLIC_SYSTEMS
+    }
+    for system_id in systems - published_file_tree_cache.keys():
+        try:
+            published_file_tree_cache[system_id] = get_file_tree_for_published_project(
+                session, user, system_id
+            )
+        except Exception:
+            logger.exception(f"Unable to get published file tree for {system_id}")
+            session.rollback()
+
+
+def process_in_batches(
+    session,
+    model,
+    item_ids: list[int],
+    process_item: Callable,
+    on_failure: Callable,
+    batch_size: int | None = None,
+) -> None:
+    """Process items (of `model`) committing once per batch instead of once per item
+
+    If an item fails, the batch is rolled back and its items are processed again one at
+    a time (committing each one) so that only the failed items are lost.
+    `on_failure(item_id, exception)` is called for each failed item.
+    """
+    batch_size = batch_size or settings.FILE_LOCATION_CHECK_BATCH_SIZE
+    for start in range(0, len(item_ids), batch_size):
+        batch_ids = item_ids[start : start + batch_size]
+        try:
+            items = session.query(model).filter(model.id.in_(batch_ids)).all()
+            for item in items:
+                process_item(item)
+            session.commit()
+            continue
+        except Exception:
+            logger.warning(
+                f"Error processing batch of {len(batch_ids)} {model.__name__}; "
+                f"retrying them one at a time"
+            )
+            session.rollback()
+
+        for item_id in batch_ids:
+            try:
+                item = session.get(model, item_id)
+                if item is None:
+                    continue
+                process_item(item)
+                session.commit()
+            except Exception as e:
+                logger.exception(f"Error checking {model.__name__} {item_id}: {e}")
+                session.rollback()
+                on_failure(item_id, e)
+
+
 @app.task(queue="default")
 def check_and_update_file_locations(user_id: int, project_id: int):
     """
@@ -440,8 +652,20 @@ def check_and_update_file_locations(user_id: int, project_id: int):
             #              that represent the file that created the feature rather than
             #              assets belonging to the feature. Currently these are checked if they
             #              have original_system/original_path, but may need special handling.
+            #
+            # Only the columns needed to plan the check are selected: the task session
+            # expires loaded objects on commit, so FeatureAsset/TileServer objects would be
+            # reloaded one at a time after the first commit. The items themselves are
+            # loaded a batch at a time (see process_in_batches).
             feature_assets = (
-                session.query(FeatureAsset)
+                session.query(
+                    FeatureAsset.id,
+                    FeatureAsset.feature_id,
+                    FeatureAsset.asset_type,
+                    FeatureAsset.original_system,
+                    FeatureAsset.original_path,
+                    FeatureAsset.current_system,
+                )
                 .join(Feature, Feature.id == FeatureAsset.feature_id)
                 .filter(
                     and_(
@@ -458,8 +682,15 @@ def check_and_update_file_locations(user_id: int, project_id: int):
             # Get all internal tile servers for this project
             # Only check internal tile servers (served by geoapi)
             # External tile servers are using external URLs and don't need checking
-            tile_servers = TileService.getTileServers(
-                session, projectId=project_id, internal=True
+            tile_servers = (
+                session.query(
+                    TileServer.id,
+                    TileServer.original_system,
+                    TileServer.current_system,
+                )
+                .filter(TileServer.project_id == project_id)
+                .filter(TileServer.internal.is_(True))
+                .all()
             )
 
             total_checked = len(feature_assets) + len(tile_servers)
@@ -524,105 +755,128 @@ def check_and_update_file_locations(user_id: int, project_id: int):
                     session.add(project)
                     session.commit()
 
-            # Process each feature asset
-            for i, asset in enumerate(feature_assets):
-                try:
-                    # Update timestamp
-                    asset.last_public_system_check = datetime.now(timezone.utc)
+            # Prefetch what the per-item work needs: point clouds of point cloud assets,
+            # whether legacy assets (missing original_system) exist on the project's system
+            # and the published file trees of the systems the items are on
+            point_clouds = get_point_clouds_by_feature(session, feature_assets)
 
-                    logger.debug(
-                        f"Processing asset={asset.id} asset_type={asset.asset_type}"
-                        f" original_path={asset.original_path} original_system={asset.original_system}"
-                        f" current_path={asset.current_path} current_system={asset.current_system}"
-                    )
-
-                    # Fix attributes of any assets missing info as they were created in the past
-                    fix_and_backfill_feature_asset(
-                        session=session,
-                        tapis_client=tapis_client,
-                        project=project,
-                        asset=asset,
-                        project_system=project.system_id,
-                        project_system_file_tree=unpublished_project_file_index,
-                    )
-
-                    # Check and update DesignSafe project ID
-                    check_and_update_designsafe_project_id(
-                        session=session, item=asset, user=user
-                    )
+            files_to_check = [
+                (project.system_id, asset.original_path)
+                for asset in feature_assets
+                if not asset.original_system and asset.original_path
+            ]
+            files_on_project_system = {}
+            if files_to_check:
+                logger.info(
+                    f"Checking if {len(files_to_check)} legacy asset files exist on {project.system_id}"
+                )
+                files_on_project_system = files_exist(
+                    tapis_client,
+                    files_to_check,
+                    max_workers=settings.FILE_LOCATION_CHECK_MAX_CONCURRENCY,
+                )
 
-                    # Check and update public system status
-                    check_and_update_public_system(
-                        asset, published_file_tree_cache, session, user
-                    )
+            prefetch_published_file_trees(
+                session, user, feature_assets + tile_servers, published_file_tree_cache
+            )
 
-                    session.add(asset)
-                    session.commit()
+            def check_feature_asset(asset: FeatureAsset):
+                # Update timestamp
+                asset.last_public_system_check = datetime.now(timezone.utc)
 
-                except Exception as e:
-                    error_msg = str(e)[:100]
-                    logger.exception(
-                        f"Error checking asset {asset.id} ({asset.original_path}): {e}"
-                    )
+                logger.debug(
+                    f"Processing asset={asset.id} asset_type={asset.asset_type}"
+                    f" original_path={asset.original_path} original_system={asset.original_system}"
+                    f" current_path={asset.current_path} current_system={asset.current_system}"
+                )
 
-                    failed_items.append(
-                        {
-                            "type": "feature_asset",
-                            "id": asset.id,
-                            "path": asset.original_path or "unknown",
-                            "error": error_msg,
-                        }
-                    )
+                # Fix attributes of any assets missing info as they were created in the past
+                fix_and_backfill_feature_asset(
+                    session=session,
+                    tapis_client=tapis_client,
+                    project=project,
+                    asset=asset,
+                    project_system=project.system_id,
+                    project_system_file_tree=unpublished_project_file_index,
+                    point_clouds=point_clouds,
+                    files_on_project_system=files_on_project_system,
+                )
 
-                    session.rollback()
-                    continue
+                # Check and update DesignSafe project ID
+                check_and_update_designsafe_project_id(
+                    session=session, item=asset, user=user
+                )
 
-            # Process each tile server
-            for tile_server in tile_servers:
-                try:
-                    # Update timestamp
-                    tile_server.last_public_system_check = datetime.now(timezone.utc)
+                # Check and update public system status
+                check_and_update_public_system(
+                    asset, published_file_tree_cache, session, user
+                )
 
-                    logger.debug(
-                        f"Processing tile_server={tile_server.id} name={tile_server.name}"
-                        f" original_path={tile_server.original_path} original_system={tile_server.original_system}"
-                        f" current_path={tile_server.current_path} current_system={tile_server.current_system}"
-                    )
+                session.add(asset)
+
+            def feature_asset_failed(asset_id: int, e: Exception):
+                asset = session.get(FeatureAsset, asset_id)
+                failed_items.append(
+                    {
+                        "type": "feature_asset",
+                        "id": asset_id,
+                        "path": (asset.original_path if asset else None) or "unknown",
+                        "error": str(e)[:100],
+                    }
+                )
 
-                    # Backfill current_system/current_path if missing
-                    backfill_current_location(tile_server)
+            def check_tile_server(tile_server: TileServer):
+                # Update timestamp
+                tile_server.last_public_system_check = datetime.now(timezone.utc)
 
-                    # Check and update DesignSafe project ID
-                    check_and_update_designsafe_project_id(
-                        session=session, item=tile_server, user=user
-                    )
+                logger.debug(
+                    f"Processing tile_server={tile_server.id} name={tile_server.name}"
+                    f" original_path={tile_server.original_path} original_system={tile_server.original_system}"
+                    f" current_path={tile_server.current_path} current_system={tile_server.current_system}"
+                )
 
-                    # Check and update public system status
-                    check_and_update_public_system(
-                        tile_server, published_file_tree_cache, session, user
-                    )
+                # Backfill current_system/current_path if missing
+                backfill_current_location(tile_server)
 
-                    session.add(tile_server)
-                    session.commit()
+                # Check and update DesignSafe project ID
+                check_and_update_designsafe_project_id(
+                    session=session, item=tile_server, user=user
+                )
 
-                except Exception as e:
-                    error_msg = str(e)[:100]
-                    logger.exception(
-                        f"Error checking tile_server {tile_server.id} ({tile_server.name}): {e}"
-                    )
+                # Check and update public system status
+                check_and_update_public_system(
+                    tile_server, published_file_tree_cache, session, user
+                )
 
-                    failed_items.append(
-                        {
-                            "type": "tile_server",
-                            "id": tile_server.id,
-                            "name": tile_server.name,
-                            "path": tile_server.original_path or "unknown",
-                            "error": error_msg,
-                        }
-                    )
+                session.add(tile_server)
+
+            def tile_server_failed(tile_server_id: int, e: Exception):
+                tile_server = session.get(TileServer, tile_server_id)
+                failed_items.append(
+                    {
+                        "type": "tile_server",
+                        "id": tile_server_id,
+                        "name": tile_server.name if tile_server else None,
+                        "path": (tile_server.original_path if tile_server else None)
+                        or "unknown",
+                        "error": str(e)[:100],
+                    }
+                )
 
-                    session.rollback()
-                    continue
+            process_in_batches(
+                session,
+                FeatureAsset,
+                [asset.id for asset in feature_assets],
+                check_feature_asset,
+                feature_asset_failed,
+            )
+            process_in_batches(
+                session,
+                TileServer,
+                [tile_server.id for tile_server in tile_servers],
+                check_tile_server,
+                tile_server_failed,
+            )
 
             # Update final counts
             file_location_check.completed_at = datetime.now(timezone.utc)
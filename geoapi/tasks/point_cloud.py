@@ -3,9 +3,18 @@ import uuid
 import subprocess
 import pathlib
 import re
+import json
 import shutil
-from geoalchemy2.shape import from_shape
+import hashlib
+import time
+import threading
+import collections
+import concurrent.futures
+from typing import Callable, Dict, List
+from geoalchemy2.shape import from_shape, to_shape
+from shapely.ops import unary_union
 import celery
+from celery.exceptions import MaxRetriesExceededError
 
 
 from geoapi.log import logging
@@ -13,20 +22,49 @@ from geoapi.log import logging
 from geoapi.tasks.utils import GeoAPITask, send_progress_update
 from geoapi.celery_app import app
 from geoapi.db import create_task_session
-from geoapi.models import Task, TaskStatus, User
+from geoapi.models import (
+    Task,
+    TaskStatus,
+    User,
+    PointCloudOutputFormat,
+    PointCloudConversionMetrics,
+)
 from geoapi.utils.assets import (
     make_project_asset_dir,
     get_asset_path,
     get_asset_relative_path,
 )
 from geoapi.utils.external_apis import TapisUtils
-from geoapi.utils.point_cloud import getProj4, get_bounding_box_2d
+from geoapi.utils.point_cloud import (
+    getProj4,
+    get_bounding_box_2d,
+    get_point_count,
+    get_tiling,
+)
+from geoapi.utils.heavy_resources import (
+    COPC_MEMORY_PER_POINT,
+    estimate_point_cloud_resources,
+    estimate_tiled_point_cloud_resources,
+    get_max_points_per_conversion,
+    reserve_heavy_resources,
+    HeavyResourcesUnavailable,
+)
+from geoapi.settings import settings
 from geoapi.utils.geometries import convert_3D_2D
 from geoapi.exceptions import InvalidCoordinateReferenceSystem
 from geoapi.services.point_cloud import PointCloudService
 
 logger = logging.getLogger(__file__)
 
+# overall progress printed by the potree converter, e.g. "[ 45%, 12s], [INDEXING: ..."
+POTREE_PROGRESS_PATTERN = re.compile(r"^\[\s*(\d+)%")
+
+# point cloud task's progress is updated at most this often
+PROGRESS_UPDATE_SECONDS = 10
+
+# lines of converter output kept for logging a failed conversion
+CONVERTER_OUTPUT_TAIL_LINES = 50
+
 
 def get_point_cloud_files(path):
     """
@@ -76,13 +114,26 @@ class PointCloudConversionException(Exception):
         super().__init__(self.message)
 
 
+def parse_potree_progress(line: str) -> int | None:
+    """Get the overall progress (percent) from a line of potree converter output"""
+    match = POTREE_PROGRESS_PATTERN.match(line.strip())
+    return int(match.group(1)) if match else None
+
+
 def run_potree_converter(
     pointCloudId,
     path_to_original_point_clouds,
     path_temp_processed_point_cloud_path,
     conversion_parameters=None,
+    on_progress: Callable[[int], None] | None = None,
 ):
-    """Run potree converter as external process"""
+    """
+    Run potree converter as external process
+
+    Output of the converter is streamed and its progress (percent) is passed to `on_progress`
+
+    :raises subprocess.CalledProcessError: if conversion fails (with the end of the output)
+    """
     command = [
         "/opt/PotreeConverter/build/PotreeConverter",
         "--verbose",
@@ -101,20 +152,303 @@ def run_potree_converter(
             pointCloudId, " ".join(command)
         )
     )
+    output_tail = collections.deque(maxlen=CONVERTER_OUTPUT_TAIL_LINES)
+    with subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    ) as process:
+        for line in process.stdout:
+            output_tail.append(line)
+            percent = parse_potree_progress(line)
+            if percent is not None and on_progress:
+                on_progress(percent)
+        returncode = process.wait()
+    if returncode:
+        output = "".join(output_tail)
+        logger.error(
+            f"Potree converter failed for point cloud (#{pointCloudId}) "
+            f"returncode:{returncode} output:{output}"
+        )
+        raise subprocess.CalledProcessError(returncode, command, output=output)
+
+
+class ConversionProgress:
+    """
+    Throttled reporting of the progress of a point cloud's conversions (which can run
+    in parallel for tiles) to its task's latest_message/percent
+    """
+
+    def __init__(self, pointCloudId: int):
+        self.pointCloudId = pointCloudId
+        self._lock = threading.Lock()
+        self._progress = {}
+        self._reported_percent = None
+        self._reported_at = 0
+
+    def update(self, name: str, percent: int, weight: float):
+        """
+        :param name: str name of conversion
+        :param percent: int progress of conversion
+        :param weight: float fraction of the total work that the conversion is
+        """
+        with self._lock:
+            self._progress[name] = percent * weight
+            total = int(sum(self._progress.values()))
+            now = time.monotonic()
+            if (
+                total == self._reported_percent
+                or now - self._reported_at < PROGRESS_UPDATE_SECONDS
+            ):
+                return
+            self._reported_percent = total
+            self._reported_at = now
+
+        with create_task_session() as session:
+            _update_point_cloud_task(
+                session,
+                self.pointCloudId,
+                latest_message=f"Converting point cloud: {total}%",
+                percent=total,
+            )
+
+
+def run_copc_converter(
+    pointCloudId, input_files, path_temp_processed_point_cloud_path, threads=1
+):
+    """Run pdal as external process to merge LAS/LAZ files into a single COPC file"""
+    shutil.rmtree(path_temp_processed_point_cloud_path, ignore_errors=True)
+    os.makedirs(path_temp_processed_point_cloud_path)
+
+    # multiple readers before a writer are merged by pdal
+    pipeline = list(input_files) + [
+        {
+            "type": "writers.copc",
+            "filename": os.path.join(
+                path_temp_processed_point_cloud_path, PointCloudService.COPC_FILE_NAME
+            ),
+            "threads": threads,
+        }
+    ]
+    command = ["pdal", "pipeline", "--stdin"]
+    logger.info(
+        "Processing point cloud (#{}).  command:{} pipeline:{}".format(
+            pointCloudId, " ".join(command), json.dumps(pipeline)
+        )
+    )
+    subprocess.run(
+        command,
+        input=json.dumps(pipeline),
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+
+def run_pdal_tile(pointCloudId, file_path, path_tiles, max_points) -> List[str]:
+    """
+    Run pdal as external process to split a LAS/LAZ file into square tiles
+
+    pdal's tiler streams points, so memory use does not depend on the size of the file.
+
+    :return: list of paths of tile files
+    """
+    shutil.rmtree(path_tiles, ignore_errors=True)
+    os.makedirs(path_tiles)
+
+    length, (origin_x, origin_y) = get_tiling(file_path, max_points)
+    command = [
+        "pdal",
+        "tile",
+        "--length",
+        str(length),
+        "--origin_x",
+        str(origin_x),
+        "--origin_y",
+        str(origin_y),
+        file_path,
+        os.path.join(path_tiles, "tile_#.laz"),
+    ]
+    logger.info(
+        "Splitting point cloud (#{}) into tiles.  command:{}".format(
+            pointCloudId, " ".join(command)
+        )
+    )
     subprocess.run(command, check=True, capture_output=True, text=True)
+    return sorted(get_point_cloud_files(path_tiles))
+
+
+def convert_file_to_sub_clouds(
+    pointCloudId,
+    file_path,
+    path_temp_processed_point_cloud_path,
+    path_tiles,
+    conversion_parameters=None,
+    max_points=None,
+    progress: ConversionProgress | None = None,
+    weight: float = 1.0,
+) -> List[str]:
+    """
+    Convert an original file to a potree sub-cloud or, if it has more than `max_points`
+    points, split it into tiles and convert each tile to a sub-cloud (so the memory used
+    by the potree converter is bounded whatever the size of the file)
+
+    :param progress: ConversionProgress to report progress to
+    :param weight: float fraction of the point cloud's conversion work that this file is
+    :return: list of names of the sub-clouds (in path_temp_processed_point_cloud_path)
+    """
+
+    def report_progress(sub_cloud_name, sub_cloud_weight):
+        if progress is None:
+            return None
+        return lambda percent: progress.update(
+            sub_cloud_name, percent, sub_cloud_weight
+        )
+
+    name = get_sub_cloud_name(file_path)
+    if max_points is None or get_point_count(file_path) <= max_points:
+        run_potree_converter(
+            pointCloudId,
+            file_path,
+            os.path.join(path_temp_processed_point_cloud_path, name),
+            conversion_parameters,
+            on_progress=report_progress(name, weight),
+        )
+        return [name]
+
+    path_file_tiles = os.path.join(path_tiles, name)
+    tiles = run_pdal_tile(pointCloudId, file_path, path_file_tiles, max_points)
+    tile_names = [f"{name}-{pathlib.Path(tile).stem}" for tile in tiles]
+    logger.info(
+        f"Converting {len(tiles)} tiles of {file_path} of point cloud:{pointCloudId}"
+    )
+
+    def convert_tile(tile, tile_name):
+        run_potree_converter(
+            pointCloudId,
+            tile,
+            os.path.join(path_temp_processed_point_cloud_path, tile_name),
+            conversion_parameters,
+            on_progress=report_progress(tile_name, weight / len(tiles)),
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, settings.POINT_CLOUD_TILE_CONCURRENCY)
+    ) as executor:
+        # list() so that a failed conversion is raised
+        list(executor.map(convert_tile, tiles, tile_names))
+
+    shutil.rmtree(path_file_tiles, ignore_errors=True)
+    return tile_names
+
+
+def get_sub_cloud_name(file_path: str) -> str:
+    """Name of the potree sub-cloud (directory in pointclouds/) of an original file"""
+    file_name = os.path.basename(file_path)
+    safe_name = re.sub(r"[^A-Za-z0-9_-]", "_", file_name)
+    file_hash = hashlib.sha1(file_name.encode()).hexdigest()[:8]
+    return f"{safe_name}-{file_hash}"
+
+
+def read_potree_manifest(point_cloud_asset_path: str | None) -> dict | None:
+    """
+    Read the manifest of the potree sub-clouds of a point cloud's asset directory
+
+    :return: manifest or None if the point cloud has not been converted to sub-clouds
+    (i.e. not converted yet, converted to COPC or converted before sub-clouds were used)
+    """
+    if not point_cloud_asset_path:
+        return None
+    manifest_path = os.path.join(
+        point_cloud_asset_path, PointCloudService.POTREE_MANIFEST_FILE_NAME
+    )
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.exception(f"Invalid potree manifest:{manifest_path}")
+        return None
+
+
+def get_file_signature(file_path: str) -> dict:
+    """Size and modification time of an original file (which change when it is re-imported)"""
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def get_replaced_files(manifest: dict | None, input_files: List[str]) -> List[str]:
+    """
+    Get the original files that have a sub-cloud which was converted from other contents
+    of the file (i.e. a file re-imported with the same name)
+
+    Sub-clouds converted before signatures were recorded count as replaced.
+    """
+    if manifest is None:
+        return []
+    signatures = {
+        sub_cloud["file"]: sub_cloud.get("signature")
+        for sub_cloud in manifest.get("clouds", [])
+    }
+    return [
+        file_path
+        for file_path in input_files
+        if os.path.basename(file_path) in signatures
+        and signatures[os.path.basename(file_path)] != get_file_signature(file_path)
+    ]
+
+
+def get_files_to_convert(
+    manifest: dict | None, input_files: List[str], conversion_parameters: str | None
+) -> List[str]:
+    """
+    Get the original files whose sub-cloud is missing, was converted with other parameters
+    or was converted from other contents of the file
+    """
+    if manifest is None:
+        return list(input_files)
+    converted = {
+        sub_cloud["file"]: sub_cloud.get("conversion_parameters")
+        for sub_cloud in manifest.get("clouds", [])
+    }
+    replaced_files = set(get_replaced_files(manifest, input_files))
+    return [
+        file_path
+        for file_path in input_files
+        if os.path.basename(file_path) not in converted
+        or converted[os.path.basename(file_path)] != conversion_parameters
+        or file_path in replaced_files
+    ]
 
 
 @app.task(bind=True, base=GeoAPITask)
-def convert_to_potree(self, pointCloudId: int) -> None:
+def convert_to_potree(
+    self,
+    pointCloudId: int,
+    download_seconds: float | None = None,
+    waiting_since: float | None = None,
+) -> None:
     """
-    Use the potree converter to convert a LAS/LAZ file to potree format
+    Use the potree converter to convert a LAS/LAZ file to potree format (or pdal to convert
+    it to a single COPC file when the point cloud's output_format is COPC)
+
+    Each original file is converted to its own potree sub-cloud (listed in the manifest
+    of the asset directory and all loaded by the viewer page) so when a file is added
+    to the point cloud, only that file is converted and its outline is added to the
+    feature's geometry. Files with more points than fit in memory are split into tiles
+    that are converted to separate sub-clouds.
 
     Note: this operation is memory-intensive and time-consuming.  Large LAS files (>8 Gb) can use >50gb of memory.
+    So the conversion is retried later (with the point cloud's task QUEUED) until the estimated
+    memory is available on the worker host (see reserve_heavy_resources).
 
     if process killed (e.g. due to memory constraints), PointCloudTaskException is raised
 
+    Progress of the potree converter is reported in the task's latest_message/percent and
+    the duration of each phase is recorded in PointCloudConversionMetrics.
+
     :param pointCloudId: int
-    :param userId: int
+    :param download_seconds: float time spent downloading the files (if just imported)
+    :param waiting_since: float time (epoch) since when the conversion has been waiting for resources
     :return: None
     :raises PointCloudTaskException: if conversion fails
     """
@@ -124,24 +458,166 @@ def convert_to_potree(self, pointCloudId: int) -> None:
     with create_task_session() as session:
         point_cloud = PointCloudService.get(session, pointCloudId)
         conversion_parameters = point_cloud.conversion_parameters
+        output_format = point_cloud.output_format
         path_to_original_point_clouds = get_asset_path(
             point_cloud.path, PointCloudService.ORIGINAL_FILES_DIR
         )
         path_temp_processed_point_cloud_path = get_asset_path(
             point_cloud.path, PointCloudService.PROCESSED_DIR
         )
+        path_tiles = get_asset_path(point_cloud.path, PointCloudService.TILES_DIR)
+        previous_asset_path = None
+        previous_outline = None
+        if point_cloud.feature_id and point_cloud.feature.assets:
+            previous_asset_path = get_asset_path(point_cloud.feature.assets[0].path)
+            if point_cloud.feature.the_geom is not None:
+                previous_outline = to_shape(point_cloud.feature.the_geom)
 
     input_files = get_point_cloud_files(path_to_original_point_clouds)
 
-    outline = get_bounding_box_2d(input_files)
+    header_scan_start = time.monotonic()
+    is_copc = output_format == PointCloudOutputFormat.COPC.value
+    if is_copc:
+        manifest = None
+        files_to_convert = input_files
+        replaced_files = []
+    else:
+        manifest = read_potree_manifest(previous_asset_path)
+        files_to_convert = get_files_to_convert(
+            manifest, input_files, conversion_parameters
+        )
+        replaced_files = get_replaced_files(manifest, input_files)
 
-    try:
-        run_potree_converter(
-            pointCloudId,
-            path_to_original_point_clouds,
-            path_temp_processed_point_cloud_path,
-            conversion_parameters,
+    input_file_names = {os.path.basename(file_path) for file_path in input_files}
+    # the previous outline includes the extent of the previous contents of replaced
+    # files, so then the outline is read from all files
+    is_incremental = (
+        manifest is not None
+        and previous_outline is not None
+        and not replaced_files
+        and all(
+            sub_cloud["file"] in input_file_names
+            for sub_cloud in manifest.get("clouds", [])
+        )
+    )
+    if is_incremental:
+        # only the outlines of the new files need to be read
+        outline = (
+            unary_union([previous_outline, get_bounding_box_2d(files_to_convert)])
+            if files_to_convert
+            else previous_outline
         )
+    else:
+        outline = get_bounding_box_2d(input_files)
+
+    logger.info(
+        f"Converting {len(files_to_convert)} of {len(input_files)} files of point cloud:{pointCloudId}"
+    )
+
+    point_counts = {
+        file_path: get_point_count(file_path) for file_path in files_to_convert
+    }
+    total_points = sum(point_counts.values())
+    input_size = sum(os.path.getsize(file_path) for file_path in files_to_convert)
+
+    if is_copc:
+        resources = estimate_point_cloud_resources(
+            input_files, memory_per_point=COPC_MEMORY_PER_POINT
+        )
+    else:
+        # files are converted one at a time (and files too large to convert at once
+        # are converted as tiles) so the largest conversion is what matters
+        max_points = get_max_points_per_conversion()
+        resources = max(
+            (
+                (
+                    estimate_point_cloud_resources([file_path])
+                    if point_counts[file_path] <= max_points
+                    else estimate_tiled_point_cloud_resources(max_points)
+                )
+                for file_path in files_to_convert
+            ),
+            key=lambda request: request.memory,
+            default=estimate_point_cloud_resources([]),
+        )
+    header_scan_seconds = time.monotonic() - header_scan_start
+
+    converted_sub_clouds = {}
+    progress = ConversionProgress(pointCloudId)
+
+    wait_start = time.monotonic()
+    try:
+        with reserve_heavy_resources(f"point_cloud:{pointCloudId}", resources):
+            conversion_start = time.monotonic()
+            wait_seconds = conversion_start - wait_start
+            if waiting_since is not None:
+                wait_seconds = time.time() - waiting_since
+                with create_task_session() as session:
+                    _update_point_cloud_task(
+                        session,
+                        pointCloudId,
+                        description=(
+                            "Running COPC conversion"
+                            if is_copc
+                            else "Running potree converter"
+                        ),
+                        status=TaskStatus.RUNNING,
+                    )
+            if is_copc:
+                if conversion_parameters:
+                    logger.info(
+                        f"Ignoring potree conversion parameters of point cloud:{pointCloudId} "
+                        f"as converting to COPC"
+                    )
+                run_copc_converter(
+                    pointCloudId,
+                    input_files,
+                    path_temp_processed_point_cloud_path,
+                    threads=resources.cpus,
+                )
+            else:
+                shutil.rmtree(path_temp_processed_point_cloud_path, ignore_errors=True)
+                os.makedirs(path_temp_processed_point_cloud_path)
+                for file_path in files_to_convert:
+                    converted_sub_clouds[os.path.basename(file_path)] = (
+                        convert_file_to_sub_clouds(
+                            pointCloudId,
+                            file_path,
+                            path_temp_processed_point_cloud_path,
+                            path_tiles,
+                            conversion_parameters,
+                            max_points=max_points,
+                            progress=progress,
+                            weight=(
+                                point_counts[file_path] / total_points
+                                if total_points
+                                else 1 / len(files_to_convert)
+                            ),
+                        )
+                    )
+            conversion_end = time.monotonic()
+    except HeavyResourcesUnavailable as e:
+        with create_task_session() as session:
+            _update_point_cloud_task(
+                session, pointCloudId, description=str(e), status=TaskStatus.QUEUED
+            )
+        if self.request.called_directly:
+            # caller queues the conversion (see import_point_clouds_from_tapis)
+            raise
+        try:
+            raise self.retry(
+                args=[pointCloudId],
+                kwargs={
+                    "download_seconds": download_seconds,
+                    "waiting_since": waiting_since or time.time(),
+                },
+                countdown=settings.HEAVY_RESOURCES_RETRY_SECONDS,
+                max_retries=settings.HEAVY_RESOURCES_MAX_RETRIES,
+            )
+        except MaxRetriesExceededError:
+            raise PointCloudConversionException(
+                "Point cloud conversion failed; not enough resources available"
+            )
     except subprocess.CalledProcessError as e:
         error_description = "Point cloud conversion failed"
         if e.returncode == -9:  # SIGKILL; most likely ran out of memory
@@ -154,72 +630,251 @@ def convert_to_potree(self, pointCloudId: int) -> None:
 
     with create_task_session() as session:
         point_cloud = PointCloudService.get(session, pointCloudId)
-        # Create preview viewer html (with no menu and now nsf logo)
-        with open(
-            os.path.join(path_temp_processed_point_cloud_path, "preview.html"), "w+"
-        ) as preview:
-            with open(
-                os.path.join(path_temp_processed_point_cloud_path, "index.html"), "r"
-            ) as viewer:
-                content = viewer.read()
-                content = re.sub(
-                    r"<div class=\"nsf_logo\"(.+?)</div>", "", content, flags=re.DOTALL
-                )
-                content = content.replace(
-                    "viewer.toggleSidebar()", "$('.potree_menu_toggle').hide()"
-                )
-                preview.write(content)
 
-            if point_cloud.feature_id:
-                feature = point_cloud.feature
-            else:
-                feature = Feature()
-                feature.project_id = point_cloud.project_id
-
-                asset_uuid = uuid.uuid4()
-                base_filepath = make_project_asset_dir(point_cloud.project_id)
-                asset_path = os.path.join(base_filepath, str(asset_uuid))
-
-                # Grab first file as we will associate the FeatureAsset with just one file
-                first_file = point_cloud.files_info[0] if point_cloud.files_info else {}
-                original_system = first_file.get("original_system")
-                original_path = first_file.get("original_path")
-
-                fa = FeatureAsset(
-                    uuid=asset_uuid,
-                    asset_type="point_cloud",
-                    path=get_asset_relative_path(asset_path),
-                    display_path=point_cloud.description,
-                    feature=feature,
-                    original_system=original_system,
-                    original_path=original_path,
-                    current_system=original_system,
-                    current_path=original_path,
-                )
-                feature.assets.append(fa)
-                point_cloud.feature = feature
+        if point_cloud.feature_id:
+            feature = point_cloud.feature
+        else:
+            feature = Feature()
+            feature.project_id = point_cloud.project_id
+
+            asset_uuid = uuid.uuid4()
+            base_filepath = make_project_asset_dir(point_cloud.project_id)
+            asset_path = os.path.join(base_filepath, str(asset_uuid))
+
+            # Grab first file as we will associate the FeatureAsset with just one file
+            first_file = point_cloud.files_info[0] if point_cloud.files_info else {}
+            original_system = first_file.get("original_system")
+            original_path = first_file.get("original_path")
 
-            feature.the_geom = from_shape(convert_3D_2D(outline), srid=4326)
-            point_cloud.task.status = TaskStatus.COMPLETED
-            point_cloud.task.description = ""
+            fa = FeatureAsset(
+                uuid=asset_uuid,
+                asset_type="point_cloud",
+                path=get_asset_relative_path(asset_path),
+                display_path=point_cloud.description,
+                feature=feature,
+                original_system=original_system,
+                original_path=original_path,
+                current_system=original_system,
+                current_path=original_path,
+            )
+            feature.assets.append(fa)
+            point_cloud.feature = feature
+
+        feature.the_geom = from_shape(convert_3D_2D(outline), srid=4326)
+        point_cloud.task.status = TaskStatus.COMPLETED
+        point_cloud.task.description = ""
+        point_cloud.task.latest_message = ""
+        point_cloud.task.percent = 100
 
-            point_cloud_asset_path = get_asset_path(feature.assets[0].path)
-            session.add(point_cloud)
-            session.add(feature)
-            session.commit()
+        point_cloud_asset_path = get_asset_path(feature.assets[0].path)
+        session.add(point_cloud)
+        session.add(feature)
+        session.commit()
 
+        move_start = time.monotonic()
+        if is_copc:
             shutil.rmtree(point_cloud_asset_path, ignore_errors=True)
             shutil.move(path_temp_processed_point_cloud_path, point_cloud_asset_path)
+        else:
+            update_potree_sub_clouds(
+                path_temp_processed_point_cloud_path,
+                point_cloud_asset_path,
+                input_files,
+                manifest,
+                converted_sub_clouds,
+                conversion_parameters,
+            )
+
+        conversion_seconds = conversion_end - conversion_start
+        metrics = PointCloudConversionMetrics(
+            point_cloud_id=pointCloudId,
+            output_format=output_format,
+            file_count=len(input_files),
+            converted_file_count=len(files_to_convert),
+            input_size=input_size,
+            point_count=total_points,
+            download_seconds=download_seconds,
+            header_scan_seconds=header_scan_seconds,
+            wait_seconds=wait_seconds,
+            conversion_seconds=conversion_seconds,
+            move_seconds=time.monotonic() - move_start,
+            points_per_second=(
+                total_points / conversion_seconds if conversion_seconds > 0 else None
+            ),
+        )
+        session.add(metrics)
+        session.commit()
+        logger.info(
+            f"Converted point cloud:{pointCloudId} files:{len(files_to_convert)} "
+            f"points:{total_points} input_size:{input_size} "
+            f"download:{download_seconds}s header_scan:{metrics.header_scan_seconds:.1f}s "
+            f"wait:{metrics.wait_seconds:.1f}s conversion:{conversion_seconds:.1f}s "
+            f"move:{metrics.move_seconds:.1f}s points_per_second:{metrics.points_per_second}"
+        )
+
+
+def update_potree_sub_clouds(
+    path_temp_processed_point_cloud_path: str,
+    point_cloud_asset_path: str,
+    input_files: List[str],
+    previous_manifest: dict | None,
+    converted_sub_clouds: Dict[str, List[str]],
+    conversion_parameters: str | None,
+):
+    """
+    Move newly converted sub-clouds into the point cloud's asset directory and update its
+    manifest and viewer pages
+
+    :param path_temp_processed_point_cloud_path: str directory with a potree converter
+    output directory for each converted sub-cloud
+    :param point_cloud_asset_path: str
+    :param input_files: List[str] all original files of the point cloud
+    :param previous_manifest: dict manifest of the asset directory (if None, existing
+    content of the asset directory is removed first)
+    :param converted_sub_clouds: Dict[str, List[str]] names of the converted sub-clouds
+    (more than one if file was split into tiles) by original file name
+    :param conversion_parameters: str parameters the files were converted with
+    """
+    if previous_manifest is None:
+        shutil.rmtree(point_cloud_asset_path, ignore_errors=True)
+    sub_clouds_path = os.path.join(point_cloud_asset_path, "pointclouds")
+    os.makedirs(sub_clouds_path, exist_ok=True)
+
+    viewer_page = None
+    for name in sorted(os.listdir(path_temp_processed_point_cloud_path)):
+        converted_path = os.path.join(path_temp_processed_point_cloud_path, name)
+        sub_cloud_path = os.path.join(sub_clouds_path, name)
+        shutil.rmtree(sub_cloud_path, ignore_errors=True)
+        shutil.move(
+            os.path.join(converted_path, "pointclouds", "index"), sub_cloud_path
+        )
+
+        # viewer resources (libs, logo etc.) are the same for all sub-clouds
+        for entry in os.listdir(converted_path):
+            if entry in ("pointclouds", "index.html"):
+                continue
+            if not os.path.exists(os.path.join(point_cloud_asset_path, entry)):
+                shutil.move(
+                    os.path.join(converted_path, entry),
+                    os.path.join(point_cloud_asset_path, entry),
+                )
+        with open(os.path.join(converted_path, "index.html")) as f:
+            viewer_page = f.read()
+
+    previous_sub_clouds = {}
+    for sub_cloud in (previous_manifest or {}).get("clouds", []):
+        previous_sub_clouds.setdefault(sub_cloud["file"], []).append(sub_cloud)
+
+    sub_clouds = []
+    for file_path in sorted(input_files):
+        file_name = os.path.basename(file_path)
+        if file_name not in converted_sub_clouds:
+            sub_clouds.extend(previous_sub_clouds.get(file_name, []))
+            continue
+        names = converted_sub_clouds[file_name]
+        for i, name in enumerate(names):
+            sub_clouds.append(
+                {
+                    "name": (
+                        file_name
+                        if len(names) == 1
+                        else f"{file_name} (tile {i + 1}/{len(names)})"
+                    ),
+                    "file": file_name,
+                    "path": f"pointclouds/{name}",
+                    "conversion_parameters": conversion_parameters,
+                    "signature": get_file_signature(file_path),
+                }
+            )
+
+    # remove sub-clouds of files (or tiles) that are no longer part of the point cloud
+    current_names = {os.path.basename(sub_cloud["path"]) for sub_cloud in sub_clouds}
+    for name in os.listdir(sub_clouds_path):
+        if name not in current_names:
+            shutil.rmtree(os.path.join(sub_clouds_path, name), ignore_errors=True)
+
+    with open(
+        os.path.join(
+            point_cloud_asset_path, PointCloudService.POTREE_MANIFEST_FILE_NAME
+        ),
+        "w",
+    ) as f:
+        json.dump({"clouds": sub_clouds}, f, indent=2)
+
+    if viewer_page is not None:
+        create_viewer_page(viewer_page, point_cloud_asset_path)
+        create_preview_page(point_cloud_asset_path)
+
+    shutil.rmtree(path_temp_processed_point_cloud_path, ignore_errors=True)
+
+
+def create_viewer_page(converted_viewer_page: str, path_processed_point_cloud: str):
+    """
+    Create viewer html (index.html) that loads all the sub-clouds listed in the manifest
+
+    :param converted_viewer_page: str content of the page generated by the potree converter
+    (which loads the single point cloud it converted)
+    :param path_processed_point_cloud: str
+    """
+    load_point_cloud = re.compile(
+        r"Potree\.loadPointCloud\(\s*\"[^\"]*\"\s*,\s*\"[^\"]*\"\s*,(?P<callback>\s*e\s*=>\s*\{.*?\})\s*\);",
+        flags=re.DOTALL,
+    )
+    if not load_point_cloud.search(converted_viewer_page):
+        raise PointCloudConversionException("Unable to create point cloud viewer page")
+
+    def load_sub_clouds(match):
+        return (
+            f'fetch("./{PointCloudService.POTREE_MANIFEST_FILE_NAME}")'
+            ".then((response) => response.json())"
+            ".then((manifest) => {\n"
+            "\t\t\tfor (const cloud of manifest.clouds) {\n"
+            "\t\t\t\tPotree.loadPointCloud(`./${cloud.path}/metadata.json`, cloud.name,"
+            f"{match.group('callback')});\n"
+            "\t\t\t}\n"
+            "\t\t});"
+        )
+
+    content = load_point_cloud.sub(load_sub_clouds, converted_viewer_page, count=1)
+    with open(os.path.join(path_processed_point_cloud, "index.html"), "w") as viewer:
+        viewer.write(content)
+
+
+def create_preview_page(path_processed_point_cloud):
+    """Create preview viewer html (with no menu and now nsf logo) of a potree point cloud"""
+    with open(
+        os.path.join(path_processed_point_cloud, "preview.html"), "w+"
+    ) as preview:
+        with open(
+            os.path.join(path_processed_point_cloud, "index.html"), "r"
+        ) as viewer:
+            content = viewer.read()
+            content = re.sub(
+                r"<div class=\"nsf_logo\"(.+?)</div>", "", content, flags=re.DOTALL
+            )
+            content = content.replace(
+                "viewer.toggleSidebar()", "$('.potree_menu_toggle').hide()"
+            )
+            preview.write(content)
 
 
 def _update_point_cloud_task(
-    database_session, pointCloudId: int, description: str = None, status: str = None
+    database_session,
+    pointCloudId: int,
+    description: str = None,
+    status: str = None,
+    latest_message: str = None,
+    percent: int = None,
 ):
     task = PointCloudService.get(database_session, pointCloudId).task
     if description is not None:
         task.description = description
     if status is not None:
         task.status = status
+    if latest_message is not None:
+        task.latest_message = latest_message
+    if percent is not None:
+        task.percent = percent
     database_session.add(task)
     database_session.commit()
 
@@ -281,6 +936,7 @@ def import_point_clouds_from_tapis(userId: int, files, pointCloudId: int):
 
         new_asset_files = []
         failed_message = None
+        download_seconds = 0.0
         for file in files:
             _update_point_cloud_task(
                 session,
@@ -296,12 +952,15 @@ def import_point_clouds_from_tapis(userId: int, files, pointCloudId: int):
             path = file["path"]
 
             try:
-                tmp_file = client.getFile(system_id, path)
-                tmp_file.filename = pathlib.Path(path).name
-                file_path = PointCloudService.putPointCloudInOriginalsFileDir(
-                    point_cloud.path, tmp_file, tmp_file.filename
+                # download directly into the original files directory
+                file_path = PointCloudService.getOriginalFilePath(
+                    point_cloud.path, pathlib.Path(path).name
+                )
+                download_start = time.monotonic()
+                client.get_file_to_path(
+                    system_id, path, file_path, parallel_segments=True
                 )
-                tmp_file.close()
+                download_seconds += time.monotonic() - download_start
 
                 # save file path as we might need to delete it if there is a problem
                 new_asset_files.append(file_path)
@@ -362,7 +1021,7 @@ def import_point_clouds_from_tapis(userId: int, files, pointCloudId: int):
     try:
         # use potree converter to convert las to web-friendly format
         # this operation is memory-intensive and time-consuming.
-        convert_to_potree(pointCloudId)
+        convert_to_potree(pointCloudId, download_seconds=download_seconds)
         with create_task_session() as session:
             user = session.get(User, userId)
             logger.info(
@@ -374,6 +1033,19 @@ def import_point_clouds_from_tapis(userId: int, files, pointCloudId: int):
                 "success",
                 "Completed potree converter (for point cloud {}).".format(pointCloudId),
             )
+    except HeavyResourcesUnavailable:
+        # conversion is queued as its own task (using the point cloud's task id) that is
+        # retried until the resources it needs are available
+        logger.info(
+            f"point cloud:{pointCloudId} conversion queued until resources are available"
+        )
+        convert_to_potree.apply_async(
+            args=[pointCloudId],
+            kwargs={"download_seconds": download_seconds, "waiting_since": time.time()},
+            task_id=celery_task_id,
+            queue="heavy",
+            countdown=settings.HEAVY_RESOURCES_RETRY_SECONDS,
+        )
     except PointCloudConversionException as e:
         error_description = e.message
         _handle_point_cloud_conversion_error(
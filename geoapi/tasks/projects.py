@@ -1,5 +1,6 @@
 from geoapi.celery_app import app
 from geoapi.utils.assets import get_project_asset_dir
+from geoapi.utils import tile_cache
 from geoapi.log import logger
 import shutil
 
@@ -13,6 +14,7 @@ def remove_project_assets(project_id):
 
     """
     logger.info(f"Deleting project:{project_id} started")
+    tile_cache.invalidate_project(project_id)
     assets_folder = get_project_asset_dir(project_id)
     try:
         shutil.rmtree(assets_folder)
@@ -22,3 +24,9 @@ def remove_project_assets(project_id):
             f"Deleting project:{project_id} completed but caught FileNotFoundError"
         )
         pass
+
+
+@app.task()
+def prune_tile_cache():
+    """Remove least recently used tiles once the tile cache is too large"""
+    tile_cache.prune()
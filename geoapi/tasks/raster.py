@@ -1,10 +1,16 @@
 import os
-import json
 import subprocess
 import math
+import time
+import concurrent.futures
 from pathlib import Path
-from uuid import uuid4
+from typing import Dict, List, Tuple
+from uuid import UUID, uuid4
+from celery.exceptions import Retry
 from sqlalchemy import func
+from rasterio.warp import calculate_default_transform
+from geoalchemy2.shape import from_shape
+from shapely.geometry import box
 
 from geoapi.utils.assets import (
     make_project_asset_dir,
@@ -14,13 +20,31 @@ from geoapi.utils.assets import (
 from geoapi.celery_app import app
 from geoapi.db import create_task_session
 from geoapi.log import logger
-from geoapi.models import Task, TaskStatus, TileServer, User
+from geoapi.settings import settings
+from geoapi.models import Task, TaskStatus, TileServer, TileServerMosaicMember, User
+from geoapi.services.tile_server import TileService
 from geoapi.utils.external_apis import TapisUtils, TapisFileGetError
 from geoapi.tasks.utils import update_task_and_send_progress_update
 from geoapi.schema.tapis import TapisFilePath
+from geoapi.utils.raster import RasterInfo, inspect_raster
+from geoapi.utils import tile_cache
+from geoapi.utils.heavy_resources import (
+    ResourceRequest,
+    estimate_raster_resources,
+    reserve_heavy_resources,
+    HeavyResourcesUnavailable,
+)
 
 ASSETS_DIR = Path(os.getenv("ASSETS_BASE_DIR", "/assets")).resolve()
 
+# Web Mercator resolution (meters/pixel) at zoom 0 for 256x256 tiles and origin of the
+# GoogleMapsCompatible tile grid
+WEB_MERCATOR_ZOOM_0_RESOLUTION = 156543.03392804097
+WEB_MERCATOR_ORIGIN = 20037508.342789244
+WEB_MERCATOR_MAX_LATITUDE = 85.0511287798066
+EARTH_RADIUS = 6378137.0
+MAX_ZOOM = 24
+
 
 def _validate_raster_name(name: str) -> None:
     ok = (".tif", ".tiff", ".geotiff")
@@ -30,46 +54,216 @@ def _validate_raster_name(name: str) -> None:
         )
 
 
-def is_8bit_rgb_or_rgba(src: Path) -> bool:
-    result = subprocess.run(
-        ["gdalinfo", "-json", str(src)], capture_output=True, text=True
+def is_8bit_rgb_or_rgba(info: RasterInfo) -> bool:
+    return info.dtype == "uint8" and info.band_count in (3, 4)
+
+
+def get_resampling(info: RasterInfo) -> str:
+    """
+    Resampling used when warping a raster and building its overviews
+
+    Cubic (smoother) for 8-bit RGB/RGBA imagery and nearest for everything else, as
+    other rasters (e.g. classifications, integer or paletted data) can be categorical
+    and must not get values that aren't in the original.
+    """
+    if is_8bit_rgb_or_rgba(info) and not info.is_paletted:
+        return "cubic"
+    return "nearest"
+
+
+def estimate_cogify_resources(info: RasterInfo) -> ResourceRequest:
+    """Estimate memory/cpus needed by gdal_cogify from the raster's dimensions"""
+    return estimate_raster_resources(
+        info.width, info.height, info.band_count, info.bytes_per_sample
+    )
+
+
+def _is_cog(info: RasterInfo) -> bool:
+    """Raster has a valid COG layout (as detected by GDAL from the COG ghost header)"""
+    return info.layout == "COG"
+
+
+def _has_overviews(info: RasterInfo) -> bool:
+    if not info.band_count:
+        return False
+    block_width, block_height = info.block_size
+    # no overviews are needed if the raster fits in a single block
+    fits_in_block = info.width <= block_width and info.height <= block_height
+    return fits_in_block or bool(info.overviews)
+
+
+def _is_google_maps_compatible(info: RasterInfo) -> bool:
+    """Raster's blocks are aligned with the 256x256 tiles of a GoogleMapsCompatible zoom level"""
+    if info.tiling_scheme:
+        return info.tiling_scheme.lower() == "googlemapscompatible"
+
+    # not written by GDAL's COG driver; check alignment of the raster
+    if info.block_size != (256, 256) or info.geotransform is None:
+        return False
+    origin_x, pixel_width, _, origin_y, _, pixel_height = info.geotransform
+    zoom = math.log2(WEB_MERCATOR_ZOOM_0_RESOLUTION / pixel_width)
+    tile_size = 256 * pixel_width
+    return (
+        math.isclose(zoom, round(zoom), abs_tol=1e-6)
+        and math.isclose(pixel_width, -pixel_height, rel_tol=1e-9)
+        and _is_multiple(origin_x + WEB_MERCATOR_ORIGIN, tile_size)
+        and _is_multiple(WEB_MERCATOR_ORIGIN - origin_y, tile_size)
+    )
+
+
+def _is_multiple(value: float, step: float) -> bool:
+    remainder = math.fmod(value, step)
+    return math.isclose(remainder, 0, abs_tol=1e-3) or math.isclose(
+        remainder, step, abs_tol=1e-3
+    )
+
+
+def can_store_as_is(info: RasterInfo) -> bool:
+    """
+    Check if a raster is a COG that can be served by TiTiler without being converted
+
+    Only a Web Mercator COG (with overviews) whose blocks are aligned with the
+    GoogleMapsCompatible tiles is stored as-is; any other COG is converted so that tiles
+    are read directly instead of TiTiler reprojecting (and resampling) every tile.
+    """
+    if not _is_cog(info) or not _has_overviews(info):
+        return False
+    if not (info.is_web_mercator and _is_google_maps_compatible(info)):
+        logger.info("Raster is a COG but not in Web Mercator (GoogleMapsCompatible)")
+        return False
+    logger.info("Raster is already a Web Mercator (GoogleMapsCompatible) COG")
+    return True
+
+
+def get_google_maps_compatible_grid(
+    info: RasterInfo,
+) -> Tuple[float, Tuple[float, float, float, float]]:
+    """
+    Get the resolution and extent (xmin, ymin, xmax, ymax) in Web Mercator of a raster
+    warped to the GoogleMapsCompatible tile grid
+
+    Like GDAL's COG driver (with the default ZOOM_LEVEL_STRATEGY=AUTO), the zoom level
+    whose resolution is closest to the warped raster's is used and the extent is
+    expanded to whole tiles.
+
+    Raises:
+        ValueError: If the raster has no georeferencing
+    """
+    if info.crs_wkt is None or info.geotransform is None:
+        raise ValueError("Raster has no georeferencing")
+    origin_x, pixel_width, _, origin_y, _, pixel_height = info.geotransform
+    left = origin_x
+    right = origin_x + pixel_width * info.width
+    top = origin_y
+    bottom = origin_y + pixel_height * info.height
+    transform, width, height = calculate_default_transform(
+        info.crs_wkt,
+        "EPSG:3857",
+        info.width,
+        info.height,
+        min(left, right),
+        min(bottom, top),
+        max(left, right),
+        max(bottom, top),
     )
-    info = json.loads(result.stdout)
-    dtype = info["bands"][0]["type"]
-    band_count = len(info["bands"])
-    return dtype == "Byte" and band_count in (3, 4)
 
+    zoom = round(math.log2(WEB_MERCATOR_ZOOM_0_RESOLUTION / transform.a))
+    zoom = min(max(zoom, 0), MAX_ZOOM)
+    resolution = WEB_MERCATOR_ZOOM_0_RESOLUTION / 2**zoom
+    tile_size = 256 * resolution
+
+    xmin = transform.c
+    ymax = transform.f
+    xmax = xmin + width * transform.a
+    ymin = ymax + height * transform.e
+    extent = (
+        math.floor((xmin + WEB_MERCATOR_ORIGIN) / tile_size) * tile_size
+        - WEB_MERCATOR_ORIGIN,
+        WEB_MERCATOR_ORIGIN
+        - math.ceil((WEB_MERCATOR_ORIGIN - ymin) / tile_size) * tile_size,
+        math.ceil((xmax + WEB_MERCATOR_ORIGIN) / tile_size) * tile_size
+        - WEB_MERCATOR_ORIGIN,
+        WEB_MERCATOR_ORIGIN
+        - math.floor((WEB_MERCATOR_ORIGIN - ymax) / tile_size) * tile_size,
+    )
+    return resolution, extent
 
-def gdal_cogify(src: Path, dst: Path) -> None:
+
+def gdal_cogify(
+    src: Path, dst: Path, num_threads: int = 1, info: RasterInfo | None = None
+) -> Dict[str, float]:
     """Convert a raster to a Cloud-Optimized GeoTIFF (COG).
 
-    Reprojects to Web Mercator (EPSG:3857) with GoogleMapsCompatible tiling scheme.
-    Uses JPEG for 8-bit RGB/RGBA imagery (lossy, ~10x smaller files).
+    Reprojects to Web Mercator (EPSG:3857), aligned with the GoogleMapsCompatible tile
+    grid (see get_resampling). Uses JPEG for 8-bit RGB/RGBA imagery (lossy, ~10x
+    smaller files).
     Uses DEFLATE for everything else (lossless, preserves pixel values).
+
+    The conversion is done in steps that can all use `num_threads` (the number of cpus
+    reserved for the conversion): warp to a tiled GeoTIFF, build its overviews and then
+    copy it (and its overviews) to a COG. Writing a COG directly with the COG driver
+    builds the overviews and compresses the tiles in a single thread.
+
+    `info` is the already inspected `src` (inspected here if not given).
+
+    Returns:
+        seconds taken by each step ("warp", "overviews", "translate")
     """
-    heavy_worker_count = 6  # matches --concurrency=6 in geoapi_workers_heavy
-    threads_per_worker = max(1, os.cpu_count() // heavy_worker_count)
+    if info is None:
+        info = inspect_raster(src)
+
+    resolution, extent = get_google_maps_compatible_grid(info)
+    resampling = get_resampling(info)
+    threads = str(num_threads)
+    warped_path = dst.with_name(f"{dst.name}.warped.tif")
 
-    base_cmd = [
+    warp_cmd = [
         "gdalwarp",
         "-of",
-        "COG",
+        "GTiff",
         "-t_srs",
         "EPSG:3857",
+        "-tr",
+        str(resolution),
+        str(resolution),
+        "-te",
+        *[str(coordinate) for coordinate in extent],
+        "-r",
+        resampling,
+        "-multi",
+        "-wo",
+        f"NUM_THREADS={threads}",
+        "-co",
+        "TILED=YES",
         "-co",
-        "TILING_SCHEME=GoogleMapsCompatible",
+        "BLOCKXSIZE=256",
+        "-co",
+        "BLOCKYSIZE=256",
         "-co",
         "BIGTIFF=YES",
+        # intermediate file: fast (lossless) compression
         "-co",
-        "STATISTICS=YES",
-        # Parallelize warping across multiple threads. COG finalization
-        # (tiling + overviews) is still single-threaded.
-        "-multi",
-        "-wo",
-        f"NUM_THREADS={threads_per_worker}",
+        "COMPRESS=DEFLATE",
+        "-co",
+        "ZLEVEL=1",
+        "-co",
+        f"NUM_THREADS={threads}",
+        str(src),
+        str(warped_path),
     ]
 
-    if is_8bit_rgb_or_rgba(src):
+    # overview levels are computed by gdaladdo (down to a single 256x256 block)
+    overviews_cmd = [
+        "gdaladdo",
+        "-r",
+        resampling,
+        "--config",
+        "GDAL_NUM_THREADS",
+        threads,
+        str(warped_path),
+    ]
+
+    if is_8bit_rgb_or_rgba(info):
         # 8-bit RGB/RGBA imagery (orthomosaics, aerial photos).
         # So lossy JPG compression is okay and then we save lots of space.
         # Alpha band handled by GDAL.
@@ -92,53 +286,86 @@ def gdal_cogify(src: Path, dst: Path) -> None:
             "PREDICTOR=YES",
         ]
 
-    cmd = base_cmd + compression + [str(src), str(dst)]
+    # No TILING_SCHEME: the warped raster is already aligned with the tile grid, and
+    # the COG driver would otherwise warp it again (in a single thread)
+    translate_cmd = (
+        [
+            "gdal_translate",
+            "-of",
+            "COG",
+            "-co",
+            "BLOCKSIZE=256",
+            "-co",
+            "OVERVIEWS=FORCE_USE_EXISTING",
+            "-co",
+            "BIGTIFF=YES",
+            "-co",
+            "STATISTICS=YES",
+            "-co",
+            f"NUM_THREADS={threads}",
+        ]
+        + compression
+        + [str(warped_path), str(dst)]
+    )
 
-    logger.info(f"Converting to COG: {' '.join(cmd)}")
+    timings = {}
+    try:
+        for step, cmd in [
+            ("warp", warp_cmd),
+            ("overviews", overviews_cmd),
+            ("translate", translate_cmd),
+        ]:
+            logger.info(f"Converting to COG ({step}): {' '.join(cmd)}")
+            start = time.monotonic()
+            # GDAL creates temp files in the current working directory during COG
+            # conversion, so we run from the destination directory.
+            subprocess.run(cmd, check=True, cwd=dst.parent)
+            timings[step] = time.monotonic() - start
+    finally:
+        warped_path.unlink(missing_ok=True)
 
-    # GDAL creates temp files in the current working directory during COG
-    # conversion, so we run from the destination directory.
-    subprocess.run(cmd, check=True, cwd=dst.parent)
+    logger.info(
+        f"Converted {src.name} to COG using {num_threads} threads: "
+        + ", ".join(f"{step} {seconds:.1f}s" for step, seconds in timings.items())
+    )
+    return timings
 
 
-def get_cog_metadata(path: Path) -> dict:
+def get_cog_metadata(path: Path, info: RasterInfo | None = None) -> dict:
     """
     Extract useful metadata from a COG for tileOptions.
 
-    IMPORTANT: This function assumes the COG is in Web Mercator (EPSG:3857) projection.
-    The zoom level calculations are based on Web Mercator's resolution at the equator
-    and will be incorrect for other projections.
+    Zoom levels are based on Web Mercator's resolution at the equator. For a COG in
+    another projection (stored as-is), the resolution is its width in Web Mercator
+    meters (from its WGS84 extent) divided by its width in pixels.
+
+    `info` is the already inspected COG (inspected here if not given).
 
     Raises:
-        ValueError: If the COG is not in EPSG:3857 (Web Mercator) projection
+        ValueError: If the COG has no georeferencing
     """
     logger.info(f"Extracting metadata from COG: {path}")
-    result = subprocess.run(
-        ["gdalinfo", "-json", str(path)], capture_output=True, text=True, check=True
-    )
-    info = json.loads(result.stdout)
+    if info is None:
+        info = inspect_raster(path)
 
-    # Verify the COG is in Web Mercator
-    srs = info.get("coordinateSystem", {}).get("wkt", "")
-    if "3857" not in srs and "Pseudo-Mercator" not in srs:
-        raise ValueError(
-            f"COG must be in EPSG:3857 (Web Mercator) for accurate zoom calculation. "
-            f"Found: {srs[:100]}..."
-        )
+    if not info.is_georeferenced:
+        raise ValueError(f"COG has no georeferencing: {path}")
 
     # Detect number of bands
-    band_count = len(info.get("bands", []))
+    band_count = info.band_count
 
     # Get bounds
-    polygon = info.get("wgs84Extent", {}).get("coordinates", [[]])[0]
-    lngs = [coord[0] for coord in polygon]
-    lats = [coord[1] for coord in polygon]
-    bounds = [[min(lats), min(lngs)], [max(lats), max(lngs)]]
+    west, south, east, north = info.wgs84_bounds
+    bounds = [[south, west], [north, east]]
 
     # Get base pixel size and image dimensions
-    pixel_size = abs(info["geoTransform"][1])  # In meters (Web Mercator)
-    base_width = info["size"][0]
-    base_height = info["size"][1]
+    base_width = info.width
+    base_height = info.height
+    if info.is_web_mercator:
+        pixel_size = abs(info.geotransform[1])  # In meters (Web Mercator)
+    else:
+        mercator_width = EARTH_RADIUS * math.radians(east - west)
+        pixel_size = mercator_width / base_width
 
     # Calculate base zoom level
     # Use ceil() to round up. For example, if pixel size is 0.075m and log2 gives 20.99,
@@ -152,7 +379,7 @@ def get_cog_metadata(path: Path) -> dict:
     logger.info(f"Base pixel size: {pixel_size:.6f} meters")
     logger.info(f"Calculated base zoom: {base_zoom}")
 
-    max_zoom = min(max(base_zoom, 0), 24)
+    max_zoom = min(max(base_zoom, 0), MAX_ZOOM)
     logger.info(f"maxZoom: {max_zoom}")
 
     # Prepare default render options for single-band images
@@ -172,12 +399,158 @@ def get_cog_metadata(path: Path) -> dict:
     }
 
 
-@app.task(queue="heavy")
+def build_warped_vrt(vrt_path: Path, member_path: str) -> Path:
+    """
+    Build a VRT of a mosaic member reprojected (on the fly) to EPSG:3857
+
+    The VRT is named after the mosaic and the member (so it is removed with the assets
+    of either).
+    """
+    warped_path = vrt_path.with_name(
+        f"{vrt_path.name.removesuffix('.vrt')}.{Path(member_path).stem}.3857.vrt"
+    )
+    temp_path = warped_path.with_name(f".{warped_path.name}.tmp")
+    cmd = [
+        "gdalwarp",
+        "-of",
+        "VRT",
+        "-t_srs",
+        "EPSG:3857",
+        "-overwrite",
+        member_path,
+        str(temp_path),
+    ]
+    logger.info(f"Reprojecting mosaic member: {' '.join(cmd)}")
+    try:
+        subprocess.run(cmd, check=True, cwd=vrt_path.parent)
+        os.replace(temp_path, warped_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return warped_path
+
+
+def build_mosaic_vrt(vrt_path: Path, member_paths: List[str]) -> None:
+    """
+    Build a VRT mosaic of COGs (at the highest resolution of the COGs)
+
+    Reading a window of the VRT only opens the COGs that intersect the window, so
+    rendering a tile of the mosaic only touches the COGs under the tile.
+
+    If the COGs have different projections (e.g. COGs that were stored as-is), the
+    ones not in EPSG:3857 are mosaicked through warped VRTs (see build_warped_vrt).
+
+    Raises:
+        ValueError: If the COGs have different band counts or data types
+    """
+    first_path = member_paths[0]
+    infos = {path: inspect_raster(path) for path in member_paths}
+    for path, info in infos.items():
+        if info.dtypes != infos[first_path].dtypes:
+            raise ValueError(
+                f"{Path(path).name} has different bands than {Path(first_path).name}"
+            )
+
+    epsgs = {info.epsg for info in infos.values()}
+    if len(epsgs) > 1 or None in epsgs:
+        member_paths = [
+            path if infos[path].epsg == 3857 else str(build_warped_vrt(vrt_path, path))
+            for path in member_paths
+        ]
+
+    # written next to the final VRT and then moved into place so that tiles are never
+    # rendered from a partial VRT (when rebuilding a mosaic)
+    temp_path = vrt_path.with_name(f".{vrt_path.name}.tmp")
+    cmd = [
+        "gdalbuildvrt",
+        "-resolution",
+        "highest",
+        "-overwrite",
+        str(temp_path),
+        *member_paths,
+    ]
+    logger.info(f"Building mosaic: {' '.join(cmd)}")
+    try:
+        subprocess.run(cmd, check=True, cwd=vrt_path.parent)
+        os.replace(temp_path, vrt_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def get_tiles_in_bounds(bounds: List[List[float]], zoom: int) -> List[Tuple[int, int]]:
+    """
+    Get the (x, y) of the XYZ tiles of a zoom level that intersect bounds
+    ([[south, west], [north, east]] as in tileOptions)
+    """
+    (south, west), (north, east) = bounds
+    tile_count = 2**zoom
+
+    def clamp(index: float) -> int:
+        return min(max(int(index), 0), tile_count - 1)
+
+    def tile_y(lat: float) -> int:
+        lat = math.radians(
+            min(max(lat, -WEB_MERCATOR_MAX_LATITUDE), WEB_MERCATOR_MAX_LATITUDE)
+        )
+        return clamp((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * tile_count)
+
+    min_x = clamp((west + 180) / 360 * tile_count)
+    max_x = clamp((east + 180) / 360 * tile_count)
+    return [
+        (x, y)
+        for x in range(min_x, max_x + 1)
+        for y in range(tile_y(north), tile_y(south) + 1)
+    ]
+
+
+def preseed_tiles(ts: TileServer) -> int:
+    """
+    Render the low zoom tiles (from minZoom up to TILE_PRESEED_MAX_ZOOM) of an internal
+    layer into the tile cache, with the layer's default render options, so that the
+    first map loads don't wait for TiTiler
+
+    :return: number of rendered tiles
+    """
+    min_zoom = ts.tileOptions.get("minZoom", 0)
+    max_zoom = min(settings.TILE_PRESEED_MAX_ZOOM, ts.tileOptions["maxZoom"])
+    tiles = []
+    for zoom in range(min_zoom, max_zoom + 1):
+        zoom_tiles = [
+            (zoom, x, y) for x, y in get_tiles_in_bounds(ts.tileOptions["bounds"], zoom)
+        ]
+        if len(tiles) + len(zoom_tiles) > settings.TILE_PRESEED_MAX_TILES:
+            break
+        tiles.extend(zoom_tiles)
+
+    render_options = (ts.uiOptions or {}).get("renderOptions") or {}
+    project_id, uuid, url = ts.project_id, str(ts.uuid), ts.url
+
+    def render(tile: Tuple[int, int, int]) -> bool:
+        z, x, y = tile
+        status_code, _, _ = TileService.get_tile(
+            project_id, uuid, url, z, x, y, "png", render_options
+        )
+        return status_code == 200
+
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, settings.TILE_PRESEED_CONCURRENCY)
+    ) as executor:
+        rendered = sum(executor.map(render, tiles))
+    logger.info(
+        f"Pre-rendered {rendered}/{len(tiles)} tiles of layer:{uuid} "
+        f"(zoom {min_zoom}-{max_zoom}) in {time.monotonic() - start:.1f}s"
+    )
+    return rendered
+
+
+@app.task(bind=True, queue="heavy")
 def import_tile_servers_from_tapis(
+    self,
     user_id: int,
     tapis_file: dict,
     project_id: int,
     task_id: int,
+    cog_uuid: str | None = None,
 ) -> None:
     """
     Download raster from Tapis (system/path), store under:
@@ -185,15 +558,19 @@ def import_tile_servers_from_tapis(
     If already a COG -> store as-is
     If not a COG -> convert to COG
     Then register a TileServer pointing to TiTiler.
+
+    If the resources needed for the conversion are not available, the task is retried
+    later with `cog_uuid` set so that the already downloaded file is reused.
     """
     logger.info(
         f"Starting tile server import task to create COG and related TileServer "
         f"task:{task_id} user:{user_id} project:{project_id} tapis file: {tapis_file}"
     )
 
+    tapis_file_dict = tapis_file
     tapis_file = TapisFilePath.model_validate(tapis_file)
-    tmp_file = None
-    cog_uuid = None
+    src_path = None
+    retrying = False
     with create_task_session() as session:
         try:
             user = session.get(User, user_id)
@@ -222,11 +599,25 @@ def import_tile_servers_from_tapis(
                 latest_message=f"Fetching {tapis_file.path}",
             )
 
+            cog_uuid = UUID(cog_uuid) if cog_uuid else uuid4()
+            cog_path = Path(make_project_asset_dir(project_id)) / f"{cog_uuid}.cog.tif"
+
+            # download next to where the COG will be written (and remove once processed)
+            src_path = cog_path.with_name(
+                f"{cog_uuid}.original{Path(tapis_file.path).suffix.lower()}"
+            )
+
             try:
-                logger.info(f"Fetching {tapis_file}")
-                tmp_file = client.getFile(
-                    tapis_file.system, tapis_file.path
-                )  # temp file
+                if src_path.exists():
+                    logger.info(f"Using {tapis_file} fetched by previous attempt")
+                else:
+                    logger.info(f"Fetching {tapis_file}")
+                    client.get_file_to_path(
+                        tapis_file.system,
+                        tapis_file.path,
+                        str(src_path),
+                        parallel_segments=True,
+                    )
             except TapisFileGetError:
                 logger.exception(
                     f"Tapis getFile failed for {tapis_file} when "
@@ -241,17 +632,50 @@ def import_tile_servers_from_tapis(
                 )
                 raise RuntimeError(f"Failed to download {tapis_file.path}")
 
-            cog_uuid = uuid4()
-            cog_path = Path(make_project_asset_dir(project_id)) / f"{cog_uuid}.cog.tif"
-
-            src_path = Path(tmp_file.name)
-
-            update_task_and_send_progress_update(
-                session, user=user, task_id=task_id, latest_message="Processing file"
-            )
-            gdal_cogify(src_path, cog_path)
-
-            tile_options = get_cog_metadata(cog_path)
+            src_info = inspect_raster(src_path)
+            if can_store_as_is(src_info):
+                logger.info(f"Storing {tapis_file} as-is (already a COG)")
+                src_path.rename(cog_path)
+                cog_info = src_info
+            else:
+                resources = estimate_cogify_resources(src_info)
+                try:
+                    with reserve_heavy_resources(f"raster:{cog_uuid}", resources):
+                        update_task_and_send_progress_update(
+                            session,
+                            user=user,
+                            task_id=task_id,
+                            status=TaskStatus.RUNNING,
+                            latest_message="Processing file",
+                        )
+                        gdal_cogify(
+                            src_path,
+                            cog_path,
+                            num_threads=resources.cpus,
+                            info=src_info,
+                        )
+                except HeavyResourcesUnavailable as e:
+                    update_task_and_send_progress_update(
+                        session,
+                        user=user,
+                        task_id=task_id,
+                        status=TaskStatus.QUEUED,
+                        latest_message=str(e),
+                    )
+                    raise self.retry(
+                        kwargs={
+                            "user_id": user_id,
+                            "tapis_file": tapis_file_dict,
+                            "project_id": project_id,
+                            "task_id": task_id,
+                            "cog_uuid": str(cog_uuid),
+                        },
+                        countdown=settings.HEAVY_RESOURCES_RETRY_SECONDS,
+                        max_retries=settings.HEAVY_RESOURCES_MAX_RETRIES,
+                    )
+                cog_info = inspect_raster(cog_path)
+
+            tile_options = get_cog_metadata(cog_path, info=cog_info)
 
             # Extract renderOptions from tile_options (currently
             # only prepopulated for single banded images)
@@ -293,6 +717,19 @@ def import_tile_servers_from_tapis(
             session.flush()
             session.commit()
 
+            if settings.TILE_CACHE_MAX_SIZE and settings.TILE_PRESEED_MAX_ZOOM >= 0:
+                update_task_and_send_progress_update(
+                    session,
+                    user=user,
+                    task_id=task_id,
+                    latest_message="Pre-rendering tiles",
+                )
+                try:
+                    preseed_tiles(ts)
+                except Exception:
+                    # layer is usable without cached tiles
+                    logger.exception(f"Unable to pre-render tiles of layer:{cog_uuid}")
+
             update_task_and_send_progress_update(
                 session,
                 user=user,
@@ -300,6 +737,10 @@ def import_tile_servers_from_tapis(
                 status=TaskStatus.COMPLETED,
                 latest_message="Import completed",
             )
+        except Retry:
+            # keep the downloaded file for the next attempt
+            retrying = True
+            raise
         except Exception:
             logger.exception(
                 f"Raster import failed for {tapis_file},"
@@ -322,5 +763,148 @@ def import_tile_servers_from_tapis(
 
             # We intentionally don't re-raise (Celery will mark it succeeded but we're interested just in geoapi's Task)
         finally:
-            if tmp_file is not None:
-                tmp_file.close()
+            if src_path is not None and not retrying and src_path.exists():
+                src_path.unlink()
+
+
+@app.task(queue="default")
+def create_mosaic_tile_server(
+    user_id: int,
+    project_id: int,
+    task_id: int,
+    name: str,
+    member_ids: List[int],
+    mosaic_id: int | None = None,
+) -> None:
+    """
+    Build a VRT of internal (COG) tile servers, stored under:
+        /assets/{projectId}/{uuid}.mosaic.vrt
+    and register it as a TileServer (or rebuild the VRT of the existing mosaic tile
+    server `mosaic_id`), with the footprints of its members.
+    """
+    logger.info(
+        f"Starting mosaic task:{task_id} user:{user_id} project:{project_id} "
+        f"mosaic:{mosaic_id} members:{member_ids}"
+    )
+    vrt_path = None
+    with create_task_session() as session:
+        user = session.get(User, user_id)
+        try:
+            update_task_and_send_progress_update(
+                session, user=user, task_id=task_id, latest_message="Building mosaic"
+            )
+
+            members = (
+                session.query(TileServer)
+                .filter(TileServer.id.in_(member_ids))
+                .filter(TileServer.project_id == project_id)
+                .order_by(TileServer.id)
+                .all()
+            )
+            if not members:
+                raise ValueError(f"Tile servers {member_ids} no longer exist")
+
+            mosaic = session.get(TileServer, mosaic_id) if mosaic_id else None
+            if mosaic is None:
+                mosaic_uuid = uuid4()
+                vrt_path = (
+                    Path(make_project_asset_dir(project_id))
+                    / f"{mosaic_uuid}.mosaic.vrt"
+                )
+            else:
+                mosaic_uuid = mosaic.uuid
+                vrt_path = Path(mosaic.url)
+
+            try:
+                build_mosaic_vrt(vrt_path, [member.url for member in members])
+            except ValueError as e:
+                update_task_and_send_progress_update(
+                    session,
+                    user=user,
+                    task_id=task_id,
+                    status=TaskStatus.FAILED,
+                    latest_message=f"Unable to mosaic: {str(e)}",
+                )
+                raise
+
+            tile_options = get_cog_metadata(vrt_path)
+            tile_options.pop("renderOptions", None)
+
+            if mosaic is None:
+                mosaic = TileService.addTileServer(
+                    session,
+                    project_id,
+                    {
+                        "name": name,
+                        "type": "xyz",
+                        "kind": "mosaic",
+                        "internal": True,
+                        "uuid": mosaic_uuid,
+                        "url": str(vrt_path),
+                        "attribution": "",
+                        "tileOptions": tile_options,
+                        "uiOptions": {
+                            "opacity": 1,
+                            "isActive": True,
+                            "showInput": False,
+                            "showDescription": False,
+                            # members are expected to share render options
+                            "renderOptions": (members[0].uiOptions or {}).get(
+                                "renderOptions", {}
+                            ),
+                        },
+                    },
+                )
+            else:
+                mosaic.tileOptions = {**(mosaic.tileOptions or {}), **tile_options}
+                session.query(TileServerMosaicMember).filter(
+                    TileServerMosaicMember.mosaic_id == mosaic.id
+                ).delete()
+
+            for member in members:
+                (south, west), (north, east) = member.tileOptions["bounds"]
+                session.add(
+                    TileServerMosaicMember(
+                        mosaic_id=mosaic.id,
+                        member_id=member.id,
+                        footprint=from_shape(box(west, south, east, north), srid=4326),
+                    )
+                )
+            session.commit()
+
+            if mosaic_id is not None:
+                tile_cache.invalidate_layer(project_id, str(mosaic_uuid))
+
+            if settings.TILE_CACHE_MAX_SIZE and settings.TILE_PRESEED_MAX_ZOOM >= 0:
+                try:
+                    preseed_tiles(mosaic)
+                except Exception:
+                    # layer is usable without cached tiles
+                    logger.exception(
+                        f"Unable to pre-render tiles of layer:{mosaic_uuid}"
+                    )
+
+            update_task_and_send_progress_update(
+                session,
+                user=user,
+                task_id=task_id,
+                status=TaskStatus.COMPLETED,
+                latest_message="Mosaic completed",
+            )
+        except Exception:
+            logger.exception(
+                f"Mosaic failed for tile servers:{member_ids},"
+                f" user:{user.username}, project:{project_id})"
+            )
+            if mosaic_id is None and vrt_path is not None:
+                vrt_path.unlink(missing_ok=True)
+            # Only update if not already marked as FAILED
+            t = session.get(Task, task_id)
+            if t.status != TaskStatus.FAILED.value:
+                update_task_and_send_progress_update(
+                    session,
+                    user=user,
+                    task_id=task_id,
+                    status=TaskStatus.FAILED,
+                    latest_message=f"Mosaic failed: {name}",
+                )
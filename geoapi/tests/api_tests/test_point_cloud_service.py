@@ -64,11 +64,11 @@ def test_delete_point_cloud_feature(
     celery_task_always_eager,
     projects_fixture,
     point_cloud_fixture,
-    lidar_las1pt2_file_fixture,
+    lidar_las1pt2_get_file_to_path,
     db_session,
 ):
     # create a point cloud feature so we can delete it
-    MockTapisUtils().getFile.return_value = lidar_las1pt2_file_fixture
+    MockTapisUtils().get_file_to_path.side_effect = lidar_las1pt2_get_file_to_path
     u1 = db_session.get(User, 1)
     files = [{"system": "designsafe.storage.default", "path": "file1.las"}]
     import_point_clouds_from_tapis(u1.id, files, point_cloud_fixture.id)
@@ -113,3 +113,23 @@ def test_update_point_cloud_without_changing_conversion_parameters(
     )
     convert_to_potree_mock.apply_async.assert_not_called()
     assert point_cloud.description == "new description"
+
+
+def test_update_point_cloud_output_format(
+    projects_fixture, point_cloud_fixture, convert_to_potree_mock, db_session
+):
+    assert point_cloud_fixture.output_format == "potree"
+    point_cloud = PointCloudService.update(
+        db_session, point_cloud_fixture.id, data={"output_format": "copc"}
+    )
+    convert_to_potree_mock.apply_async.assert_called_once()
+    assert point_cloud.output_format == "copc"
+
+
+def test_update_point_cloud_invalid_output_format(
+    projects_fixture, point_cloud_fixture, convert_to_potree_mock, db_session
+):
+    with pytest.raises(ValueError):
+        PointCloudService.update(
+            db_session, point_cloud_fixture.id, data={"output_format": "3dtiles"}
+        )
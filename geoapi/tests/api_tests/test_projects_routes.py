@@ -157,6 +157,15 @@ def test_project_data_single(test_client, projects_fixture, user1):
     assert data["deletable"] is True
 
 
+def test_project_data_query_count_header(test_client, projects_fixture, user1):
+    resp = test_client.get(
+        f"/projects/{projects_fixture.id}/", headers={"X-Tapis-Token": user1.jwt}
+    )
+    assert resp.status_code == 200
+    # at least the user, project and membership
+    assert int(resp.headers["X-DB-Query-Count"]) >= 3
+
+
 def test_project_data_protected(test_client, projects_fixture, user2):
     resp = test_client.get(
         f"/projects/{projects_fixture.id}/", headers={"X-Tapis-Token": user2.jwt}
@@ -603,3 +612,22 @@ def test_project_check_access_public_project(
         f"/projects/{public_projects_fixture.id}/check-access/",
     )
     assert resp.status_code == 200
+
+
+def test_get_project_asset_url(test_client, user1, projects_fixture):
+    resp = test_client.get(f"/projects/{projects_fixture.id}/asset-url/")
+    assert resp.status_code == 401
+
+    resp = test_client.get(
+        f"/projects/{projects_fixture.id}/asset-url/",
+        headers={"X-Tapis-Token": user1.jwt},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["url"].startswith("/assets/signed/")
+    assert data["url"].endswith(f"/{data['expires']}/")
+
+
+def test_get_project_asset_url_public_project(test_client, public_projects_fixture):
+    resp = test_client.get(f"/projects/{public_projects_fixture.id}/asset-url/")
+    assert resp.status_code == 200
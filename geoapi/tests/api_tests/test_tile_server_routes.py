@@ -1,5 +1,11 @@
+import uuid
+import jwt
+import pytest
 from geoapi.models.users import User
 from geoapi.models import TileServer, Task
+from geoapi.settings import settings
+from geoapi.services.tile_server import TileService
+from geoapi.utils.raster import BandStatistics, RasterStatistics
 from unittest.mock import patch, MagicMock
 
 
@@ -204,3 +210,310 @@ def test_import_tile_server_files_route__requires_project_permission(
 
     # Should fail - user2 doesn't have access
     assert resp.status_code in [401, 403]
+
+
+@pytest.fixture
+def internal_tile_server(tmp_path, monkeypatch, projects_fixture, db_session):
+    monkeypatch.setattr(settings, "TILE_CACHE_DIR", str(tmp_path))
+    ts_uuid = uuid.uuid4()
+    ts = TileServer(
+        project_id=projects_fixture.id,
+        name="raster.tif",
+        type="xyz",
+        kind="cog",
+        internal=True,
+        uuid=ts_uuid,
+        url=f"/assets/{projects_fixture.id}/{ts_uuid}.cog.tif",
+        attribution="",
+        uiOptions={"renderOptions": {"colormap_name": "terrain"}},
+    )
+    db_session.add(ts)
+    db_session.commit()
+    yield ts
+
+
+def _get_tile_url(test_client, user, tile_server):
+    resp = test_client.get(
+        f"/projects/{tile_server.project_id}/tile-servers/{tile_server.id}/tile-token/",
+        headers={"X-Tapis-Token": user.jwt},
+    )
+    assert resp.status_code == 200
+    return resp.json()["url"]
+
+
+def test_get_tile_is_cached(test_client, user1, internal_tile_server, requests_mock):
+    titiler = requests_mock.get(
+        f"{settings.TITILER_URL}/cog/tiles/WebMercatorQuad/3/2/1.png",
+        content=b"png",
+    )
+    url = _get_tile_url(test_client, user1, internal_tile_server)
+    tile_url = url.format(z=3, x=2, y=1) + "?colormap_name=terrain"
+
+    resp = test_client.get(tile_url)
+    assert resp.status_code == 200
+    assert resp.content == b"png"
+    assert resp.headers["content-type"] == "image/png"
+    assert resp.headers["X-Tile-Cache"] == "MISS"
+    assert titiler.last_request.qs == {
+        "colormap_name": ["terrain"],
+        "url": [f"file://{internal_tile_server.url}"],
+    }
+
+    resp = test_client.get(tile_url)
+    assert resp.status_code == 200
+    assert resp.content == b"png"
+    assert resp.headers["X-Tile-Cache"] == "HIT"
+    assert titiler.call_count == 1
+
+    # other render options are cached separately
+    resp = test_client.get(url.format(z=3, x=2, y=1) + "?colormap_name=viridis")
+    assert resp.headers["X-Tile-Cache"] == "MISS"
+    assert titiler.call_count == 2
+
+
+def test_get_tile_invalidated_when_render_options_change(
+    test_client, user1, internal_tile_server, requests_mock
+):
+    titiler = requests_mock.get(
+        f"{settings.TITILER_URL}/cog/tiles/WebMercatorQuad/3/2/1.png",
+        content=b"png",
+    )
+    url = _get_tile_url(test_client, user1, internal_tile_server)
+    tile_url = url.format(z=3, x=2, y=1)
+    test_client.get(tile_url)
+
+    # other uiOptions don't invalidate the cached tiles
+    test_client.put(
+        f"/projects/{internal_tile_server.project_id}/tile-servers/{internal_tile_server.id}/",
+        json={"uiOptions": {"opacity": 0.5}},
+        headers={"X-Tapis-Token": user1.jwt},
+    )
+    assert test_client.get(tile_url).headers["X-Tile-Cache"] == "HIT"
+
+    test_client.put(
+        f"/projects/{internal_tile_server.project_id}/tile-servers/{internal_tile_server.id}/",
+        json={"uiOptions": {"renderOptions": {"colormap_name": "viridis"}}},
+        headers={"X-Tapis-Token": user1.jwt},
+    )
+    assert test_client.get(tile_url).headers["X-Tile-Cache"] == "MISS"
+    assert titiler.call_count == 2
+
+
+def test_get_tile_outside_bounds(
+    test_client, user1, internal_tile_server, requests_mock
+):
+    requests_mock.get(
+        f"{settings.TITILER_URL}/cog/tiles/WebMercatorQuad/3/2/1.png",
+        status_code=404,
+    )
+    url = _get_tile_url(test_client, user1, internal_tile_server)
+    resp = test_client.get(url.format(z=3, x=2, y=1))
+    assert resp.status_code == 404
+
+
+def test_get_tile_invalid_token(test_client, internal_tile_server):
+    resp = test_client.get("/tiles/not-a-token/3/2/1.png")
+    assert resp.status_code == 401
+
+
+def test_tile_token_not_signed_with_secret_key(internal_tile_server):
+    token = TileService.create_tile_token(internal_tile_server)
+    assert TileService.decode_tile_token(token)["uuid"] == str(
+        internal_tile_server.uuid
+    )
+    with pytest.raises(jwt.InvalidSignatureError):
+        jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+
+    with patch.object(settings, "TILE_TOKEN_SECRET", "tile_token_secret_1234"):
+        token = TileService.create_tile_token(internal_tile_server)
+        jwt.decode(token, "tile_token_secret_1234", algorithms=["HS256"])
+
+
+def test_get_tile_token_requires_project_access(
+    test_client, user2, internal_tile_server
+):
+    resp = test_client.get(
+        f"/projects/{internal_tile_server.project_id}/tile-servers/{internal_tile_server.id}/tile-token/",
+        headers={"X-Tapis-Token": user2.jwt},
+    )
+    assert resp.status_code == 403
+
+
+def test_get_tile_token_external_tile_server(test_client, user1, projects_fixture):
+    resp = test_client.post(
+        "/projects/1/tile-servers/",
+        json=_get_tile_server_data(),
+        headers={"X-Tapis-Token": user1.jwt},
+    )
+    resp = test_client.get(
+        f"/projects/1/tile-servers/{resp.json()['id']}/tile-token/",
+        headers={"X-Tapis-Token": user1.jwt},
+    )
+    assert resp.status_code == 404
+
+
+@pytest.fixture
+def internal_tile_servers(projects_fixture, db_session):
+    tile_servers = []
+    for index in range(2):
+        ts_uuid = uuid.uuid4()
+        ts = TileServer(
+            project_id=projects_fixture.id,
+            name=f"raster{index}.tif",
+            type="xyz",
+            kind="cog",
+            internal=True,
+            uuid=ts_uuid,
+            url=f"/assets/{projects_fixture.id}/{ts_uuid}.cog.tif",
+            attribution="",
+        )
+        db_session.add(ts)
+        tile_servers.append(ts)
+    db_session.commit()
+    yield tile_servers
+
+
+def test_create_tile_server_mosaic__task_queued(
+    test_client, projects_fixture, internal_tile_servers, db_session, user1
+):
+    tile_server_ids = [ts.id for ts in internal_tile_servers]
+    with patch(
+        "geoapi.tasks.raster.create_mosaic_tile_server.apply_async"
+    ) as mock_apply_async:
+        resp = test_client.post(
+            f"/projects/{projects_fixture.id}/tile-servers/mosaic/",
+            json={"name": "mosaic", "tile_server_ids": tile_server_ids},
+            headers={"X-Tapis-Token": user1.jwt},
+        )
+
+    assert resp.status_code == 201
+    task_data = resp.json()
+    assert task_data["status"] == "QUEUED"
+    assert task_data["description"] == "Create mosaic mosaic"
+
+    mock_apply_async.assert_called_once()
+    kwargs = mock_apply_async.call_args.kwargs["kwargs"]
+    assert kwargs["user_id"] == user1.id
+    assert kwargs["project_id"] == projects_fixture.id
+    assert kwargs["member_ids"] == tile_server_ids
+    assert kwargs["mosaic_id"] is None
+    db_task = db_session.get(Task, task_data["id"])
+    assert mock_apply_async.call_args.kwargs["task_id"] == db_task.process_id
+
+
+def test_create_tile_server_mosaic__external_tile_server(
+    test_client, projects_fixture, internal_tile_servers, db_session, user1
+):
+    external = TileService.addTileServer(
+        db_session, projects_fixture.id, _get_tile_server_data()
+    )
+    with patch(
+        "geoapi.tasks.raster.create_mosaic_tile_server.apply_async"
+    ) as mock_apply_async:
+        resp = test_client.post(
+            f"/projects/{projects_fixture.id}/tile-servers/mosaic/",
+            json={
+                "name": "mosaic",
+                "tile_server_ids": [internal_tile_servers[0].id, external.id],
+            },
+            headers={"X-Tapis-Token": user1.jwt},
+        )
+
+    assert resp.status_code == 400
+    mock_apply_async.assert_not_called()
+
+
+def test_create_tile_server_mosaic__requires_project_permission(
+    test_client, projects_fixture, internal_tile_servers, user2
+):
+    with patch("geoapi.tasks.raster.create_mosaic_tile_server.apply_async"):
+        resp = test_client.post(
+            f"/projects/{projects_fixture.id}/tile-servers/mosaic/",
+            json={
+                "name": "mosaic",
+                "tile_server_ids": [ts.id for ts in internal_tile_servers],
+            },
+            headers={"X-Tapis-Token": user2.jwt},
+        )
+    assert resp.status_code in [401, 403]
+
+
+def test_sample_tile_server(test_client, user1, internal_tile_server):
+    with patch(
+        "geoapi.services.tile_server.sample_raster", return_value=[123.0]
+    ) as mock_sample_raster:
+        resp = test_client.get(
+            f"/projects/{internal_tile_server.project_id}/tile-servers/"
+            f"{internal_tile_server.id}/sample/",
+            params={"lon": -97.7, "lat": 30.3},
+            headers={"X-Tapis-Token": user1.jwt},
+        )
+    assert resp.status_code == 200
+    assert resp.json() == {"lon": -97.7, "lat": 30.3, "values": [123.0]}
+    mock_sample_raster.assert_called_once_with(internal_tile_server.url, -97.7, 30.3)
+
+
+def test_sample_tile_server_invalid_point(test_client, user1, internal_tile_server):
+    resp = test_client.get(
+        f"/projects/{internal_tile_server.project_id}/tile-servers/"
+        f"{internal_tile_server.id}/sample/",
+        params={"lon": -197.7, "lat": 30.3},
+        headers={"X-Tapis-Token": user1.jwt},
+    )
+    assert resp.status_code == 400
+
+
+def test_sample_tile_server_requires_project_permission(
+    test_client, user2, internal_tile_server
+):
+    resp = test_client.get(
+        f"/projects/{internal_tile_server.project_id}/tile-servers/"
+        f"{internal_tile_server.id}/sample/",
+        params={"lon": -97.7, "lat": 30.3},
+        headers={"X-Tapis-Token": user2.jwt},
+    )
+    assert resp.status_code == 403
+
+
+def test_get_tile_server_statistics(test_client, user1, internal_tile_server):
+    polygon = {
+        "type": "Polygon",
+        "coordinates": [
+            [[-97.8, 30.2], [-97.7, 30.2], [-97.7, 30.3], [-97.8, 30.3], [-97.8, 30.2]]
+        ],
+    }
+    statistics = RasterStatistics(
+        bands=[BandStatistics(count=4, min=1.0, max=4.0, mean=2.5, std=1.1)],
+        overview_level=1,
+        pixel_size=(60.0, 60.0),
+    )
+    with patch(
+        "geoapi.services.tile_server.get_raster_statistics", return_value=statistics
+    ) as mock_get_raster_statistics:
+        resp = test_client.post(
+            f"/projects/{internal_tile_server.project_id}/tile-servers/"
+            f"{internal_tile_server.id}/statistics/",
+            json={"geometry": polygon},
+            headers={"X-Tapis-Token": user1.jwt},
+        )
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "bands": [{"count": 4, "min": 1.0, "max": 4.0, "mean": 2.5, "std": 1.1}],
+        "overview_level": 1,
+        "pixel_size": [60.0, 60.0],
+    }
+    mock_get_raster_statistics.assert_called_once_with(
+        internal_tile_server.url, polygon
+    )
+
+
+def test_get_tile_server_statistics_invalid_geometry(
+    test_client, user1, internal_tile_server
+):
+    resp = test_client.post(
+        f"/projects/{internal_tile_server.project_id}/tile-servers/"
+        f"{internal_tile_server.id}/statistics/",
+        json={"geometry": {"type": "Point", "coordinates": [-97.7, 30.3]}},
+        headers={"X-Tapis-Token": user1.jwt},
+    )
+    assert resp.status_code == 400
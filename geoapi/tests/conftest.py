@@ -23,11 +23,13 @@ from geoapi.models.feature import Feature
 from geoapi.models.task import Task
 from geoapi.services.point_cloud import PointCloudService
 from geoapi.services.features import FeaturesService
-from geoapi.services.users import UserService
+from geoapi.services.users import UserService, jwt_user_cache, project_acl_cache
 from geoapi.app import app, session_auth_config
 from geoapi.utils.assets import get_project_asset_dir
 from geoapi.utils.external_apis import TapisFileListing, SystemUser
 from geoapi.utils.tenants import get_tapis_api_server
+from geoapi.utils.geo_location import metadata_cache
+from geoapi.custom.designsafe.utils import designsafe_project_cache
 from geoapi.utils.jwt_utils import create_token_expiry_hours_from_now
 from geoapi.exceptions import InvalidCoordinateReferenceSystem
 from geoapi import settings
@@ -36,6 +38,16 @@ if TYPE_CHECKING:
     from litestar import Litestar
 
 
+def pytest_collection_modifyitems(config, items):
+    # benchmarks are slow so they are only run if RUN_BENCHMARKS is set
+    if os.environ.get("RUN_BENCHMARKS"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="benchmark (set RUN_BENCHMARKS=1 to run)")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
 @pytest.fixture(scope="session")
 def db_engine() -> "Iterator[sqlalchemy_config.Engine]":
     """Create the database engine for testing."""
@@ -145,6 +157,30 @@ def tapis_url(user1):
     yield get_tapis_api_server(user1.tenant_id)
 
 
+@pytest.fixture(autouse=True, scope="function")
+def clear_metadata_cache():
+    metadata_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True, scope="function")
+def clear_designsafe_project_cache():
+    designsafe_project_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True, scope="function")
+def clear_jwt_user_cache():
+    jwt_user_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True, scope="function")
+def clear_project_acl_cache():
+    project_acl_cache.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 def user1(userdata, db_session: "sqlalchemy_config.Session") -> "Iterator[User]":
     yield db_session.query(User).filter(User.username == "test1").first()
@@ -380,6 +416,16 @@ def lidar_las1pt2_file_path_fixture():
     return os.path.join(home, "fixtures/lidar_subset_las1pt2.las")
 
 
+@pytest.fixture()
+def lidar_las1pt2_get_file_to_path(lidar_las1pt2_file_path_fixture):
+    """Side effect for TapisUtils.get_file_to_path that 'downloads' lidar_subset_las1pt2.las"""
+
+    def get_file_to_path(system_id, path, destination_path, **kwargs):
+        shutil.copyfile(lidar_las1pt2_file_path_fixture, destination_path)
+
+    return get_file_to_path
+
+
 @pytest.fixture()
 def lidar_las_epsg7030_file_path_fixture():
     home = os.path.dirname(__file__)
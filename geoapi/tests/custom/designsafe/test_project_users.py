@@ -3,6 +3,10 @@ import pytest
 import json
 
 from geoapi.custom.designsafe.project_users import get_system_users
+from geoapi.custom.designsafe.utils import (
+    designsafe_project_cache,
+    invalidate_designsafe_project_data,
+)
 from geoapi.settings import settings
 
 
@@ -72,3 +76,21 @@ def test_get_system_users_duplicate(
         {"user4": False},
         {"user5": True},
     ]
+
+
+def test_get_system_users_uses_cached_project(
+    requests_mock, user1, project_response, db_session
+):
+    uuid = "5752672753351626260-242ac118-0001-014"
+    requests_mock.get(
+        settings.DESIGNSAFE_URL + f"/api/projects/v2/{uuid}/", json=project_response
+    )
+
+    get_system_users(db_session, user1, system_id=f"project-{uuid}")
+    get_system_users(db_session, user1, system_id=f"project-{uuid}")
+    assert requests_mock.call_count == 1
+    assert designsafe_project_cache.stats() == {"hits": 1, "misses": 1}
+
+    invalidate_designsafe_project_data(f"project-{uuid}")
+    get_system_users(db_session, user1, system_id=f"project-{uuid}")
+    assert requests_mock.call_count == 2
@@ -10,11 +10,19 @@ from geoapi.tasks.external_data import (
     import_from_tapis,
     refresh_projects_watch_content,
     refresh_projects_watch_users,
+    refresh_project_watch_content,
+    refresh_project_watch_users,
+    summarize_watch_refresh,
     get_additional_files,
+    FilePrefetcher,
 )
 from geoapi.tasks.point_cloud import import_point_clouds_from_tapis
 from geoapi.utils.features import is_member_of_rapp_project_folder
-from geoapi.utils.external_apis import TapisFileListing, SystemUser
+from geoapi.utils.external_apis import (
+    TapisFileListing,
+    SystemUser,
+    TapisFileGetError,
+)
 from geoapi.utils.assets import get_project_asset_dir, get_asset_path
 from geoapi.exceptions import InvalidCoordinateReferenceSystem
 from geoapi.services.point_cloud import PointCloudService
@@ -81,8 +89,12 @@ def tapis_utils_with_geojson_file(geojson_file_fixture):
             ]
             MockTapisUtils().listing.return_value = filesListing
             MockTapisUtils().getFile.return_value = geojson_file_fixture
+            MockTapisUtils()._download_to_temp_file.return_value = geojson_file_fixture
             MockTapisUtilsInUtils().listing.return_value = filesListing
             MockTapisUtilsInUtils().getFile.return_value = geojson_file_fixture
+            MockTapisUtilsInUtils()._download_to_temp_file.return_value = (
+                geojson_file_fixture
+            )
             yield MockTapisUtils()
 
 
@@ -101,10 +113,16 @@ def tapis_utils_with_bad_image_file(image_file_no_location_fixture):
             ]
             MockTapisUtils().listing.return_value = filesListing
             MockTapisUtils().getFile.return_value = image_file_no_location_fixture
+            MockTapisUtils()._download_to_temp_file.return_value = (
+                image_file_no_location_fixture
+            )
             MockTapisUtilsInUtils().listing.return_value = filesListing
             MockTapisUtilsInUtils().getFile.return_value = (
                 image_file_no_location_fixture
             )
+            MockTapisUtilsInUtils()._download_to_temp_file.return_value = (
+                image_file_no_location_fixture
+            )
 
             class MockTapis:
                 client_in_utils = MockTapisUtilsInUtils()
@@ -179,12 +197,14 @@ def tapis_utils_listing_with_single_trash_folder_of_image(image_file_fixture):
             subfolder_file_listing,
         ]
         MockTapisUtilsInUtils().getFile.return_value = image_file_fixture
+        MockTapisUtilsInUtils()._download_to_temp_file.return_value = image_file_fixture
         with patch("geoapi.tasks.external_data.TapisUtils") as MockTapisUtils:
             MockTapisUtils().listing.side_effect = [
                 top_level_file_listing,
                 subfolder_file_listing,
             ]
             MockTapisUtils().getFile.return_value = image_file_fixture
+            MockTapisUtils()._download_to_temp_file.return_value = image_file_fixture
 
             class MockTapis:
                 client_in_utils = MockTapisUtilsInUtils()
@@ -229,7 +249,7 @@ def test_external_data_good_files(
 
     # This should only have been called once, since there is only
     # one FILE in the listing
-    tapis_utils_with_geojson_file.getFile.assert_called_once()
+    tapis_utils_with_geojson_file._download_to_temp_file.assert_called_once()
 
     tapis_utils_with_geojson_file.reset_mock()
 
@@ -243,7 +263,7 @@ def test_external_data_good_files(
     )
     # This should only have been called once, since there is only
     # one FILE in the listing
-    tapis_utils_with_geojson_file.getFile.assert_not_called()
+    tapis_utils_with_geojson_file._download_to_temp_file.assert_not_called()
 
 
 @pytest.mark.worker
@@ -264,7 +284,7 @@ def test_external_data_bad_files(
     features = db_session.query(Feature).all()
     assert len(features) == 0
     assert not os.path.exists(get_project_asset_dir(projects_fixture.id))
-    tapis_utils_with_bad_image_file.client_in_external_data.getFile.assert_called_once()
+    tapis_utils_with_bad_image_file.client_in_external_data._download_to_temp_file.assert_called_once()
     imported_file = db_session.query(ImportedFile).first()
     assert not imported_file.successful_import
 
@@ -281,7 +301,7 @@ def test_external_data_bad_files(
     # Getting the file should only have been called once, since there is only
     # one FILE in the listing, and we already attempted to import it in the first call
     # to import_from_tapis
-    tapis_utils_with_bad_image_file.client_in_external_data.getFile.assert_not_called()
+    tapis_utils_with_bad_image_file.client_in_external_data._download_to_temp_file.assert_not_called()
 
 
 @pytest.mark.worker
@@ -302,8 +322,8 @@ def test_external_data_no_files_except_for_trash(
         tapis_utils_listing_with_single_trash_folder_of_image.client_in_external_data.listing.call_count
         == 1
     )
-    tapis_utils_listing_with_single_trash_folder_of_image.client_in_external_data.getFile.assert_not_called()
-    tapis_utils_listing_with_single_trash_folder_of_image.client_in_utils.getFile.assert_not_called()
+    tapis_utils_listing_with_single_trash_folder_of_image.client_in_external_data._download_to_temp_file.assert_not_called()
+    tapis_utils_listing_with_single_trash_folder_of_image.client_in_utils._download_to_temp_file.assert_not_called()
 
 
 @pytest.mark.worker
@@ -346,10 +366,10 @@ def test_import_point_clouds_from_tapis(
     user1,
     projects_fixture,
     point_cloud_fixture,
-    lidar_las1pt2_file_fixture,
+    lidar_las1pt2_get_file_to_path,
     db_session,
 ):
-    MockTapisUtils().getFile.return_value = lidar_las1pt2_file_fixture
+    MockTapisUtils().get_file_to_path.side_effect = lidar_las1pt2_get_file_to_path
 
     files = [{"system": "designsafe.storage.default", "path": "file1.las"}]
     import_point_clouds_from_tapis(user1.id, files, point_cloud_fixture.id)
@@ -360,8 +380,8 @@ def test_import_point_clouds_from_tapis(
     assert point_cloud.task.description == ""
     assert len(os.listdir(get_project_asset_dir(point_cloud.project_id))) == 2
     assert (
-        len(os.listdir(get_asset_path(point_cloud.feature.assets[0].path))) == 5
-    )  # index.html, preview.html, pointclouds, libs, logo
+        len(os.listdir(get_asset_path(point_cloud.feature.assets[0].path))) == 6
+    )  # index.html, preview.html, manifest.json, pointclouds, libs, logo
     assert (
         len(
             os.listdir(
@@ -404,10 +424,10 @@ def test_import_point_clouds_from_tapis_check_point_cloud_missing_crs(
     user1,
     projects_fixture,
     point_cloud_fixture,
-    lidar_las1pt2_file_fixture,
+    lidar_las1pt2_get_file_to_path,
     db_session,
 ):
-    MockTapisUtils().getFile.return_value = lidar_las1pt2_file_fixture
+    MockTapisUtils().get_file_to_path.side_effect = lidar_las1pt2_get_file_to_path
     check_mock.side_effect = InvalidCoordinateReferenceSystem()
 
     files = [{"system": "designsafe.storage.default", "path": "file1.las"}]
@@ -439,10 +459,10 @@ def test_import_point_clouds_from_tapis_check_point_cloud_unknown(
     user1,
     projects_fixture,
     point_cloud_fixture,
-    lidar_las1pt2_file_fixture,
+    lidar_las1pt2_get_file_to_path,
     db_session,
 ):
-    MockTapisUtils().getFile.return_value = lidar_las1pt2_file_fixture
+    MockTapisUtils().get_file_to_path.side_effect = lidar_las1pt2_get_file_to_path
     check_mock.side_effect = Exception("dummy")
 
     files = [{"system": "designsafe.storage.default", "path": "file1.las"}]
@@ -476,10 +496,10 @@ def test_import_point_clouds_from_tapis_conversion_error(
     user1,
     projects_fixture,
     point_cloud_fixture,
-    lidar_las1pt2_file_fixture,
+    lidar_las1pt2_get_file_to_path,
     db_session,
 ):
-    MockTapisUtils().getFile.return_value = lidar_las1pt2_file_fixture
+    MockTapisUtils().get_file_to_path.side_effect = lidar_las1pt2_get_file_to_path
     convert_mock.side_effect = Exception("dummy")
 
     files = [{"system": "designsafe.storage.default", "path": "file1.las"}]
@@ -510,10 +530,10 @@ def test_import_point_clouds_from_tapis_conversion_error_due_to_memory_sigterm(
     user1,
     projects_fixture,
     point_cloud_fixture,
-    lidar_las1pt2_file_fixture,
+    lidar_las1pt2_get_file_to_path,
     db_session,
 ):
-    MockTapisUtils().getFile.return_value = lidar_las1pt2_file_fixture
+    MockTapisUtils().get_file_to_path.side_effect = lidar_las1pt2_get_file_to_path
 
     # Mock subprocess.run to raise CalledProcessError with returncode -9 (SIGKILL)
     mock_run_potree_converter.side_effect = subprocess.CalledProcessError(
@@ -557,11 +577,11 @@ def test_import_point_clouds_failed_dbsession_rollback(
     user1,
     projects_fixture,
     point_cloud_fixture,
-    lidar_las1pt2_file_fixture,
+    lidar_las1pt2_get_file_to_path,
     task_session_commit_throws_exception,
     caplog,
 ):
-    MockTapisUtils().getFile.return_value = lidar_las1pt2_file_fixture
+    MockTapisUtils().get_file_to_path.side_effect = lidar_las1pt2_get_file_to_path
 
     files = [{"system": "designsafe.storage.default", "path": "file1.las"}]
 
@@ -608,11 +628,12 @@ def test_refresh_projects_watch_users(
         for u in watch_content_users_projects_fixture.project_users
     ]
 
-    refresh_projects_watch_users()
+    result = refresh_project_watch_users(watch_content_users_projects_fixture.id)
 
     db_session.refresh(watch_content_users_projects_fixture)
 
     assert "rollback" not in caplog.text
+    assert result["status"] == "COMPLETED"
 
     # now two users with one being the admin and creator
     assert [(user1.username, True, True), (user2.username, False, False)] == [
@@ -630,11 +651,12 @@ def test_refresh_projects_watch_content(
     caplog,
     db_session,
 ):
-    refresh_projects_watch_content()
+    result = refresh_project_watch_content(watch_content_users_projects_fixture.id)
 
     db_session.refresh(watch_content_users_projects_fixture)
 
     assert "rollback" not in caplog.text
+    assert result["status"] == "COMPLETED"
     features = db_session.query(Feature).all()
     # the test geojson has 3 features in it
     assert len(features) == 3
@@ -648,8 +670,147 @@ def test_refresh_projects_watch_content_dbsession_rollback(
     task_session_commit_throws_exception,
     caplog,
 ):
-    refresh_projects_watch_content()
+    result = refresh_project_watch_content(watch_content_users_projects_fixture.id)
     assert "rollback" in caplog.text
+    assert result["status"] == "FAILED"
+
+
+@pytest.mark.worker
+def test_refresh_project_watch_content_skipped_when_already_running(
+    tapis_utils_with_geojson_file,
+    watch_content_users_projects_fixture,
+    db_session,
+):
+    with patch("geoapi.tasks.external_data.non_blocking_lock") as mock_lock:
+        mock_lock.return_value.__enter__.return_value = False
+        result = refresh_project_watch_content(watch_content_users_projects_fixture.id)
+
+    assert result["status"] == "SKIPPED"
+    assert db_session.query(Feature).count() == 0
+
+
+@pytest.mark.worker
+def test_refresh_project_watch_content_fails_on_unexpected_error(
+    watch_content_users_projects_fixture,
+):
+    # error outside of the refresh itself still returns a result (so the chord completes)
+    with patch("geoapi.tasks.external_data.non_blocking_lock") as mock_lock:
+        mock_lock.side_effect = ConnectionError("redis unavailable")
+        result = refresh_project_watch_content(watch_content_users_projects_fixture.id)
+
+    assert result["status"] == "FAILED"
+    assert result["project_id"] == watch_content_users_projects_fixture.id
+
+
+@pytest.mark.worker
+def test_refresh_projects_watch_content_fans_out_per_project(
+    watch_content_users_projects_fixture,
+):
+    with patch("geoapi.tasks.external_data.chord") as mock_chord:
+        refresh_projects_watch_content()
+
+    header = list(mock_chord.call_args[0][0])
+    assert [signature.args for signature in header] == [
+        (watch_content_users_projects_fixture.id,)
+    ]
+    mock_chord.return_value.assert_called_once()
+
+
+@pytest.mark.worker
+def test_refresh_projects_watch_users_fans_out_per_project(
+    watch_content_users_projects_fixture,
+):
+    with patch("geoapi.tasks.external_data.chord") as mock_chord:
+        refresh_projects_watch_users()
+
+    header = list(mock_chord.call_args[0][0])
+    assert [signature.args for signature in header] == [
+        (watch_content_users_projects_fixture.id,)
+    ]
+
+
+def test_summarize_watch_refresh(caplog):
+    results = [
+        {"project_id": 1, "system_id": "sys", "status": "COMPLETED", "duration": 1},
+        {"project_id": 2, "system_id": "sys", "status": "SKIPPED", "duration": 0},
+        {"project_id": 3, "system_id": "sys", "status": "COMPLETED", "duration": 5},
+    ]
+    summary = summarize_watch_refresh(results, "watch_content", 0)
+    assert summary["counts"] == {"COMPLETED": 2, "SKIPPED": 1, "FAILED": 0}
+    assert "project:3" in caplog.text
+
+
+def _listing(path, size):
+    return TapisFileListing(
+        {
+            "type": "file",
+            "path": path,
+            "lastModified": "2020-08-31T12:00:00Z",
+            "size": size,
+        }
+    )
+
+
+def test_file_prefetcher_yields_files_in_order_and_closes_them():
+    listings = [_listing(f"/testPath/file{i}.json", 10) for i in range(5)]
+    client = Mock()
+    client._download_to_temp_file.side_effect = lambda system_id, path: Mock()
+
+    with FilePrefetcher(client, "testSystem", listings, max_files=2) as prefetcher:
+        for item in listings:
+            with prefetcher.file(item.path) as tmp_file:
+                assert tmp_file.filename == item.path.name
+            tmp_file.close.assert_called_once()
+
+    assert [c.args for c in client._download_to_temp_file.call_args_list] == [
+        ("testSystem", item.path) for item in listings
+    ]
+    # token is ensured from this thread (not from the download threads via getFile)
+    client._ensure_valid_token.assert_called()
+    client.getFile.assert_not_called()
+
+
+def test_file_prefetcher_respects_temp_space_budget():
+    listings = [_listing(f"/testPath/file{i}.json", 10) for i in range(3)]
+    client = Mock()
+
+    with FilePrefetcher(
+        client, "testSystem", listings, max_files=3, temp_space_budget=15
+    ) as prefetcher:
+        # only the first file fits in the budget
+        assert len(prefetcher._downloads) == 1
+        with prefetcher.file(listings[0].path):
+            assert len(prefetcher._downloads) == 0
+        # space of first file is given back so the next one can be downloaded
+        assert len(prefetcher._downloads) == 1
+
+
+def test_file_prefetcher_closes_files_not_consumed():
+    listings = [_listing(f"/testPath/file{i}.json", 10) for i in range(2)]
+    downloaded = []
+
+    def get_file(system_id, path):
+        downloaded.append(Mock())
+        return downloaded[-1]
+
+    client = Mock()
+    client._download_to_temp_file.side_effect = get_file
+    with FilePrefetcher(client, "testSystem", listings, max_files=2):
+        pass
+
+    for tmp_file in downloaded:
+        tmp_file.close.assert_called_once()
+
+
+def test_file_prefetcher_raises_download_error():
+    listings = [_listing("/testPath/file.json", 10)]
+    client = Mock()
+    client._download_to_temp_file.side_effect = TapisFileGetError("failed")
+
+    with FilePrefetcher(client, "testSystem", listings) as prefetcher:
+        with pytest.raises(TapisFileGetError):
+            with prefetcher.file(listings[0].path):
+                pass
 
 
 def test_is_member_of_rapp_project_folder():
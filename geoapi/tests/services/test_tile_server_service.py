@@ -1,5 +1,11 @@
+import uuid
+from unittest.mock import patch
+
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point, box
+
 from geoapi.services.features import FeaturesService, TileService
-from geoapi.models import TileServer
+from geoapi.models import TileServer, TileServerMosaicMember
 
 
 def test_create_tile_server(projects_fixture, db_session):
@@ -220,3 +226,90 @@ def test_create_tile_server_from_file(
         tile_server.attribution
         == "OpenStreetMap contributorshttps://www.openstreetmap.org/copyright"
     )
+
+
+def _add_mosaic(db_session, project_id, member_footprints):
+    mosaic = TileServer(
+        project_id=project_id,
+        name="mosaic",
+        type="xyz",
+        kind="mosaic",
+        internal=True,
+        uuid=uuid.uuid4(),
+        url="/assets/mosaic.vrt",
+        attribution="",
+    )
+    db_session.add(mosaic)
+    db_session.flush()
+    members = []
+    for footprint in member_footprints:
+        member = TileServer(
+            project_id=project_id,
+            name="cog",
+            type="xyz",
+            kind="cog",
+            internal=True,
+            uuid=uuid.uuid4(),
+            url="/assets/cog.tif",
+            attribution="",
+        )
+        db_session.add(member)
+        db_session.flush()
+        db_session.add(
+            TileServerMosaicMember(
+                mosaic_id=mosaic.id,
+                member_id=member.id,
+                footprint=from_shape(footprint, srid=4326),
+            )
+        )
+        members.append(member)
+    db_session.commit()
+    return mosaic, members
+
+
+def test_get_mosaic_members(projects_fixture, db_session):
+    mosaic, (west, east) = _add_mosaic(
+        db_session,
+        projects_fixture.id,
+        [box(-98.0, 30.0, -97.5, 30.5), box(-97.5, 30.0, -97.0, 30.5)],
+    )
+
+    assert [
+        m.member_id for m in TileService.get_mosaic_members(db_session, mosaic.id)
+    ] == [west.id, east.id]
+    assert [
+        m.member_id
+        for m in TileService.get_mosaic_members(
+            db_session, mosaic.id, Point(-97.2, 30.2)
+        )
+    ] == [east.id]
+    assert (
+        TileService.get_mosaic_members(db_session, mosaic.id, Point(-90.0, 30.2)) == []
+    )
+
+
+def test_remove_mosaic_member_rebuilds_mosaic(projects_fixture, db_session, user1):
+    mosaic, (west, east) = _add_mosaic(
+        db_session,
+        projects_fixture.id,
+        [box(-98.0, 30.0, -97.5, 30.5), box(-97.5, 30.0, -97.0, 30.5)],
+    )
+
+    with patch(
+        "geoapi.tasks.raster.create_mosaic_tile_server.apply_async"
+    ) as mock_apply_async, patch(
+        "geoapi.services.tile_server.tile_cache.invalidate_layer"
+    ) as mock_invalidate_layer:
+        TileService.deleteTileServer(db_session, west.id, user=user1)
+
+    mock_apply_async.assert_called_once()
+    # tiles of the mosaic (showing the deleted tile server) are removed right away
+    mock_invalidate_layer.assert_any_call(projects_fixture.id, str(mosaic.uuid))
+    kwargs = mock_apply_async.call_args.kwargs["kwargs"]
+    assert kwargs["mosaic_id"] == mosaic.id
+    assert kwargs["member_ids"] == [east.id]
+
+    # removing the last member removes the mosaic
+    with patch("geoapi.tasks.raster.create_mosaic_tile_server.apply_async"):
+        TileService.deleteTileServer(db_session, east.id, user=user1)
+    assert db_session.query(TileServer).count() == 0
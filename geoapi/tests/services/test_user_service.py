@@ -1,4 +1,8 @@
-from geoapi.services.users import UserService
+from unittest.mock import patch
+
+from geoapi.db import count_db_queries
+from geoapi.services.projects import ProjectsService
+from geoapi.services.users import UserService, project_acl_cache
 
 
 def test_is_admin_or_creator(
@@ -17,3 +21,96 @@ def test_is_admin_or_creator2(
     assert UserService.is_admin_or_creator(db_session, user1, projects_fixture2.id)
     assert UserService.canAccess(db_session, user2, projects_fixture2.id)
     assert not UserService.is_admin_or_creator(db_session, user2, projects_fixture2.id)
+
+
+def test_get_project_acl_cached(user1, projects_fixture, db_session):
+    acl = UserService.get_project_acl(db_session, user1, projects_fixture.id)
+    assert acl == {"member": True, "admin": True, "creator": False, "public": False}
+
+    with count_db_queries() as get_query_count:
+        assert (
+            UserService.get_project_acl(db_session, user1, projects_fixture.id) == acl
+        )
+    assert get_query_count() == 0
+
+
+def test_get_project_acl_invalidated_while_reading(user1, projects_fixture, db_session):
+    original_set = project_acl_cache.set
+
+    def set_after_invalidation(key, value):
+        # e.g. user removed from project after the access was read from the database
+        UserService.invalidate_project_acl(projects_fixture.id)
+        original_set(key, value)
+
+    with patch.object(project_acl_cache, "set", side_effect=set_after_invalidation):
+        UserService.get_project_acl(db_session, user1, projects_fixture.id)
+
+    # the access read before the invalidation isn't used
+    with count_db_queries() as get_query_count:
+        UserService.get_project_acl(db_session, user1, projects_fixture.id)
+    assert get_query_count() > 0
+
+
+def test_get_project_acl_missing_project(user1, userdata, db_session):
+    assert UserService.get_project_acl(db_session, user1, 12345) is None
+
+
+def test_get_project_acl_invalidated_by_membership_changes(
+    user1, user2, projects_fixture, db_session
+):
+    assert not UserService.canAccess(db_session, user2, projects_fixture.id)
+
+    ProjectsService.addUserToProject(
+        db_session, projects_fixture.id, user2.username, admin=True
+    )
+    assert UserService.canAccess(db_session, user2, projects_fixture.id)
+    assert UserService.is_admin_or_creator(db_session, user2, projects_fixture.id)
+
+    ProjectsService.removeUserFromProject(
+        db_session, projects_fixture.id, user2.username
+    )
+    assert not UserService.canAccess(db_session, user2, projects_fixture.id)
+
+
+def test_get_project_acl_invalidated_by_update(user1, projects_fixture, db_session):
+    assert not UserService.get_project_acl(db_session, user1, projects_fixture.id)[
+        "public"
+    ]
+    ProjectsService.update(db_session, projects_fixture.id, {"public": True})
+    assert UserService.get_project_acl(db_session, user1, projects_fixture.id)["public"]
+
+
+def test_get_user_for_token(user1, db_session):
+    user = UserService.get_user_for_token(
+        db_session, user1.username, user1.tenant_id, user1.jwt
+    )
+    assert user.id == user1.id
+
+    # the user of a recently seen token is looked up by id (and token isn't stored)
+    db_session.expunge_all()
+    with patch.object(
+        UserService, "update_access_token"
+    ) as mock_update_access_token, count_db_queries() as get_query_count:
+        user = UserService.get_user_for_token(
+            db_session, user1.username, user1.tenant_id, user1.jwt
+        )
+    assert user.id == user1.id
+    assert get_query_count() == 1
+    mock_update_access_token.assert_not_called()
+
+
+def test_get_user_for_token_other_user(user1, user2, db_session):
+    UserService.get_user_for_token(
+        db_session, user1.username, user1.tenant_id, user1.jwt
+    )
+    # a cached token is only used for the user it was issued to
+    user = UserService.get_user_for_token(
+        db_session, user2.username, user2.tenant_id, user1.jwt
+    )
+    assert user.id == user2.id
+
+
+def test_get_user_for_token_new_user(userdata, db_session):
+    user = UserService.get_user_for_token(db_session, "newUser", "test", "token")
+    assert user.username == "newUser"
+    assert user.auth.access_token == "token"
@@ -8,9 +8,17 @@ from geoapi.tasks.file_location_check import (
     is_designsafe_project,
     determine_if_exists_in_tree,
     build_file_index_from_tapis,
+    get_published_file_index,
+    process_in_batches,
+    check_and_update_public_system,
+    PublishedFileTreeUnavailable,
+    PublishedFileTree,
     DESIGNSAFE_PUBLISHED_SYSTEM,
 )
-from geoapi.models import TaskStatus
+from geoapi.models import TaskStatus, PublishedFile
+from geoapi.services.published_file_index import PublishedFileIndexService
+from geoapi.settings import settings
+from geoapi.utils.external_apis import TapisListingError
 from geoapi.models.feature import FeatureAsset
 
 
@@ -225,6 +233,131 @@ def test_determine_if_published_multiple_matches():
     assert path == "/published-data/PRJ-1234/test.jpg"
 
 
+def published_listing(*paths):
+    return [
+        MagicMock(type="file", path=Path(path), lastModified="2025-11-20T12:00:00Z")
+        for path in paths
+    ]
+
+
+def test_get_published_file_index(db_session):
+    """Test that the published file index is persisted and then used without a rebuild"""
+    mock_client = MagicMock()
+    mock_client.listing.return_value = published_listing(
+        "/published-data/PRJ-1234/a.jpg", "/published-data/PRJ-1234/b.jpg"
+    )
+
+    index = get_published_file_index(db_session, mock_client, "PRJ-1234")
+    assert index.file_count == 2
+    file_tree = PublishedFileTree(db_session, index.id, index.file_count)
+    assert determine_if_exists_in_tree(file_tree, "/private/a.jpg") == (
+        True,
+        "/published-data/PRJ-1234/a.jpg",
+    )
+    assert determine_if_exists_in_tree(file_tree, "/private/c.jpg") == (False, None)
+
+    # recently checked index (e.g. used by another map project) needs no listing
+    mock_client.listing.reset_mock()
+    assert get_published_file_index(db_session, mock_client, "PRJ-1234").id == index.id
+    mock_client.listing.assert_not_called()
+
+
+def test_get_published_file_index_unchanged_listing(db_session):
+    """Test that index is not rebuilt when published project listing is unchanged"""
+    mock_client = MagicMock()
+    mock_client.listing.return_value = published_listing(
+        "/published-data/PRJ-1234/a.jpg"
+    )
+    get_published_file_index(db_session, mock_client, "PRJ-1234")
+
+    mock_client.listing.reset_mock()
+    with patch.object(settings, "PUBLISHED_FILE_INDEX_TTL", 0):
+        get_published_file_index(db_session, mock_client, "PRJ-1234")
+    # only the top-level listing to compare against
+    assert mock_client.listing.call_count == 1
+
+
+def test_get_published_file_index_incremental_update(db_session):
+    """Test that a changed published project only updates changed files"""
+    mock_client = MagicMock()
+    mock_client.listing.return_value = published_listing(
+        "/published-data/PRJ-1234/a.jpg", "/published-data/PRJ-1234/b.jpg"
+    )
+    index = get_published_file_index(db_session, mock_client, "PRJ-1234")
+    kept_id = (
+        db_session.query(PublishedFile.id)
+        .filter(PublishedFile.filename == "a.jpg")
+        .scalar()
+    )
+
+    mock_client.listing.return_value = published_listing(
+        "/published-data/PRJ-1234/a.jpg", "/published-data/PRJ-1234/c.jpg"
+    )
+    with patch.object(settings, "PUBLISHED_FILE_INDEX_TTL", 0):
+        index = get_published_file_index(db_session, mock_client, "PRJ-1234")
+
+    assert index.file_count == 2
+    assert PublishedFileIndexService.find_paths(db_session, index.id, "b.jpg") == []
+    assert PublishedFileIndexService.find_paths(db_session, index.id, "c.jpg") == [
+        "published-data/PRJ-1234/c.jpg"
+    ]
+    assert (
+        db_session.query(PublishedFile.id)
+        .filter(PublishedFile.filename == "a.jpg")
+        .scalar()
+        == kept_id
+    )
+
+
+def test_get_published_file_index_not_published(db_session):
+    """Test that there is no index for a project that is not published"""
+    mock_client = MagicMock()
+    mock_client.listing.side_effect = TapisListingError(
+        message="not found", response=MagicMock(status_code=404)
+    )
+    assert get_published_file_index(db_session, mock_client, "PRJ-1234") is None
+    assert PublishedFileIndexService.get(db_session, "PRJ-1234") is None
+
+
+def test_process_in_batches_isolates_failures(db_session, multiple_assets):
+    """Test that a failing item only loses its own changes, not its batch's"""
+    failing_id = multiple_assets[1].id
+    failures = []
+
+    def process(asset):
+        asset.current_path = f"/checked/{asset.id}.jpg"
+        if asset.id == failing_id:
+            raise ValueError("bad asset")
+
+    process_in_batches(
+        db_session,
+        FeatureAsset,
+        [asset.id for asset in multiple_assets],
+        process,
+        lambda item_id, e: failures.append(item_id),
+        batch_size=2,
+    )
+
+    assert failures == [failing_id]
+    for asset in multiple_assets:
+        db_session.refresh(asset)
+        if asset.id == failing_id:
+            assert asset.current_path is None
+        else:
+            assert asset.current_path == f"/checked/{asset.id}.jpg"
+
+
+def test_check_and_update_public_system_requires_prefetched_tree(db_session, user1):
+    """Trees are built before batches are processed (as building one commits)"""
+    item = MagicMock(current_system="project-123456789")
+    with patch(
+        "geoapi.tasks.file_location_check.get_file_tree_for_published_project"
+    ) as get_file_tree:
+        with pytest.raises(PublishedFileTreeUnavailable):
+            check_and_update_public_system(item, {}, db_session, user1)
+    get_file_tree.assert_not_called()
+
+
 def test_check_already_on_public_system(
     db_session,
     projects_fixture,
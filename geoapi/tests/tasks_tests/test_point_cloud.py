@@ -0,0 +1,275 @@
+import os
+import json
+import shutil
+import laspy
+import pytest
+from unittest.mock import patch
+from geoalchemy2.shape import to_shape
+
+from geoapi.tasks.point_cloud import (
+    run_copc_converter,
+    get_files_to_convert,
+    get_file_signature,
+    get_replaced_files,
+    run_pdal_tile,
+    convert_file_to_sub_clouds,
+    parse_potree_progress,
+    ConversionProgress,
+    import_point_clouds_from_tapis,
+)
+from geoapi.services.point_cloud import PointCloudService
+from geoapi.models import Task, TaskStatus, PointCloudConversionMetrics
+from geoapi.utils.assets import get_asset_path
+from geoapi.utils.point_cloud import get_bounding_box_2d, get_point_count
+
+# simplified version of the page generated by the potree converter
+POTREE_PAGE = """<html>
+<div class="nsf_logo"><img src="logo/nsf.png"></div>
+<script type="module">
+    viewer.loadGUI(() => {
+        viewer.toggleSidebar();
+    });
+
+    Potree.loadPointCloud("./pointclouds/index/metadata.json", "index", e => {
+        let scene = viewer.scene;
+        scene.addPointCloud(e.pointcloud);
+        viewer.fitToScreen();
+    });
+</script>
+</html>
+"""
+
+
+def fake_potree_converter(
+    pointCloudId, input_path, output_path, conversion_parameters=None, on_progress=None
+):
+    if on_progress:
+        on_progress(50)
+    os.makedirs(os.path.join(output_path, "pointclouds", "index"))
+    os.makedirs(os.path.join(output_path, "libs"))
+    with open(
+        os.path.join(output_path, "pointclouds", "index", "metadata.json"), "w"
+    ) as f:
+        json.dump({"name": os.path.basename(input_path)}, f)
+    with open(os.path.join(output_path, "index.html"), "w") as f:
+        f.write(POTREE_PAGE)
+
+
+@pytest.mark.worker
+def test_run_copc_converter(tmp_path, lidar_las1pt2_file_path_fixture):
+    output_dir = str(tmp_path / "point_cloud")
+
+    run_copc_converter(1, [lidar_las1pt2_file_path_fixture], output_dir)
+
+    copc_file = os.path.join(output_dir, PointCloudService.COPC_FILE_NAME)
+    with laspy.open(lidar_las1pt2_file_path_fixture) as original, laspy.open(
+        copc_file
+    ) as converted:
+        assert converted.header.point_count == original.header.point_count
+
+
+def test_get_files_to_convert(tmp_path):
+    input_files = []
+    for name in ["file1.las", "file2.las", "file3.las"]:
+        (tmp_path / name).write_bytes(b"points")
+        input_files.append(str(tmp_path / name))
+    file1, file2, file3 = input_files
+    manifest = {
+        "clouds": [
+            {
+                "file": "file1.las",
+                "conversion_parameters": None,
+                "signature": get_file_signature(file1),
+            },
+            {
+                "file": "file2.las",
+                "conversion_parameters": "--method poisson",
+                "signature": get_file_signature(file2),
+            },
+        ]
+    }
+
+    assert get_files_to_convert(None, [file1, file2], None) == [file1, file2]
+    assert get_files_to_convert(manifest, [file1, file2], None) == [file2]
+    assert get_files_to_convert(manifest, input_files, "--method poisson") == [
+        file1,
+        file3,
+    ]
+
+    # file re-imported with other contents
+    (tmp_path / "file1.las").write_bytes(b"other points")
+    assert get_replaced_files(manifest, input_files) == [file1]
+    assert get_files_to_convert(manifest, [file1, file2], "--method poisson") == [file1]
+
+
+@pytest.mark.worker
+@patch("geoapi.tasks.point_cloud.run_potree_converter")
+@patch("geoapi.tasks.point_cloud.TapisUtils")
+def test_import_point_clouds_from_tapis_converts_only_new_file(
+    MockTapisUtils,
+    mock_run_potree_converter,
+    user1,
+    projects_fixture,
+    point_cloud_fixture,
+    lidar_las1pt2_file_path_fixture,
+    lidar_las1pt4_file_path_fixture,
+    db_session,
+):
+    fixtures = {
+        "file1.las": lidar_las1pt2_file_path_fixture,
+        "file2.las": lidar_las1pt4_file_path_fixture,
+    }
+
+    def get_file_to_path(system_id, path, destination_path, **kwargs):
+        shutil.copyfile(fixtures[path], destination_path)
+
+    MockTapisUtils().get_file_to_path.side_effect = get_file_to_path
+    mock_run_potree_converter.side_effect = fake_potree_converter
+
+    for path in ["file1.las", "file2.las"]:
+        files = [{"system": "designsafe.storage.default", "path": path}]
+        import_point_clouds_from_tapis(user1.id, files, point_cloud_fixture.id)
+
+    # second import only converts the added file
+    assert mock_run_potree_converter.call_count == 2
+    assert mock_run_potree_converter.call_args_list[1].args[1].endswith("file2.las")
+
+    db_session.refresh(point_cloud_fixture)
+    point_cloud = point_cloud_fixture
+    assert point_cloud.task.status == TaskStatus.COMPLETED
+    assert to_shape(point_cloud.feature.the_geom).equals(
+        get_bounding_box_2d(list(fixtures.values()))
+    )
+
+    asset_path = get_asset_path(point_cloud.feature.assets[0].path)
+    with open(
+        os.path.join(asset_path, PointCloudService.POTREE_MANIFEST_FILE_NAME)
+    ) as f:
+        manifest = json.load(f)
+    assert [sub_cloud["file"] for sub_cloud in manifest["clouds"]] == [
+        "file1.las",
+        "file2.las",
+    ]
+    for sub_cloud in manifest["clouds"]:
+        assert os.path.isfile(
+            os.path.join(asset_path, sub_cloud["path"], "metadata.json")
+        )
+
+    with open(os.path.join(asset_path, "index.html")) as f:
+        index = f.read()
+        assert PointCloudService.POTREE_MANIFEST_FILE_NAME in index
+        assert "./pointclouds/index/metadata.json" not in index
+        assert "scene.addPointCloud(e.pointcloud)" in index
+    with open(os.path.join(asset_path, "preview.html")) as f:
+        assert "nsf_logo" not in f.read()
+
+    metrics = (
+        db_session.query(PointCloudConversionMetrics)
+        .filter(PointCloudConversionMetrics.point_cloud_id == point_cloud.id)
+        .order_by(PointCloudConversionMetrics.id)
+        .all()
+    )
+    assert [m.converted_file_count for m in metrics] == [1, 1]
+    assert [m.file_count for m in metrics] == [1, 2]
+    assert metrics[1].input_size == os.path.getsize(lidar_las1pt4_file_path_fixture)
+    assert metrics[1].point_count > 0
+    assert metrics[1].download_seconds is not None
+
+
+@pytest.mark.worker
+@patch("geoapi.tasks.point_cloud.run_potree_converter")
+@patch("geoapi.tasks.point_cloud.TapisUtils")
+def test_import_point_clouds_from_tapis_reconverts_replaced_file(
+    MockTapisUtils,
+    mock_run_potree_converter,
+    user1,
+    projects_fixture,
+    point_cloud_fixture,
+    lidar_las1pt2_file_path_fixture,
+    lidar_las1pt4_file_path_fixture,
+    db_session,
+):
+    contents = [lidar_las1pt2_file_path_fixture, lidar_las1pt4_file_path_fixture]
+
+    def get_file_to_path(system_id, path, destination_path, **kwargs):
+        shutil.copyfile(contents.pop(0), destination_path)
+
+    MockTapisUtils().get_file_to_path.side_effect = get_file_to_path
+    mock_run_potree_converter.side_effect = fake_potree_converter
+
+    # same file name imported twice with different contents
+    files = [{"system": "designsafe.storage.default", "path": "file1.las"}]
+    import_point_clouds_from_tapis(user1.id, files, point_cloud_fixture.id)
+    import_point_clouds_from_tapis(user1.id, files, point_cloud_fixture.id)
+
+    assert mock_run_potree_converter.call_count == 2
+    db_session.refresh(point_cloud_fixture)
+    # outline is only the extent of the new contents
+    assert to_shape(point_cloud_fixture.feature.the_geom).equals(
+        get_bounding_box_2d([lidar_las1pt4_file_path_fixture])
+    )
+
+
+@pytest.mark.worker
+def test_run_pdal_tile(tmp_path, lidar_medium_size_compressed_las1pt2):
+    point_count = get_point_count(lidar_medium_size_compressed_las1pt2)
+
+    tiles = run_pdal_tile(
+        1, lidar_medium_size_compressed_las1pt2, str(tmp_path), point_count // 4
+    )
+
+    assert len(tiles) > 1
+    assert sum(get_point_count(tile) for tile in tiles) == point_count
+
+
+@pytest.mark.worker
+@patch("geoapi.tasks.point_cloud.run_potree_converter")
+def test_convert_file_to_sub_clouds_splits_large_file(
+    mock_run_potree_converter, tmp_path, lidar_medium_size_compressed_las1pt2
+):
+    mock_run_potree_converter.side_effect = fake_potree_converter
+    processed_path = str(tmp_path / "point_cloud")
+    tiles_path = str(tmp_path / "tiles")
+    point_count = get_point_count(lidar_medium_size_compressed_las1pt2)
+
+    names = convert_file_to_sub_clouds(
+        1,
+        lidar_medium_size_compressed_las1pt2,
+        processed_path,
+        tiles_path,
+        max_points=point_count // 4,
+    )
+
+    assert len(names) > 1
+    assert mock_run_potree_converter.call_count == len(names)
+    assert sorted(os.listdir(processed_path)) == sorted(names)
+    # tiles are removed once converted
+    assert os.listdir(tiles_path) == []
+
+
+def test_parse_potree_progress():
+    assert (
+        parse_potree_progress(
+            "[ 45%, 12s], [INDEXING: 80%, duration: 10s, throughput: 3MPs]"
+            "[RAM: 1.2GB (highest 1.5GB), CPU: 90%]"
+        )
+        == 45
+    )
+    assert parse_potree_progress("[100%, 30s], [FINISHED]") == 100
+    assert parse_potree_progress("#points: 1'000'000") is None
+
+
+def test_conversion_progress_is_throttled(point_cloud_fixture, db_session):
+    task = Task(process_id="1234", status=TaskStatus.RUNNING)
+    point_cloud_fixture.task = task
+    db_session.add(point_cloud_fixture)
+    db_session.commit()
+
+    progress = ConversionProgress(point_cloud_fixture.id)
+    progress.update("file1", 50, 0.5)
+    progress.update("file2", 100, 0.5)
+
+    db_session.refresh(task)
+    # second update came too soon after the first
+    assert task.percent == 25
+    assert task.latest_message == "Converting point cloud: 25%"
@@ -1,18 +1,45 @@
+import re
 import pytest
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import json
 import subprocess
+import shutil
+import numpy
+import rasterio
 
 from geoapi.tasks.raster import (
     _validate_raster_name,
     is_8bit_rgb_or_rgba,
+    get_resampling,
     import_tile_servers_from_tapis,
+    gdal_cogify,
+    get_cog_metadata,
+    can_store_as_is,
+    get_google_maps_compatible_grid,
+    _is_google_maps_compatible,
+    get_tiles_in_bounds,
+    preseed_tiles,
+    create_mosaic_tile_server,
 )
-from geoapi.models import TileServer, TaskStatus
+from geoapi.models import TileServer, TileServerMosaicMember, TaskStatus
+from geoapi.utils.raster import inspect_raster
+from geoapi.settings import settings
+from geoapi.log import logging
 from geoapi.utils.external_apis import TapisFileGetError
 from geoapi.utils.assets import get_project_asset_dir
 
+logger = logging.getLogger(__name__)
+
+
+def _copy_to_destination(source_file):
+    """Side effect for TapisUtils.get_file_to_path that 'downloads' a local file"""
+
+    def get_file_to_path(system_id, path, destination_path, **kwargs):
+        shutil.copyfile(source_file.name, destination_path)
+
+    return get_file_to_path
+
 
 def test_validate_tif():
     """Test that various .tif extensions are valid"""
@@ -38,12 +65,17 @@ def test_validate_invalid_extension():
 
 @pytest.mark.worker
 def test_is_8bit_rgb_or_rgba_true(raster_threeband_byte_rgbsmall):
-    assert is_8bit_rgb_or_rgba(Path(raster_threeband_byte_rgbsmall.name)) is True
+    assert (
+        is_8bit_rgb_or_rgba(inspect_raster(raster_threeband_byte_rgbsmall.name)) is True
+    )
 
 
 @pytest.mark.worker
 def test_is_8bit_rgb_or_rgba_false_singleband(raster_singleband_int16_m30dem):
-    assert is_8bit_rgb_or_rgba(Path(raster_singleband_int16_m30dem.name)) is False
+    assert (
+        is_8bit_rgb_or_rgba(inspect_raster(raster_singleband_int16_m30dem.name))
+        is False
+    )
 
 
 @pytest.mark.worker
@@ -56,7 +88,9 @@ def test_import_tile_server_singleband_success(
     raster_singleband_int16_m30dem,
     db_session,
 ):
-    MockTapisUtils().getFile.return_value = raster_singleband_int16_m30dem
+    MockTapisUtils().get_file_to_path.side_effect = _copy_to_destination(
+        raster_singleband_int16_m30dem
+    )
 
     tapis_file = {"system": "testSystem", "path": "/testPath/raster.tif"}
 
@@ -132,7 +166,9 @@ def test_import_tile_server_rgb_success(
     raster_threeband_byte_rgbsmall,
     db_session,
 ):
-    MockTapisUtils().getFile.return_value = raster_threeband_byte_rgbsmall
+    MockTapisUtils().get_file_to_path.side_effect = _copy_to_destination(
+        raster_threeband_byte_rgbsmall
+    )
 
     tapis_file = {"system": "testSystem", "path": "/testPath/rgb.tif"}
 
@@ -169,6 +205,154 @@ def test_import_tile_server_rgb_success(
     assert info["metadata"]["IMAGE_STRUCTURE"]["COMPRESSION"] == "YCbCr JPEG"
 
 
+@pytest.mark.worker
+def test_can_store_as_is(tmp_path, raster_singleband_int16_m30dem):
+    src = Path(raster_singleband_int16_m30dem.name)
+    cog = tmp_path / "m30dem.cog.tif"
+    gdal_cogify(src, cog)
+
+    assert can_store_as_is(inspect_raster(src)) is False
+    assert can_store_as_is(inspect_raster(cog)) is True
+
+
+@pytest.mark.worker
+def test_can_store_as_is_cog_in_other_crs(tmp_path, raster_singleband_byte_UTM2GTIF):
+    # COG driver adds overviews (and keeps the UTM projection) so it is still converted
+    cog = tmp_path / "utm.cog.tif"
+    subprocess.run(
+        [
+            "gdal_translate",
+            "-of",
+            "COG",
+            raster_singleband_byte_UTM2GTIF.name,
+            str(cog),
+        ],
+        check=True,
+    )
+
+    assert can_store_as_is(inspect_raster(cog)) is False
+    metadata = get_cog_metadata(cog)
+    assert 0 < metadata["maxZoom"] <= 24
+
+
+@pytest.mark.worker
+def test_get_google_maps_compatible_grid(raster_threeband_byte_rgbsmall):
+    resolution, extent = get_google_maps_compatible_grid(
+        inspect_raster(raster_threeband_byte_rgbsmall.name)
+    )
+    # same grid as GDAL's COG driver with TILING_SCHEME=GoogleMapsCompatible (zoom 9)
+    assert resolution == pytest.approx(305.748113140705)
+    assert extent == pytest.approx(
+        (-5009377.085697312, -2661231.576776697, -4931105.568733292, -2582960.059812676)
+    )
+
+
+@pytest.mark.worker
+def test_gdal_cogify(tmp_path, raster_singleband_byte_UTM2GTIF):
+    cog = tmp_path / "UTM2GTIF.cog.tif"
+    timings = gdal_cogify(Path(raster_singleband_byte_UTM2GTIF.name), cog)
+
+    assert list(timings) == ["warp", "overviews", "translate"]
+    info = inspect_raster(cog)
+    assert can_store_as_is(info) is True
+    assert info.is_web_mercator
+    assert _is_google_maps_compatible(info)
+    # intermediate (warped) files are removed
+    assert [p.name for p in tmp_path.iterdir()] == ["UTM2GTIF.cog.tif"]
+
+
+@pytest.mark.worker
+def test_get_resampling(raster_threeband_byte_rgbsmall, raster_singleband_int16_m30dem):
+    assert (
+        get_resampling(inspect_raster(raster_threeband_byte_rgbsmall.name)) == "cubic"
+    )
+    assert (
+        get_resampling(inspect_raster(raster_singleband_int16_m30dem.name)) == "nearest"
+    )
+
+
+@pytest.mark.worker
+def test_gdal_cogify_singleband_integer(tmp_path, raster_singleband_int16_m30dem):
+    src = Path(raster_singleband_int16_m30dem.name)
+    cog = tmp_path / "m30dem.cog.tif"
+    gdal_cogify(src, cog)
+
+    with rasterio.open(src) as src_dataset, rasterio.open(cog) as cog_dataset:
+        src_values = set(numpy.unique(src_dataset.read(1)))
+        cog_values = set(numpy.unique(cog_dataset.read(1, masked=True).compressed()))
+        overview_values = set(
+            numpy.unique(
+                cog_dataset.read(
+                    1, out_shape=(cog_dataset.height // 4, cog_dataset.width // 4)
+                )
+            )
+        )
+    # no new (interpolated) values; outside of the source is filled with 0 (or nodata)
+    assert cog_values - {0} <= src_values
+    assert overview_values - {0, cog_dataset.nodata} <= src_values
+
+
+@pytest.mark.worker
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "raster_fixture",
+    [
+        "raster_singleband_int16_m30dem",
+        "raster_singleband_byte_UTM2GTIF",
+        "raster_threeband_byte_rgbsmall",
+        "raster_threeband_byte_orthodrone_center100",
+    ],
+)
+def test_gdal_cogify_timings(tmp_path, request, raster_fixture):
+    """Benchmark of the COG conversion steps (timings are logged)"""
+    src = Path(request.getfixturevalue(raster_fixture).name)
+    for num_threads in (1, 4):
+        timings = gdal_cogify(
+            src, tmp_path / f"{num_threads}.cog.tif", num_threads=num_threads
+        )
+        logger.info(
+            f"{src.name} ({num_threads} threads): "
+            + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items())
+        )
+
+
+@pytest.mark.worker
+@patch("geoapi.tasks.raster.gdal_cogify")
+@patch("geoapi.tasks.raster.TapisUtils")
+def test_import_tile_server_existing_cog_is_not_converted(
+    MockTapisUtils,
+    mock_gdal_cogify,
+    tmp_path,
+    user1,
+    projects_fixture,
+    task_fixture,
+    raster_singleband_int16_m30dem,
+    db_session,
+):
+    cog = tmp_path / "m30dem.cog.tif"
+    gdal_cogify(Path(raster_singleband_int16_m30dem.name), cog)
+
+    def get_file_to_path(system_id, path, destination_path, **kwargs):
+        shutil.copyfile(cog, destination_path)
+
+    MockTapisUtils().get_file_to_path.side_effect = get_file_to_path
+
+    tapis_file = {"system": "testSystem", "path": "/testPath/raster.cog.tif"}
+    import_tile_servers_from_tapis(
+        user_id=user1.id,
+        tapis_file=tapis_file,
+        project_id=projects_fixture.id,
+        task_id=task_fixture.id,
+    )
+
+    mock_gdal_cogify.assert_not_called()
+    db_session.refresh(task_fixture)
+    assert task_fixture.status == TaskStatus.COMPLETED
+    tile_server = db_session.query(TileServer).first()
+    assert Path(tile_server.url).read_bytes() == cog.read_bytes()
+    assert tile_server.tileOptions["maxZoom"] == 12
+
+
 @pytest.mark.worker
 @patch("geoapi.tasks.raster.TapisUtils")
 def test_import_tile_server_invalid_extension(
@@ -196,8 +380,8 @@ def test_import_tile_server_invalid_extension(
     assert task_fixture.status == TaskStatus.FAILED
     assert task_fixture.latest_message.startswith("Invalid file type")
 
-    # Verify TapisUtils.getFile was never called
-    MockTapisUtils().getFile.assert_not_called()
+    # Verify TapisUtils.get_file_to_path was never called
+    MockTapisUtils().get_file_to_path.assert_not_called()
 
 
 @pytest.mark.worker
@@ -210,7 +394,7 @@ def test_import_tile_server_tapis_fetch_failure(
     db_session,
 ):
     """Test handling of Tapis file fetch failures"""
-    MockTapisUtils().getFile.side_effect = TapisFileGetError("File not found")
+    MockTapisUtils().get_file_to_path.side_effect = TapisFileGetError("File not found")
 
     tapis_file = {"system": "testSystem", "path": "/testPath/raster.tif"}
 
@@ -243,7 +427,9 @@ def test_import_tile_server_gdal_failure(
     db_session,
 ):
     """Test handling of GDAL processing failures"""
-    MockTapisUtils().getFile.return_value = raster_singleband_int16_m30dem
+    MockTapisUtils().get_file_to_path.side_effect = _copy_to_destination(
+        raster_singleband_int16_m30dem
+    )
     mock_gdal_cogify.side_effect = Exception("GDAL processing failed")
 
     tapis_file = {"system": "testSystem", "path": "/testPath/raster.tif"}
@@ -279,7 +465,9 @@ def test_import_tile_server_metadata_failure_cleanup(
     db_session,
 ):
     """Test that assets are cleaned up when metadata extraction fails"""
-    MockTapisUtils().getFile.return_value = raster_singleband_int16_m30dem
+    MockTapisUtils().get_file_to_path.side_effect = _copy_to_destination(
+        raster_singleband_int16_m30dem
+    )
     mock_get_cog_metadata.side_effect = ValueError("Invalid projection")
 
     tapis_file = {"system": "testSystem", "path": "/testPath/raster.tif"}
@@ -311,10 +499,10 @@ def test_import_tile_server_temp_file_cleanup(
     raster_singleband_int16_m30dem,
     db_session,
 ):
-    """Test that temporary files are cleaned up after processing"""
-    mock_temp_file = MagicMock()
-    mock_temp_file.name = raster_singleband_int16_m30dem.name
-    MockTapisUtils().getFile.return_value = mock_temp_file
+    """Test that downloaded files are cleaned up after processing"""
+    MockTapisUtils().get_file_to_path.side_effect = _copy_to_destination(
+        raster_singleband_int16_m30dem
+    )
 
     tapis_file = {"system": "testSystem", "path": "/testPath/raster.tif"}
 
@@ -325,5 +513,250 @@ def test_import_tile_server_temp_file_cleanup(
         task_id=task_fixture.id,
     )
 
-    # Verify temp file was closed
-    mock_temp_file.close.assert_called_once()
+    # Verify only the COG remains (i.e. downloaded file was removed)
+    tile_server = db_session.query(TileServer).first()
+    assert [
+        p.name for p in Path(get_project_asset_dir(projects_fixture.id)).iterdir()
+    ] == [Path(tile_server.url).name]
+
+
+def test_get_tiles_in_bounds():
+    world = [[-85.05, -180], [85.05, 180]]
+    assert get_tiles_in_bounds(world, 0) == [(0, 0)]
+    assert len(get_tiles_in_bounds(world, 2)) == 16
+
+    # Austin, TX
+    bounds = [[30.2, -97.8], [30.3, -97.7]]
+    assert get_tiles_in_bounds(bounds, 0) == [(0, 0)]
+    assert get_tiles_in_bounds(bounds, 10) == [(233, 421), (234, 421)]
+
+
+def test_preseed_tiles(tmp_path, monkeypatch, requests_mock):
+    monkeypatch.setattr(settings, "TILE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "TILE_PRESEED_MAX_ZOOM", 8)
+    monkeypatch.setattr(settings, "TILE_PRESEED_MAX_TILES", 10)
+    titiler = requests_mock.get(
+        re.compile(f"{settings.TITILER_URL}/cog/tiles/WebMercatorQuad/"),
+        content=b"png",
+    )
+    ts = TileServer(
+        project_id=1,
+        uuid="5d8b5fa4-8b6c-4b0e-a8a0-5c2bd2b0e1c4",
+        url="/assets/1/5d8b5fa4-8b6c-4b0e-a8a0-5c2bd2b0e1c4.cog.tif",
+        tileOptions={
+            "minZoom": 0,
+            "maxZoom": 12,
+            "bounds": [[30.2, -97.8], [30.4, -97.6]],
+        },
+        uiOptions={"renderOptions": {"colormap_name": "terrain"}},
+    )
+
+    # zoom 0-8 has 1 tile per zoom level (9 tiles); zoom 9 would exceed the max tiles
+    assert preseed_tiles(ts) == 9
+    assert titiler.call_count == 9
+    assert all(
+        request.qs["colormap_name"] == ["terrain"]
+        for request in titiler.request_history
+    )
+    assert len(list(tmp_path.glob("1/*/*/*/*/*.png"))) == 9
+
+
+@pytest.mark.worker
+@patch("geoapi.tasks.raster.preseed_tiles")
+@patch("geoapi.tasks.raster.TapisUtils")
+def test_import_tile_server_preseeds_tiles(
+    MockTapisUtils,
+    mock_preseed_tiles,
+    monkeypatch,
+    user1,
+    projects_fixture,
+    task_fixture,
+    raster_singleband_int16_m30dem,
+    db_session,
+):
+    monkeypatch.setattr(settings, "TILE_PRESEED_MAX_ZOOM", 8)
+    mock_preseed_tiles.side_effect = Exception("TiTiler unavailable")
+    MockTapisUtils().get_file_to_path.side_effect = _copy_to_destination(
+        raster_singleband_int16_m30dem
+    )
+
+    import_tile_servers_from_tapis(
+        user_id=user1.id,
+        tapis_file={"system": "testSystem", "path": "/testPath/raster.tif"},
+        project_id=projects_fixture.id,
+        task_id=task_fixture.id,
+    )
+
+    tile_server = db_session.query(TileServer).first()
+    mock_preseed_tiles.assert_called_once()
+    assert mock_preseed_tiles.call_args.args[0].id == tile_server.id
+    # failing to pre-render tiles does not fail the import
+    db_session.refresh(task_fixture)
+    assert task_fixture.status == TaskStatus.COMPLETED
+    assert Path(tile_server.url).exists()
+
+
+def _add_cog_tile_server(db_session, project_id, src, name, srcwin, as_is=False):
+    """
+    Add an internal tile server of a COG of a window (xoff, yoff, xsize, ysize) of src
+
+    :param as_is: keep the projection of src (i.e. a COG not converted by geoapi) instead
+    of converting to EPSG:3857
+    """
+    asset_dir = Path(get_project_asset_dir(project_id))
+    asset_dir.mkdir(parents=True, exist_ok=True)
+    window_path = asset_dir / f"{name}.window.tif"
+    cog_path = asset_dir / f"{name}.cog.tif"
+    subprocess.run(
+        ["gdal_translate", "-srcwin", *map(str, srcwin), src, str(window_path)],
+        check=True,
+    )
+    if as_is:
+        subprocess.run(
+            ["gdal_translate", "-of", "COG", str(window_path), str(cog_path)],
+            check=True,
+        )
+    else:
+        gdal_cogify(window_path, cog_path)
+    window_path.unlink()
+    tile_options = get_cog_metadata(cog_path)
+    ts = TileServer(
+        project_id=project_id,
+        name=name,
+        type="xyz",
+        kind="cog",
+        internal=True,
+        url=str(cog_path),
+        tileOptions=tile_options,
+        uiOptions={"renderOptions": tile_options.pop("renderOptions")},
+    )
+    db_session.add(ts)
+    db_session.commit()
+    return ts
+
+
+@pytest.mark.worker
+def test_create_mosaic_tile_server(
+    user1, projects_fixture, task_fixture, raster_threeband_byte_rgbsmall, db_session
+):
+    info = inspect_raster(raster_threeband_byte_rgbsmall.name)
+    half = info.width // 2
+    west_half = _add_cog_tile_server(
+        db_session,
+        projects_fixture.id,
+        raster_threeband_byte_rgbsmall.name,
+        "west",
+        (0, 0, half, info.height),
+    )
+    east_half = _add_cog_tile_server(
+        db_session,
+        projects_fixture.id,
+        raster_threeband_byte_rgbsmall.name,
+        "east",
+        (half, 0, info.width - half, info.height),
+    )
+
+    create_mosaic_tile_server(
+        user_id=user1.id,
+        project_id=projects_fixture.id,
+        task_id=task_fixture.id,
+        name="mosaic",
+        member_ids=[west_half.id, east_half.id],
+    )
+
+    db_session.refresh(task_fixture)
+    assert task_fixture.status == TaskStatus.COMPLETED
+    mosaic = db_session.query(TileServer).filter_by(kind="mosaic").one()
+    assert mosaic.internal
+    assert mosaic.url.endswith(".mosaic.vrt")
+    mosaic_info = inspect_raster(mosaic.url)
+    assert mosaic_info.band_count == 3
+    # the mosaic covers both halves
+    (south, west), (north, east) = mosaic.tileOptions["bounds"]
+    assert west == pytest.approx(west_half.tileOptions["bounds"][0][1])
+    assert east == pytest.approx(east_half.tileOptions["bounds"][1][1])
+    members = db_session.query(TileServerMosaicMember).filter_by(mosaic_id=mosaic.id)
+    assert sorted(member.member_id for member in members) == [
+        west_half.id,
+        east_half.id,
+    ]
+
+
+@pytest.mark.worker
+def test_create_mosaic_tile_server_different_projections(
+    user1, projects_fixture, task_fixture, raster_threeband_byte_rgbsmall, db_session
+):
+    info = inspect_raster(raster_threeband_byte_rgbsmall.name)
+    half = info.width // 2
+    west_half = _add_cog_tile_server(
+        db_session,
+        projects_fixture.id,
+        raster_threeband_byte_rgbsmall.name,
+        "west",
+        (0, 0, half, info.height),
+    )
+    # stored as-is in EPSG:4326
+    east_half = _add_cog_tile_server(
+        db_session,
+        projects_fixture.id,
+        raster_threeband_byte_rgbsmall.name,
+        "east",
+        (half, 0, info.width - half, info.height),
+        as_is=True,
+    )
+    assert inspect_raster(east_half.url).epsg == 4326
+
+    create_mosaic_tile_server(
+        user_id=user1.id,
+        project_id=projects_fixture.id,
+        task_id=task_fixture.id,
+        name="mosaic",
+        member_ids=[west_half.id, east_half.id],
+    )
+
+    db_session.refresh(task_fixture)
+    assert task_fixture.status == TaskStatus.COMPLETED
+    mosaic = db_session.query(TileServer).filter_by(kind="mosaic").one()
+    mosaic_info = inspect_raster(mosaic.url)
+    assert mosaic_info.is_web_mercator
+    (south, west), (north, east) = mosaic.tileOptions["bounds"]
+    assert east == pytest.approx(east_half.tileOptions["bounds"][1][1], abs=1e-3)
+
+
+@pytest.mark.worker
+def test_create_mosaic_tile_server_different_bands(
+    user1,
+    projects_fixture,
+    task_fixture,
+    raster_threeband_byte_rgbsmall,
+    raster_singleband_int16_m30dem,
+    db_session,
+):
+    rgb = _add_cog_tile_server(
+        db_session,
+        projects_fixture.id,
+        raster_threeband_byte_rgbsmall.name,
+        "rgb",
+        (0, 0, 10, 10),
+    )
+    dem = _add_cog_tile_server(
+        db_session,
+        projects_fixture.id,
+        raster_singleband_int16_m30dem.name,
+        "dem",
+        (0, 0, 10, 10),
+    )
+
+    create_mosaic_tile_server(
+        user_id=user1.id,
+        project_id=projects_fixture.id,
+        task_id=task_fixture.id,
+        name="mosaic",
+        member_ids=[rgb.id, dem.id],
+    )
+
+    db_session.refresh(task_fixture)
+    assert task_fixture.status == TaskStatus.FAILED
+    assert "Unable to mosaic" in task_fixture.latest_message
+    assert db_session.query(TileServer).filter_by(kind="mosaic").count() == 0
+    assert not list(Path(get_project_asset_dir(projects_fixture.id)).glob("*.vrt"))
@@ -5,8 +5,9 @@ from geoapi.utils.streetview import (
     remove_project_streetview_dir,
 )
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import os
+import shutil
 import pytest
 import uuid
 
@@ -14,8 +15,8 @@ import uuid
 @pytest.fixture(scope="function")
 def tapis_utils_with_image_file(image_file_fixture):
     with patch("geoapi.tasks.streetview.TapisUtils.listing") as mock_listing, patch(
-        "geoapi.tasks.streetview.TapisUtils.get_file_context_manager"
-    ) as mock_get_file_context_manager:
+        "geoapi.tasks.streetview.TapisUtils.get_file_to_path"
+    ) as mock_get_file_to_path:
         filesListing = [
             TapisFileListing(
                 {
@@ -33,9 +34,11 @@ def tapis_utils_with_image_file(image_file_fixture):
             ),
         ]
         mock_listing.return_value = filesListing
-        mock_file_context_manager = MagicMock()
-        mock_get_file_context_manager.return_value = mock_file_context_manager
-        mock_file_context_manager.__enter__.return_value = image_file_fixture
+        mock_get_file_to_path.side_effect = (
+            lambda system_id, path, destination_path: shutil.copyfile(
+                image_file_fixture.name, destination_path
+            )
+        )
         yield
 
 
@@ -1,8 +1,16 @@
 import pytest
 import os
 import tempfile
+import requests
 from unittest.mock import patch
-from geoapi.utils.external_apis import TapisUtils, TapisFileGetError
+from geoapi.settings import settings
+from geoapi.utils.external_apis import (
+    TapisUtils,
+    TapisFileGetError,
+    DownloadSegment,
+    split_into_segments,
+    files_exist,
+)
 
 
 @pytest.fixture(scope="function")
@@ -84,3 +92,156 @@ def test_get_file_retry_too_many_attempts(
     tapis_utils = TapisUtils(db_session, user1)
     with pytest.raises(TapisFileGetError):
         tapis_utils.getFile(system, path)
+
+
+def test_get_file_retry_after_connection_error(
+    user1, tapis_url, requests_mock, retry_sleep_seconds_mock, db_session
+):
+    system = "system"
+    path = "path"
+    responses = [
+        {"exc": requests.exceptions.ConnectionError},
+        {"status_code": 200, "content": b"some content"},
+    ]
+    requests_mock.get(tapis_url + f"/v3/files/content/{system}/{path}", responses)
+    tapis_utils = TapisUtils(db_session, user1)
+    tmp_file = tapis_utils.getFile(system, path)
+    assert tmp_file.read() == b"some content"
+
+
+def test_split_into_segments():
+    segments = split_into_segments(10, 4)
+    assert [(s.start, s.end) for s in segments] == [(0, 2), (3, 5), (6, 8), (9, 9)]
+
+
+def test_get_file_parallel_segments(
+    user1, tapis_url, requests_mock, retry_sleep_seconds_mock, db_session
+):
+    system = "system"
+    path = "path"
+    content = bytes(range(256)) * 100
+
+    requests_mock.get(
+        tapis_url + f"/v3/files/ops/{system}/{path}",
+        json={
+            "result": [
+                {
+                    "type": "file",
+                    "path": path,
+                    "lastModified": "2020-08-31T12:00:00Z",
+                    "size": len(content),
+                }
+            ]
+        },
+    )
+
+    def ranged_content(request, context):
+        start, end = request.headers["Range"].replace("bytes=", "").split("-")
+        context.status_code = 206
+        return content[int(start) : int(end) + 1]
+
+    requests_mock.get(
+        tapis_url + f"/v3/files/content/{system}/{path}", content=ranged_content
+    )
+
+    with patch.object(settings, "TAPIS_DOWNLOAD_PARALLEL_MIN_SIZE", 1):
+        tapis_utils = TapisUtils(db_session, user1)
+        tmp_file = tapis_utils.getFile(system, path, parallel_segments=True)
+
+    assert tmp_file.read() == content
+    content_requests = [
+        r for r in requests_mock.request_history if "/files/content/" in r.url
+    ]
+    assert len(content_requests) == settings.TAPIS_DOWNLOAD_PARALLEL_SEGMENTS
+
+
+def test_get_file_segment_already_complete(user1, requests_mock, db_session):
+    # e.g. connection dropped after the last chunk of the segment was written
+    segment = DownloadSegment(start=0, end=9, written=10)
+    tapis_utils = TapisUtils(db_session, user1)
+    with tempfile.TemporaryFile() as f:
+        tapis_utils._get_file("system", "path", f.fileno(), segment)
+    assert requests_mock.request_history == []
+
+
+def test_get_file_segment_range_not_satisfiable(
+    user1, tapis_url, requests_mock, db_session
+):
+    requests_mock.get(tapis_url + "/v3/files/content/system/path", status_code=416)
+    segment = DownloadSegment(start=10, end=19, written=5)
+    tapis_utils = TapisUtils(db_session, user1)
+    with tempfile.TemporaryFile() as f:
+        tapis_utils._get_file("system", "path", f.fileno(), segment)
+    assert segment.written == 5
+
+
+def test_get_file_parallel_segments_range_not_supported(
+    user1, tapis_url, requests_mock, retry_sleep_seconds_mock, db_session
+):
+    system = "system"
+    path = "path"
+    content = b"some content"
+    requests_mock.get(
+        tapis_url + f"/v3/files/ops/{system}/{path}",
+        json={
+            "result": [
+                {
+                    "type": "file",
+                    "path": path,
+                    "lastModified": "2020-08-31T12:00:00Z",
+                    "size": len(content),
+                }
+            ]
+        },
+    )
+    requests_mock.get(
+        tapis_url + f"/v3/files/content/{system}/{path}",
+        status_code=200,
+        content=content,
+    )
+
+    with patch.object(settings, "TAPIS_DOWNLOAD_PARALLEL_MIN_SIZE", 1):
+        tapis_utils = TapisUtils(db_session, user1)
+        tmp_file = tapis_utils.getFile(system, path, parallel_segments=True)
+
+    assert tmp_file.read() == content
+
+
+def test_get_file_to_path_failure_leaves_no_file(
+    user1, tapis_url, requests_mock, retry_sleep_seconds_mock, db_session
+):
+    system = "system"
+    path = "path"
+    requests_mock.get(tapis_url + f"/v3/files/content/{system}/{path}", status_code=404)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        to_path = os.path.join(temp_dir, "test.jpg")
+
+        tapis_utils = TapisUtils(db_session, user1)
+        with pytest.raises(TapisFileGetError):
+            tapis_utils.get_file_to_path(system, path, to_path)
+        assert os.listdir(temp_dir) == []
+
+
+def test_files_exist(user1, tapis_url, requests_mock, db_session):
+    system = "system"
+    requests_mock.get(
+        tapis_url + f"/v3/files/ops/{system}/found.jpg",
+        json={
+            "result": [
+                {
+                    "type": "file",
+                    "path": "found.jpg",
+                    "lastModified": "2020-08-31T12:00:00Z",
+                }
+            ]
+        },
+    )
+    requests_mock.get(
+        tapis_url + f"/v3/files/ops/{system}/missing.jpg", status_code=404
+    )
+
+    tapis_utils = TapisUtils(db_session, user1)
+    assert files_exist(
+        tapis_utils, [(system, "found.jpg"), (system, "missing.jpg")]
+    ) == {(system, "found.jpg"): True, (system, "missing.jpg"): False}
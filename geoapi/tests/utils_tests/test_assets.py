@@ -0,0 +1,41 @@
+import time
+import base64
+import hashlib
+
+import pytest
+from unittest.mock import patch
+
+from geoapi.settings import settings
+from geoapi.utils.assets import get_signed_assets_url
+
+
+def test_get_signed_assets_url():
+    url, expires = get_signed_assets_url(3)
+    assert expires >= time.time() + settings.ASSET_URL_TTL
+    token = url.split("/")[3]
+    assert url == f"/assets/signed/{token}/{expires}/"
+
+    # token as computed by nginx's secure_link_md5
+    expression = f"{expires}/assets/3/ {settings.ASSET_URL_SECRET}"
+    expected = base64.urlsafe_b64encode(hashlib.md5(expression.encode()).digest())
+    assert token == expected.decode().rstrip("=")
+
+
+def test_get_signed_assets_url_scoped_to_project():
+    url, _ = get_signed_assets_url(3)
+    other_url, _ = get_signed_assets_url(4)
+    assert url != other_url
+
+
+def test_get_signed_assets_url_stable():
+    # same url (until the expiry step) so that browsers can use their cached assets
+    with patch("time.time", return_value=1_000_000_000):
+        url, _ = get_signed_assets_url(3)
+    with patch("time.time", return_value=1_000_000_000 + 60):
+        assert get_signed_assets_url(3)[0] == url
+
+
+def test_get_signed_assets_url_not_configured(monkeypatch):
+    monkeypatch.setattr(settings, "ASSET_URL_SECRET", None)
+    with pytest.raises(ValueError):
+        get_signed_assets_url(3)
@@ -1,4 +1,9 @@
-from geoapi.utils.geo_location import get_geolocation_from_file_metadata, GeoLocation
+from geoapi.utils.geo_location import (
+    get_geolocation_from_file_metadata,
+    GeoLocation,
+    FileMetadataResolver,
+)
+from geoapi.utils.external_apis import TapisFileListing
 
 import re
 
@@ -39,3 +44,55 @@ def test_metadata_with_geolocation(
     assert get_geolocation_from_file_metadata(
         db_session, user1, system_id=SYSTEM, path=PATH
     ) == GeoLocation(longitude=-122.30701480072206, latitude=47.65349416532335)
+
+
+def _listing(path):
+    return TapisFileListing(
+        {"type": "file", "path": path, "lastModified": "2020-08-31T12:00:00Z"}
+    )
+
+
+def test_metadata_resolver_only_gets_metadata_for_files_needing_it(
+    requests_mock, user1, tapis_metadata_with_geolocation, db_session
+):
+    requests_mock.get(METADATA_ROUTE, json=tapis_metadata_with_geolocation)
+    resolver = FileMetadataResolver(db_session, user1, SYSTEM)
+
+    image = _listing("/foo/image.jpg")
+    rapp_video = _listing("/foo/RApp/video.mp4")
+    geojson = _listing("/foo/file.geojson")
+    resolver.prefetch([image, rapp_video, geojson])
+
+    # only the image and the RApp video need metadata
+    assert requests_mock.call_count == 2
+    assert not any(
+        r.path.endswith("file.geojson") for r in requests_mock.request_history
+    )
+
+    expected = GeoLocation(longitude=-122.30701480072206, latitude=47.65349416532335)
+    assert resolver.get_geolocation(image) == expected
+    assert resolver.get_geolocation(geojson) is None
+    assert resolver.get_metadata(rapp_video) == tapis_metadata_with_geolocation["value"]
+    # everything was already cached
+    assert requests_mock.call_count == 2
+
+
+def test_metadata_resolver_gets_metadata_again_if_file_modified(
+    requests_mock, user1, tapis_metadata_with_geolocation, db_session
+):
+    requests_mock.get(METADATA_ROUTE, json=tapis_metadata_with_geolocation)
+    resolver = FileMetadataResolver(db_session, user1, SYSTEM)
+
+    resolver.get_metadata(_listing("/foo/image.jpg"))
+    resolver.get_metadata(_listing("/foo/image.jpg"))
+    assert requests_mock.call_count == 1
+
+    modified = TapisFileListing(
+        {
+            "type": "file",
+            "path": "/foo/image.jpg",
+            "lastModified": "2021-08-31T12:00:00Z",
+        }
+    )
+    resolver.get_metadata(modified)
+    assert requests_mock.call_count == 2
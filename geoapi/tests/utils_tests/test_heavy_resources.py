@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import patch
+
+from geoapi.settings import settings
+from geoapi.utils.heavy_resources import (
+    GIB,
+    HeavyResourcesUnavailable,
+    ResourceRequest,
+    estimate_point_cloud_resources,
+    estimate_raster_resources,
+    get_max_points_per_conversion,
+    MIN_POINTS_PER_CONVERSION,
+    reserve_heavy_resources,
+    _reservations_key,
+    _try_to_reserve,
+)
+from geoapi.utils.redis_utils import get_redis_client
+
+
+@pytest.fixture(scope="function")
+def host_capacity():
+    get_redis_client().delete(_reservations_key())
+    with patch.object(settings, "HEAVY_RESOURCES_MEMORY", 10 * GIB), patch.object(
+        settings, "HEAVY_RESOURCES_CPUS", 8
+    ):
+        yield ResourceRequest(memory=10 * GIB, cpus=8)
+    get_redis_client().delete(_reservations_key())
+
+
+def test_estimate_raster_resources(host_capacity):
+    small = estimate_raster_resources(1000, 1000, 3, 1)
+    large = estimate_raster_resources(100000, 100000, 1, 4)
+    assert small.memory < large.memory
+    assert small.cpus == settings.HEAVY_TASK_CPUS
+
+
+@pytest.mark.worker
+def test_estimate_point_cloud_resources(host_capacity, lidar_las1pt2_file_path_fixture):
+    one_file = estimate_point_cloud_resources([lidar_las1pt2_file_path_fixture])
+    two_files = estimate_point_cloud_resources([lidar_las1pt2_file_path_fixture] * 2)
+    assert one_file.memory < two_files.memory
+
+
+def test_get_max_points_per_conversion(host_capacity):
+    max_points = get_max_points_per_conversion()
+    assert max_points > MIN_POINTS_PER_CONVERSION
+    with patch.object(settings, "POINT_CLOUD_TILE_CONCURRENCY", 2):
+        assert get_max_points_per_conversion() < max_points
+    with patch.object(settings, "POINT_CLOUD_TILE_MAX_POINTS", 1234):
+        assert get_max_points_per_conversion() == 1234
+
+
+def test_reserve_heavy_resources_holds_reservation(host_capacity):
+    request = ResourceRequest(memory=6 * GIB, cpus=4)
+    with reserve_heavy_resources("first", request):
+        # does not fit while "first" holds its reservation
+        assert not _try_to_reserve("second", request, host_capacity)
+    assert _try_to_reserve("second", request, host_capacity)
+
+
+def test_reserve_heavy_resources_admits_large_request_when_idle(host_capacity):
+    request = ResourceRequest(memory=20 * GIB, cpus=4)
+    with reserve_heavy_resources("large", request):
+        pass
+
+
+def test_reserve_heavy_resources_raises_when_unavailable(host_capacity):
+    assert _try_to_reserve("other", ResourceRequest(8 * GIB, 4), host_capacity)
+
+    with pytest.raises(HeavyResourcesUnavailable, match="Waiting for resources"):
+        with reserve_heavy_resources("waiting", ResourceRequest(4 * GIB, 4)):
+            pass
+
+    get_redis_client().hdel(_reservations_key(), "other")
+    with reserve_heavy_resources("waiting", ResourceRequest(4 * GIB, 4)):
+        pass
@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import patch
 from geoapi.utils.point_cloud import getProj4, get_bounding_box_2d
 from geoapi.exceptions import InvalidCoordinateReferenceSystem
 from shapely.geometry import Polygon
@@ -68,3 +69,19 @@ def test_get_bounding_box_medium_size_compressed_laz(
         ]
     )
     assert bounding_box.equals_exact(expected, tolerance=1e-3)
+
+
+@pytest.mark.worker
+def test_get_bounding_box_reads_only_header(
+    lidar_las1pt2_file_path_fixture, lidar_las1pt4_file_path_fixture
+):
+    with patch("geoapi.utils.point_cloud.laspy.read") as mock_read, patch(
+        "geoapi.utils.point_cloud.getProj4"
+    ) as mock_get_proj4:
+        bounding_box = get_bounding_box_2d(
+            [lidar_las1pt2_file_path_fixture, lidar_las1pt4_file_path_fixture]
+        )
+    mock_read.assert_not_called()
+    # crs of these files is parsed from their VLRs (i.e. no pdal)
+    mock_get_proj4.assert_not_called()
+    assert bounding_box.is_valid and not bounding_box.is_empty
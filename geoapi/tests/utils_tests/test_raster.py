@@ -0,0 +1,160 @@
+import pytest
+import rasterio
+import rasterio.shutil
+from rasterio.errors import RasterioIOError
+from rasterio.warp import transform
+from unittest.mock import patch
+
+from geoapi.settings import settings
+from geoapi.utils.raster import (
+    block_cache,
+    get_raster_statistics,
+    inspect_raster,
+    sample_raster,
+)
+
+
+@pytest.mark.worker
+def test_inspect_raster_rgb(raster_threeband_byte_rgbsmall):
+    info = inspect_raster(raster_threeband_byte_rgbsmall.name)
+    assert info.dtype == "uint8"
+    assert info.band_count == 3
+    assert info.bytes_per_sample == 1
+    assert info.epsg == 4326
+    assert info.is_georeferenced
+    assert not info.is_web_mercator
+    west, south, east, north = info.wgs84_bounds
+    assert west == pytest.approx(-44.84032)
+    assert north == pytest.approx(-22.932584)
+    assert info.overviews == []
+    assert info.layout is None
+
+
+@pytest.mark.worker
+def test_inspect_raster_int16(raster_singleband_int16_m30dem):
+    info = inspect_raster(raster_singleband_int16_m30dem.name)
+    assert info.dtype == "int16"
+    assert info.band_count == 1
+    assert info.bytes_per_sample == 2
+
+
+@pytest.mark.worker
+def test_inspect_raster_cog(tmp_path, raster_threeband_byte_rgbsmall):
+    cog = tmp_path / "rgbsmall.cog.tif"
+    rasterio.shutil.copy(
+        raster_threeband_byte_rgbsmall.name,
+        cog,
+        driver="COG",
+        TILING_SCHEME="GoogleMapsCompatible",
+    )
+    info = inspect_raster(cog)
+    assert info.layout == "COG"
+    assert info.tiling_scheme.lower() == "googlemapscompatible"
+    assert info.is_web_mercator
+    assert info.block_size == (256, 256)
+
+
+def test_inspect_raster_not_a_raster(tmp_path):
+    path = tmp_path / "not_a_raster.tif"
+    path.write_text("not a raster")
+    with pytest.raises(RasterioIOError):
+        inspect_raster(path)
+
+
+@pytest.fixture
+def dem_cog(tmp_path, raster_singleband_int16_m30dem):
+    cog = tmp_path / "dem.cog.tif"
+    rasterio.shutil.copy(
+        raster_singleband_int16_m30dem.name,
+        cog,
+        driver="COG",
+        BLOCKSIZE=256,
+        OVERVIEW_COUNT=2,
+    )
+    block_cache.clear()
+    yield cog
+    block_cache.clear()
+
+
+def _get_center(path):
+    info = inspect_raster(path)
+    west, south, east, north = info.wgs84_bounds
+    return (west + east) / 2, (south + north) / 2
+
+
+@pytest.mark.worker
+def test_sample_raster(dem_cog):
+    lon, lat = _get_center(dem_cog)
+    with rasterio.open(dem_cog) as src:
+        (x,), (y,) = transform("EPSG:4326", src.crs, [lon], [lat])
+        [expected] = next(src.sample([(x, y)]))
+
+    assert sample_raster(dem_cog, lon, lat) == [expected.item()]
+
+    # the block is read once and then taken from the block cache
+    with patch("rasterio.io.DatasetReader.read") as read:
+        assert sample_raster(dem_cog, lon, lat) == [expected.item()]
+    read.assert_not_called()
+
+
+@pytest.mark.worker
+def test_sample_raster_outside(dem_cog):
+    assert sample_raster(dem_cog, 0, 0) == [None]
+
+
+def _get_box(path, fraction):
+    """GeoJSON polygon of the center `fraction` of a raster's extent"""
+    info = inspect_raster(path)
+    west, south, east, north = info.wgs84_bounds
+    dx = (east - west) * (1 - fraction) / 2
+    dy = (north - south) * (1 - fraction) / 2
+    west, south, east, north = west + dx, south + dy, east - dx, north - dy
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[west, south], [east, south], [east, north], [west, north], [west, south]]
+        ],
+    }
+
+
+@pytest.mark.worker
+def test_get_raster_statistics(dem_cog):
+    statistics = get_raster_statistics(dem_cog, _get_box(dem_cog, 0.5))
+    assert statistics.overview_level is None
+    [band] = statistics.bands
+    assert band.count > 0
+    assert band.min <= band.mean <= band.max
+
+
+@pytest.mark.worker
+def test_get_raster_statistics_reads_overview(monkeypatch, dem_cog):
+    polygon = _get_box(dem_cog, 0.5)
+    full_resolution = get_raster_statistics(dem_cog, polygon)
+    monkeypatch.setattr(
+        settings,
+        "RASTER_STATISTICS_MAX_PIXELS",
+        full_resolution.bands[0].count // 2,
+    )
+
+    statistics = get_raster_statistics(dem_cog, polygon)
+    assert statistics.overview_level == 0
+    [band] = statistics.bands
+    assert band.count < full_resolution.bands[0].count
+    assert band.mean == pytest.approx(full_resolution.bands[0].mean, rel=0.05)
+
+
+@pytest.mark.worker
+def test_get_raster_statistics_too_large(dem_cog):
+    with pytest.raises(ValueError):
+        get_raster_statistics(dem_cog, _get_box(dem_cog, 1), max_pixels=1)
+
+
+@pytest.mark.worker
+def test_get_raster_statistics_outside(dem_cog):
+    polygon = {
+        "type": "Polygon",
+        "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+    }
+    statistics = get_raster_statistics(dem_cog, polygon)
+    assert statistics.bands[0].count == 0
+    assert statistics.bands[0].mean is None
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from geoapi.utils.redis_utils import (
+    RedisCache,
+    concurrency_slot,
+    get_redis_client,
+    non_blocking_lock,
+)
+
+
+@pytest.fixture(scope="function")
+def cache():
+    cache = RedisCache("test", ttl=60, max_entries=2)
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_cache_get_set(cache):
+    assert cache.get("a") is None
+    cache.set("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_cache_invalidate(cache):
+    cache.set("a", {"value": 1})
+    cache.invalidate("a")
+    assert cache.get("a") is None
+
+
+def test_cache_invalidate_generation(cache):
+    assert cache.get_generation("1") == 0
+    cache.invalidate_generation("1")
+    assert cache.get_generation("1") == 1
+    assert cache.get_generation("2") == 0
+
+
+def test_cache_evicts_least_recently_used(cache):
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # use "a" so that "b" is the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_non_blocking_lock():
+    with non_blocking_lock("test_lock", timeout=10) as acquired:
+        assert acquired
+        with non_blocking_lock("test_lock", timeout=10) as acquired_again:
+            assert not acquired_again
+    with non_blocking_lock("test_lock", timeout=10) as acquired:
+        assert acquired
+
+
+def test_concurrency_slot():
+    with concurrency_slot("test_slot", limit=1, timeout=10) as first:
+        assert first
+        with concurrency_slot("test_slot", limit=1, timeout=10) as second:
+            assert not second
+    with concurrency_slot("test_slot", limit=1, timeout=10) as again:
+        assert again
+
+
+def test_concurrency_slot_reclaims_leaked_slot():
+    client = get_redis_client()
+    client.delete("test_slot")
+    # slot of a crashed holder whose deadline has passed
+    client.zadd("test_slot", {"crashed_worker": time.time() - 1})
+    with concurrency_slot("test_slot", limit=1, timeout=10) as acquired:
+        assert acquired
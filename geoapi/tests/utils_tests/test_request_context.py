@@ -0,0 +1,36 @@
+from geoapi.db import count_db_queries
+from geoapi.utils.request_context import RequestContext
+
+
+def test_request_context_membership(
+    user1, user2, projects_fixture, projects_fixture2, db_session
+):
+    context = RequestContext(db_session)
+    assert context.can_access(user1, projects_fixture.id)
+    assert context.is_admin_or_creator(user1, projects_fixture.id)
+    assert not context.can_access(user2, projects_fixture.id)
+    assert not context.is_admin_or_creator(user2, projects_fixture.id)
+    assert context.can_access(user2, projects_fixture2.id)
+    assert not context.is_admin_or_creator(user2, projects_fixture2.id)
+
+
+def test_request_context_loads_rows_once(user1, projects_fixture, db_session):
+    db_session.expunge_all()
+    context = RequestContext(db_session)
+
+    with count_db_queries() as get_query_count:
+        project = context.get_project(projects_fixture.id, user=user1)
+        assert project.deletable is True
+        assert context.can_access(user1, projects_fixture.id)
+        first_query_count = get_query_count()
+
+        assert context.get_project(projects_fixture.id, user=user1) is project
+        assert context.is_admin_or_creator(user1, projects_fixture.id)
+        assert get_query_count() == first_query_count
+    # project and membership
+    assert first_query_count == 2
+
+
+def test_request_context_project_by_uuid(projects_fixture, db_session):
+    context = RequestContext(db_session)
+    assert context.get_project(uuid=str(projects_fixture.uuid)) == projects_fixture
@@ -0,0 +1,95 @@
+import os
+import concurrent.futures
+import pytest
+
+from geoapi.settings import settings
+from geoapi.utils import tile_cache
+
+
+@pytest.fixture(autouse=True)
+def tile_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TILE_CACHE_DIR", str(tmp_path))
+    yield tmp_path
+
+
+def test_get_render_options_key():
+    assert tile_cache.get_render_options_key(
+        {"colormap_name": "terrain", "rescale": "0,100"}
+    ) == tile_cache.get_render_options_key(
+        {"rescale": "0,100", "colormap_name": "terrain"}
+    )
+    assert tile_cache.get_render_options_key(
+        {"colormap_name": "terrain"}
+    ) != tile_cache.get_render_options_key({"colormap_name": "viridis"})
+
+
+def _put_tile(path, content):
+    project_id, uuid = int(path.parents[4].name), path.parents[3].name
+    tile_cache.put_tile(
+        path, content, tile_cache.get_layer_generation(project_id, uuid)
+    )
+
+
+def test_put_and_get_tile():
+    path = tile_cache.get_tile_path(1, "abc", {}, 3, 2, 1, "png")
+    assert tile_cache.get_tile(path) is None
+
+    _put_tile(path, b"tile")
+    assert tile_cache.get_tile(path) == b"tile"
+    assert os.listdir(path.parent) == ["1.png"]
+
+
+def test_put_tile_concurrently():
+    # e.g. concurrent requests (threads of one process) missing the same tile
+    path = tile_cache.get_tile_path(1, "abc", {}, 3, 2, 1, "png")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: _put_tile(path, b"tile"), range(32)))
+    assert tile_cache.get_tile(path) == b"tile"
+    assert os.listdir(path.parent) == ["1.png"]
+
+
+def test_invalidate_layer():
+    path = tile_cache.get_tile_path(1, "abc", {}, 3, 2, 1, "png")
+    other_layer_path = tile_cache.get_tile_path(1, "def", {}, 3, 2, 1, "png")
+    _put_tile(path, b"tile")
+    _put_tile(other_layer_path, b"tile")
+
+    tile_cache.invalidate_layer(1, "abc")
+    assert tile_cache.get_tile(path) is None
+    assert tile_cache.get_tile(other_layer_path) == b"tile"
+
+    tile_cache.invalidate_project(1)
+    assert tile_cache.get_tile(other_layer_path) is None
+
+
+def test_put_tile_of_invalidated_layer_is_discarded():
+    path = tile_cache.get_tile_path(1, "abc", {}, 3, 2, 1, "png")
+    # tile being rendered while the layer is invalidated
+    generation = tile_cache.get_layer_generation(1, "abc")
+    tile_cache.invalidate_layer(1, "abc")
+
+    tile_cache.put_tile(path, b"stale", generation)
+    assert tile_cache.get_tile(path) is None
+    assert not path.parents[3].exists()
+
+    # even once the layer is cached again (i.e. by a request since invalidation)
+    new_generation = tile_cache.get_layer_generation(1, "abc")
+    assert new_generation != generation
+    tile_cache.put_tile(path, b"stale", generation)
+    assert tile_cache.get_tile(path) is None
+
+    tile_cache.put_tile(path, b"tile", new_generation)
+    assert tile_cache.get_tile(path) == b"tile"
+
+
+def test_prune_removes_least_recently_used_tiles():
+    paths = [tile_cache.get_tile_path(1, "abc", {}, 3, x, 1, "png") for x in range(4)]
+    for i, path in enumerate(paths):
+        _put_tile(path, b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    # first tile was used most recently
+    os.utime(paths[0], (2000, 2000))
+
+    assert tile_cache.prune(max_size=400) == 0
+    assert tile_cache.prune(max_size=300) == 2
+    assert [path.exists() for path in paths] == [True, False, False, True]
@@ -1,9 +1,18 @@
 import os
+import math
+import time
+import base64
+import hashlib
 from pathlib import Path
+from typing import Tuple
 import glob
 import shutil
 from geoapi.settings import settings
 
+# expiry of signed asset urls is rounded up to a multiple of this (seconds), so that the
+# same url (and the browser's cached assets) is used until then
+SIGNED_ASSET_URL_EXPIRY_STEP = 60 * 60
+
 
 def get_temp_dir() -> Path:
     """
@@ -74,3 +83,37 @@ def delete_assets(projectId: int, uuid: str):
             os.remove(asset_file)
         else:
             shutil.rmtree(asset_file)
+
+
+def _sign_project_assets(projectId: int, expires: int) -> str:
+    """
+    Token of a project's assets, as checked by nginx's secure_link module
+
+    i.e. base64url (no padding) of the MD5 of secure_link_md5's expression
+    "$secure_link_expires/assets/<project id>/ <secret>"
+    """
+    expression = f"{expires}/assets/{projectId}/ {settings.ASSET_URL_SECRET}"
+    digest = hashlib.md5(expression.encode()).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def get_signed_assets_url(projectId: int) -> Tuple[str, int]:
+    """
+    Get signed url of a project's assets directory
+
+    Assets of the project (i.e. "<project id>/<path>", see get_asset_relative_path) are
+    served by nginx at url + "<project id>/<path>" without checking access to the
+    project, until the url expires.
+
+    :param projectId: int
+    :return: url (relative to geoapi's host) and its expiry (unix time)
+    :raises ValueError: if ASSET_URL_SECRET is not configured
+    """
+    if not settings.ASSET_URL_SECRET:
+        raise ValueError("ASSET_URL_SECRET is not configured")
+    expires = (
+        math.ceil((time.time() + settings.ASSET_URL_TTL) / SIGNED_ASSET_URL_EXPIRY_STEP)
+        * SIGNED_ASSET_URL_EXPIRY_STEP
+    )
+    token = _sign_project_assets(projectId, expires)
+    return f"/assets/signed/{token}/{expires}/", expires
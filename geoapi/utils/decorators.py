@@ -8,13 +8,9 @@ from litestar.exceptions import (
     PermissionDeniedException,
     NotFoundException,
 )
-from geoapi.services.users import UserService
-from geoapi.services.projects import ProjectsService
-from geoapi.services.features import FeaturesService
-from geoapi.services.point_cloud import PointCloudService
 from geoapi.utils.users import is_anonymous
+from geoapi.utils.request_context import RequestContext, get_request_context
 from geoapi.log import logger
-from geoapi.db import managed_litestar_db_session
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
@@ -22,10 +18,11 @@ if TYPE_CHECKING:
 
 def check_access_and_get_project(
     current_user,
-    db_session: "Session",
+    db_session: "Session" = None,
     allow_public_use=False,
     project_id=None,
     uuid=None,
+    context: RequestContext = None,
 ):
     """
     Check if user (authenticated or anonymous) can access a project id and *aborts* if there is no access.
@@ -33,8 +30,11 @@ def check_access_and_get_project(
     :param uuid: str
     :param current_user: User
     :param allow_public_use: boolean
+    :param context: RequestContext of request (a new one for `db_session` if not given)
     :return: project: Project
     """
+    if context is None:
+        context = RequestContext(db_session)
     # Validate UUID format if uuid is provided
     if uuid is not None:
         try:
@@ -42,19 +42,40 @@ def check_access_and_get_project(
         except ValueError as exc:
             raise NotFoundException("Invalid project UUID") from exc
     proj = (
-        ProjectsService.get(db_session, user=current_user, project_id=project_id)
+        context.get_project(project_id=project_id, user=current_user)
         if project_id
-        else ProjectsService.get(db_session, user=current_user, uuid=uuid)
+        else context.get_project(uuid=uuid, user=current_user)
     )
     if not proj:
         raise NotFoundException("No project found")
-    if not allow_public_use or not proj.public:
+    check_project_access(current_user, context, proj.id, allow_public_use)
+    return proj
+
+
+def check_project_access(
+    current_user,
+    context: RequestContext,
+    project_id: int,
+    allow_public_use=False,
+) -> None:
+    """
+    Check if user (authenticated or anonymous) can access a project id and *aborts* if there is no access.
+
+    Only the (cached) access of the user to the project is needed (see UserService.get_project_acl), not the project.
+    :param current_user: User
+    :param context: RequestContext of request
+    :param project_id: int
+    :param allow_public_use: boolean
+    """
+    acl = context.get_acl(current_user, project_id)
+    if acl is None:
+        raise NotFoundException("No project found")
+    if not allow_public_use or not acl["public"]:
         if is_anonymous(current_user):
             raise NotAuthorizedException("Must be logged in to access project")
 
-        if not UserService.canAccess(db_session, current_user, proj.id):
+        if not acl["member"]:
             raise PermissionDeniedException("Access denied")
-    return proj
 
 
 def project_permissions_guard(connection: ASGIConnection, _: BaseRouteHandler) -> None:
@@ -63,17 +84,14 @@ def project_permissions_guard(connection: ASGIConnection, _: BaseRouteHandler) -
 
     This is used in the ASGI app to check permissions before processing the request.
     """
-    with managed_litestar_db_session(
-        connection.app.state, connection.scope
-    ) as db_session:
-        project_id = connection.path_params["project_id"]
+    project_id = connection.path_params["project_id"]
 
-        check_access_and_get_project(
-            connection.user,
-            db_session=db_session,
-            project_id=project_id,
-            allow_public_use=False,
-        )
+    check_project_access(
+        connection.user,
+        get_request_context(connection),
+        project_id,
+        allow_public_use=False,
+    )
 
 
 def project_permissions_allow_public_guard(
@@ -84,17 +102,14 @@ def project_permissions_allow_public_guard(
 
     This is used in the ASGI app to check permissions before processing the request.
     """
-    with managed_litestar_db_session(
-        connection.app.state, connection.scope
-    ) as db_session:
-        project_id = connection.path_params["project_id"]
+    project_id = connection.path_params["project_id"]
 
-        check_access_and_get_project(
-            connection.user,
-            db_session=db_session,
-            project_id=project_id,
-            allow_public_use=True,
-        )
+    check_project_access(
+        connection.user,
+        get_request_context(connection),
+        project_id,
+        allow_public_use=True,
+    )
 
 
 def project_admin_or_creator_permissions_guard(
@@ -105,19 +120,12 @@ def project_admin_or_creator_permissions_guard(
 
     This is used in the ASGI app to check permissions before processing the request.
     """
-    with managed_litestar_db_session(
-        connection.app.state, connection.scope
-    ) as db_session:
-        project_id = connection.path_params["project_id"]
+    context = get_request_context(connection)
+    project_id = connection.path_params["project_id"]
 
-        check_access_and_get_project(
-            connection.user,
-            db_session=db_session,
-            project_id=project_id,
-            allow_public_use=False,
-        )
-        if not UserService.is_admin_or_creator(db_session, connection.user, project_id):
-            raise PermissionDeniedException("Must be project admin or creator")
+    check_project_access(connection.user, context, project_id, allow_public_use=False)
+    if not context.is_admin_or_creator(connection.user, project_id):
+        raise PermissionDeniedException("Must be project admin or creator")
 
 
 def project_feature_exists_guard(
@@ -128,21 +136,19 @@ def project_feature_exists_guard(
 
     This is used in the ASGI app to check permissions before processing the request.
     """
-    with managed_litestar_db_session(
-        connection.app.state, connection.scope
-    ) as db_session:
-        project_id = connection.path_params["project_id"]
-        feature_id = connection.path_params["feature_id"]
+    context = get_request_context(connection)
+    project_id = connection.path_params["project_id"]
+    feature_id = connection.path_params["feature_id"]
 
-        proj = ProjectsService.get(db_session, project_id)
-        if not proj:
-            raise HTTPException(status_code=404, detail="No project found")
+    proj = context.get_project(project_id)
+    if not proj:
+        raise HTTPException(status_code=404, detail="No project found")
 
-        feature = FeaturesService.get(db_session, feature_id)
-        if not feature:
-            raise HTTPException(status_code=404, detail="No feature found!")
-        if feature.project_id != project_id:
-            raise HTTPException(status_code=404, detail="Feature not part of project")
+    feature = context.get_feature(feature_id)
+    if not feature:
+        raise HTTPException(status_code=404, detail="No feature found!")
+    if feature.project_id != project_id:
+        raise HTTPException(status_code=404, detail="Feature not part of project")
 
 
 def project_point_cloud_exists_guard(
@@ -153,23 +159,19 @@ def project_point_cloud_exists_guard(
 
     This is used in the ASGI app to check permissions before processing the request.
     """
-    with managed_litestar_db_session(
-        connection.app.state, connection.scope
-    ) as db_session:
-        project_id = connection.path_params["project_id"]
-        point_cloud_id = connection.path_params["point_cloud_id"]
+    context = get_request_context(connection)
+    project_id = connection.path_params["project_id"]
+    point_cloud_id = connection.path_params["point_cloud_id"]
 
-        proj = ProjectsService.get(db_session, project_id)
-        if not proj:
-            raise HTTPException(status_code=404, detail="No project found")
+    proj = context.get_project(project_id)
+    if not proj:
+        raise HTTPException(status_code=404, detail="No project found")
 
-        point_cloud = PointCloudService.get(db_session, point_cloud_id)
-        if not point_cloud:
-            raise HTTPException(status_code=404, detail="No point cloud found!")
-        if point_cloud.project_id != project_id:
-            raise HTTPException(
-                status_code=404, detail="Point cloud not part of project"
-            )
+    point_cloud = context.get_point_cloud(point_cloud_id)
+    if not point_cloud:
+        raise HTTPException(status_code=404, detail="No point cloud found!")
+    if point_cloud.project_id != project_id:
+        raise HTTPException(status_code=404, detail="Point cloud not part of project")
 
 
 def project_point_cloud_not_processing_guard(
@@ -180,21 +182,18 @@ def project_point_cloud_not_processing_guard(
 
     This is used in the ASGI app to check permissions before processing the request.
     """
-    with managed_litestar_db_session(
-        connection.app.state, connection.scope
-    ) as db_session:
-        point_cloud_id = connection.path_params["point_cloud_id"]
-
-        point_cloud = PointCloudService.get(db_session, point_cloud_id)
-        if point_cloud.task and point_cloud.task.status not in [
-            "COMPLETED",
-            "FINISHED",
-            "FAILED",
-        ]:
-            logger.info(f"point cloud:{point_cloud_id} is not in terminal state")
-            raise HTTPException(
-                status_code=404, detail="Point cloud is currently being updated"
-            )
+    point_cloud_id = connection.path_params["point_cloud_id"]
+
+    point_cloud = get_request_context(connection).get_point_cloud(point_cloud_id)
+    if point_cloud.task and point_cloud.task.status not in [
+        "COMPLETED",
+        "FINISHED",
+        "FAILED",
+    ]:
+        logger.info(f"point cloud:{point_cloud_id} is not in terminal state")
+        raise HTTPException(
+            status_code=404, detail="Point cloud is currently being updated"
+        )
 
 
 def not_anonymous_guard(connection: ASGIConnection, _: BaseRouteHandler) -> None:
@@ -1,15 +1,16 @@
-import shutil
 import re
 import os
 import io
 import time
-from tempfile import NamedTemporaryFile
+import random
+import concurrent.futures
+from tempfile import NamedTemporaryFile, mkstemp
 from dataclasses import dataclass
 from functools import wraps
 from contextlib import closing
 import requests
 import pathlib
-from typing import List, Dict, IO
+from typing import List, Dict, IO, Tuple
 from urllib.parse import quote
 import json
 from dateutil import parser
@@ -26,6 +27,8 @@ from geoapi.utils.assets import get_temp_dir
 logger = logging.getLogger(__name__)
 
 SLEEP_SECONDS_BETWEEN_RETRY = 2
+MAX_SLEEP_SECONDS_BETWEEN_RETRY = 60
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 ASSETS_TEMP_DIR = get_temp_dir()
 
 
@@ -61,12 +64,70 @@ class RetryableTapisFileError(Exception):
     pass
 
 
+class RangeRequestsNotSupported(Exception):
+    """Byte range of a file was requested but the whole file was returned"""
+
+    pass
+
+
+@dataclass
+class DownloadSegment:
+    """Byte range of a file being downloaded (and how much of it has been written)
+
+    `end` is inclusive; None means to the end of the file.
+    """
+
+    start: int
+    end: int = None
+    written: int = 0
+    retries: int = 0
+
+    @property
+    def offset(self) -> int:
+        return self.start + self.written
+
+
+def split_into_segments(size: int, number_of_segments: int) -> List[DownloadSegment]:
+    """Split `size` bytes into (at most) `number_of_segments` contiguous segments"""
+    segment_size = -(-size // number_of_segments)
+    return [
+        DownloadSegment(start=start, end=min(start + segment_size, size) - 1)
+        for start in range(0, size, segment_size)
+    ]
+
+
+def get_retry_delay(retry: int) -> float:
+    """
+    Seconds to wait before a retry (exponential backoff with full jitter)
+
+    :param retry: int number of the retry (starting at 1)
+    """
+    max_delay = min(
+        MAX_SLEEP_SECONDS_BETWEEN_RETRY, SLEEP_SECONDS_BETWEEN_RETRY * 2 ** (retry - 1)
+    )
+    return random.uniform(0, max_delay)
+
+
+def _log_download_metrics(
+    systemId: str, path: str, segments: List[DownloadSegment], elapsed: float
+):
+    total_bytes = sum(segment.written for segment in segments)
+    retries = sum(segment.retries for segment in segments)
+    throughput = total_bytes / elapsed / (1024 * 1024) if elapsed > 0 else 0
+    logger.info(
+        f"Fetched file ({systemId}/{path}): bytes:{total_bytes} "
+        f"elapsed:{elapsed:.2f}s throughput:{throughput:.2f}MB/s "
+        f"segments:{len(segments)} retries:{retries}"
+    )
+
+
 class TapisFileListing:
 
     def __init__(self, data: Dict):
         self.type = data["type"]
         self.path = pathlib.Path(data["path"])
         self.lastModified = parser.parse(data["lastModified"])
+        self.size = data.get("size", 0)
 
     def __repr__(self):
         return "<TapisFileListing {}>".format(self.path)
@@ -173,6 +234,36 @@ class ApiUtils(metaclass=EnsureValidTokenMeta):
             raise ExpiredTokenError(msg)
 
 
+def _listing(client: ApiUtils, systemId: str, path: str) -> List[TapisFileListing]:
+    """List a directory (or file) using a (tapis) client"""
+    listings = []
+    offset = 0
+    limit = 1000  # Set the limit for each request
+    total_fetched = 0
+
+    while True:
+        url = quote(f"/v3/files/ops/{systemId}/{path}")
+        resp = client.client.get(
+            client.base_url + url, params={"offset": offset, "limit": limit}
+        )
+        if resp.status_code != 200:
+            e = TapisListingError(
+                message=f"Unable to perform files listing of {systemId}/{path}. Status code: {resp.status_code}",
+                response=resp,
+            )
+            raise e
+
+        listing = resp.json()
+        fetched_listings = [TapisFileListing(d) for d in listing["result"]]
+        listings.extend(fetched_listings)
+        total_fetched += len(fetched_listings)
+
+        if len(fetched_listings) < limit:
+            break
+        offset += limit
+    return listings
+
+
 class TapisUtils(ApiUtils):
     def __init__(self, database_session, user: User):
         """
@@ -199,30 +290,7 @@ class TapisUtils(ApiUtils):
         return listing["result"]
 
     def listing(self, systemId: str, path: str) -> List[TapisFileListing]:
-        listings = []
-        offset = 0
-        limit = 1000  # Set the limit for each request
-        total_fetched = 0
-
-        while True:
-            url = quote(f"/v3/files/ops/{systemId}/{path}")
-            resp = self.get(url, params={"offset": offset, "limit": limit})
-            if resp.status_code != 200:
-                e = TapisListingError(
-                    message=f"Unable to perform files listing of {systemId}/{path}. Status code: {resp.status_code}",
-                    response=resp,
-                )
-                raise e
-
-            listing = resp.json()
-            fetched_listings = [TapisFileListing(d) for d in listing["result"]]
-            listings.extend(fetched_listings)
-            total_fetched += len(fetched_listings)
-
-            if len(fetched_listings) < limit:
-                break
-            offset += limit
-        return listings
+        return _listing(self, systemId, path)
 
     # TODO_V3_REMOVE
     def getMetaAssociated(self, uuid: str) -> Dict:
@@ -240,76 +308,116 @@ class TapisUtils(ApiUtils):
         out = {k: v for d in results for k, v in d.items()}
         return out
 
-    def _get_file(self, systemId: str, path: str) -> NamedTemporaryFile:
+    def _get_file(self, systemId: str, path: str, fd: int, segment: DownloadSegment):
         """
-        Get file
+        Get (the rest of) a file segment and write it to `fd`
+
+        Download starts at `segment.offset` so that a previously interrupted download
+        of the segment is resumed. Progress is recorded in `segment.written` as
+        chunks are written so that it is kept if we fail part way.
 
         :raises
             RetryableTapisFileError: If tapis error occurs where its possible to retry
             TapisFileGetError: Raised if tapis error occurs and uncertain if we can retry
+            RangeRequestsNotSupported: If a byte range of the file was requested but
+            the whole file was returned
 
         :param systemId:
         :param path:
+        :param fd: file descriptor of file to write to
+        :param segment: segment of the file to get
         :return:
         """
         url = quote(f"/v3/files/content/{systemId}/{path}")
 
+        if segment.end is not None and segment.offset > segment.end:
+            # nothing left to get (i.e. we failed after getting last chunk)
+            return
+
+        headers = {}
+        is_range_request = segment.offset > 0 or segment.end is not None
+        if is_range_request:
+            end = "" if segment.end is None else segment.end
+            headers["Range"] = f"bytes={segment.offset}-{end}"
+
         # TODO_TAPISV3 what error code do we get if tapis is unable to get our file, but we should try again (500?)
-        with self.client.get(self.base_url + url, stream=True) as r:
+        try:
+            with self.client.get(
+                self.base_url + url, stream=True, headers=headers
+            ) as r:
+                if r.status_code == 416 and segment.offset:
+                    # nothing left to get (i.e. we failed after getting last chunk)
+                    return
+
+                if r.status_code > 400:
+                    if r.status_code != 404:
+                        logger.warning(
+                            f"Fetch file ({systemId}/{path}) but got {r.status_code}, {r}: {r.content}"
+                        )
+                        raise RetryableTapisFileError
+
+                    raise TapisFileGetError(
+                        "Could not fetch file ({}/{}) status_code:{} content:{}".format(
+                            systemId, path, r.status_code, r.content
+                        )
+                    )
 
-            if r.status_code > 400:
-                if r.status_code != 404:
+                if is_range_request and r.status_code != 206:
+                    if segment.end is not None:
+                        raise RangeRequestsNotSupported
+                    # whole file was returned so we start over
                     logger.warning(
-                        f"Fetch file ({systemId}/{path}) but got {r.status_code}, {r}: {r.content}"
+                        f"Fetch file ({systemId}/{path}) could not be resumed from "
+                        f"{segment.offset}; getting whole file"
                     )
-                    raise RetryableTapisFileError
+                    os.ftruncate(fd, 0)
+                    segment.written = 0
+
+                for chunk in r.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    os.pwrite(fd, chunk, segment.offset)
+                    segment.written += len(chunk)
+        except requests.exceptions.RequestException as e:
+            logger.warning(
+                f"Fetch file ({systemId}/{path}) interrupted after {segment.offset} bytes: {e}"
+            )
+            raise RetryableTapisFileError from e
 
-                raise TapisFileGetError(
-                    "Could not fetch file ({}/{}) status_code:{} content:{}".format(
-                        systemId, path, r.status_code, r.content
-                    )
-                )
-            tmpFile = NamedTemporaryFile(dir=ASSETS_TEMP_DIR)
-            for chunk in r.iter_content(1024 * 1024):
-                tmpFile.write(chunk)
-            tmpFile.seek(0)
-
-            # TODO_TAPISV3 is this still needed; this was a v2 error where empty files were sometimes returned
-            if os.path.getsize(tmpFile.name) < 1:
-                logger.warning(f"Fetch file ({systemId}/{path}) but is empty. ")
-                raise RetryableTapisFileError
-        return tmpFile
+        # TODO_TAPISV3 is this still needed; this was a v2 error where empty files were sometimes returned
+        if segment.end is None and segment.start == 0 and segment.written < 1:
+            logger.warning(f"Fetch file ({systemId}/{path}) but is empty. ")
+            raise RetryableTapisFileError
 
-    def getFile(self, systemId: str, path: str) -> NamedTemporaryFile:
+    def _get_file_segment(
+        self, systemId: str, path: str, fd: int, segment: DownloadSegment
+    ):
         """
-        Download a file from tapis
-
-        We attempt to get the file multiple times in case tapis is having issues (like if we see CS-196/DES-2236
-        where tapis hits an ssh limits and then we get a a 500 or a file with 0 bytes). Eventually
-        we will raise TapisFileGetError if we can't get the file.
+        Get a file segment, retrying (and resuming) with exponential backoff
 
-        User needs to ensure they call `close()` on the returned temp file
+        An attempt is only used up if no progress was made during it.
 
         :raises
             TapisFileGetError: Raised if unable to get file via tapis.
-
-        :param systemId: str
-        :param path: str
-        :return: temporary file
         """
         allowed_attempts = 5
         while allowed_attempts > 0:
+            written_before_attempt = segment.written
             try:
-                logger.debug(f"Getting file {systemId}/{path}")
-                return self._get_file(systemId, path)
+                logger.debug(
+                    f"Getting file {systemId}/{path} from byte {segment.offset}"
+                )
+                return self._get_file(systemId, path, fd, segment)
             except RetryableTapisFileError:
-                allowed_attempts = allowed_attempts - 1
+                segment.retries += 1
+                if segment.written == written_before_attempt:
+                    allowed_attempts = allowed_attempts - 1
                 logger.error(
                     f"File fetching failed but is retryable: ({systemId}/{path}) "
                 )
                 if allowed_attempts > 0:
-                    time.sleep(SLEEP_SECONDS_BETWEEN_RETRY)
+                    time.sleep(get_retry_delay(segment.retries))
                 continue
+            except RangeRequestsNotSupported:
+                raise
             except Exception as e:
                 logger.exception(
                     f"Could not fetch file and did not attempt to retry: ({systemId}/{path})"
@@ -319,25 +427,160 @@ class TapisUtils(ApiUtils):
         logger.exception(msg)
         raise TapisFileGetError(msg)
 
+    def _get_file_size(self, systemId: str, path: str):
+        """Get size of file (or None if unknown)"""
+        try:
+            listing = _listing(self, systemId, path)
+        except Exception:
+            logger.exception(f"Unable to get size of file ({systemId}/{path})")
+            return None
+        return listing[0].size if len(listing) == 1 else None
+
+    def getFile(
+        self, systemId: str, path: str, parallel_segments: bool = False
+    ) -> NamedTemporaryFile:
+        """
+        Download a file from tapis
+
+        We attempt to get the file multiple times in case tapis is having issues (like if we see CS-196/DES-2236
+        where tapis hits an ssh limits and then we get a a 500 or a file with 0 bytes). Failed downloads are
+        resumed from where they stopped (using a http range request) after an exponential backoff.
+        Eventually we will raise TapisFileGetError if we can't get the file.
+
+        If `parallel_segments` is True and the file is larger than TAPIS_DOWNLOAD_PARALLEL_MIN_SIZE,
+        the file is downloaded as TAPIS_DOWNLOAD_PARALLEL_SEGMENTS byte ranges at the same time.
+
+        User needs to ensure they call `close()` on the returned temp file
+
+        :raises
+            TapisFileGetError: Raised if unable to get file via tapis.
+
+        :param systemId: str
+        :param path: str
+        :param parallel_segments: bool download large files as several parallel segments
+        :return: temporary file
+        """
+        return self._download_to_temp_file(systemId, path, parallel_segments)
+
+    def _download_to_temp_file(
+        self, systemId: str, path: str, parallel_segments: bool = False
+    ) -> NamedTemporaryFile:
+        """
+        Download a file from tapis to a temp file (see getFile)
+
+        Unlike getFile, this does not ensure the token is valid (which might refresh the
+        token using the database session) so can be used from other threads once the
+        caller has called _ensure_valid_token().
+        """
+        start_time = time.time()
+        tmpFile = NamedTemporaryFile(dir=ASSETS_TEMP_DIR)
+        try:
+            segments = self._download(
+                systemId, path, tmpFile.fileno(), parallel_segments
+            )
+        except Exception:
+            tmpFile.close()
+            raise
+
+        tmpFile.seek(0)
+        _log_download_metrics(systemId, path, segments, time.time() - start_time)
+        return tmpFile
+
+    def _download(
+        self, systemId: str, path: str, fd: int, parallel_segments: bool
+    ) -> List[DownloadSegment]:
+        """
+        Download a file from tapis and write it to `fd`
+
+        See getFile()
+
+        :return: segments that were downloaded
+        """
+        if parallel_segments and settings.TAPIS_DOWNLOAD_PARALLEL_SEGMENTS > 1:
+            size = self._get_file_size(systemId, path)
+            if size and size >= settings.TAPIS_DOWNLOAD_PARALLEL_MIN_SIZE:
+                segments = split_into_segments(
+                    size, settings.TAPIS_DOWNLOAD_PARALLEL_SEGMENTS
+                )
+                try:
+                    self._get_file_segments(systemId, path, fd, segments)
+                    return segments
+                except RangeRequestsNotSupported:
+                    logger.warning(
+                        f"Range requests not supported when fetching file ({systemId}/{path}); "
+                        f"getting file as a single segment"
+                    )
+                    os.ftruncate(fd, 0)
+
+        segments = [DownloadSegment(start=0)]
+        self._get_file_segment(systemId, path, fd, segments[0])
+        return segments
+
+    def _get_file_segments(
+        self, systemId: str, path: str, fd: int, segments: List[DownloadSegment]
+    ):
+        """Get segments of a file at the same time"""
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(segments)
+        ) as executor:
+            futures = [
+                executor.submit(self._get_file_segment, systemId, path, fd, segment)
+                for segment in segments
+            ]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
     def get_file_context_manager(self, system_id: str, path: str) -> IO:
         tmpFile = self.getFile(system_id, path)
         return closing(tmpFile)
 
-    def get_file_to_path(self, system_id: str, path: str, destination_path: str):
+    def get_file_to_path(
+        self,
+        system_id: str,
+        path: str,
+        destination_path: str,
+        parallel_segments: bool = False,
+    ):
         """
         Download a file from tapis
 
-        This method differs from getFile as here we write to non-temporary file
+        This method differs from getFile as here we write to non-temporary file. The file is
+        downloaded directly into the destination's directory (so there is no extra copy of
+        the file) and renamed to `destination_path` once complete, so `destination_path` only
+        ever exists as a complete file.
+
+        :raises
+            TapisFileGetError: Raised if unable to get file via tapis.
 
         :param system_id: str
         :param path: str
         :param destination_path: str desired location of file
-
-        :return: temporary file
+        :param parallel_segments: bool download large files as several parallel segments (see getFile)
         """
-        with self.get_file_context_manager(system_id, path) as file_obj:
-            with open(destination_path, "wb+") as target_file:
-                shutil.copyfileobj(file_obj, target_file)
+        start_time = time.time()
+        fd, partial_path = mkstemp(
+            dir=os.path.dirname(os.path.abspath(destination_path)),
+            prefix=f".{os.path.basename(destination_path)}.",
+            suffix=".partial",
+        )
+        try:
+            segments = self._download(system_id, path, fd, parallel_segments)
+            os.fchmod(fd, 0o644)
+            os.close(fd)
+            fd = None
+            os.replace(partial_path, destination_path)
+        except Exception:
+            if fd is not None:
+                os.close(fd)
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        _log_download_metrics(system_id, path, segments, time.time() - start_time)
 
     def create_file(
         self, system_id: str, system_path: str, file_name: str, file_content: str
@@ -390,6 +633,19 @@ def get_system_users(database_session, user: User, system_id: str) -> List[Syste
     )
 
 
+def _get_metadata(client: ApiUtils, system_id: str, path: str) -> Dict:
+    """Get a file's metadata using a (designsafe) client"""
+    logger.debug(f"getting metadata. system_id: {system_id}, path:{path}")
+    response = client.client.get(
+        client.base_url + quote(f"/api/filemeta/{system_id}/{path}")
+    )
+    response.raise_for_status()
+    meta_response = response.json()
+    meta = meta_response["value"] if "value" in meta_response else {}
+    logger.debug(f"got metadata. system_id: {system_id}, path:{path} -> {meta}")
+    return meta
+
+
 def get_metadata(database_session, user: User, system_id: str, path: str) -> Dict:
     """
     Get a file's tapis metadata (which typically include geolocation) using service account
@@ -400,15 +656,84 @@ def get_metadata(database_session, user: User, system_id: str, path: str) -> Dic
     :param path: path to file
     :return: dictionary containing the metadata (including geolocation) of a file
     """
+    client = ApiUtils(
+        database_session=database_session, user=user, base_url=settings.DESIGNSAFE_URL
+    )
+    client._ensure_valid_token()
+    return _get_metadata(client, system_id, path)
 
-    logger.debug(f"getting metadata. system_id: {system_id}, path:{path}")
 
+def get_metadata_for_paths(
+    database_session, user: User, system_id: str, paths: List[str], max_workers=5
+) -> Dict[str, Dict]:
+    """
+    Get the tapis metadata of several files at the same time
+
+    DesignSafe's filemeta api has no bulk query so files are requested concurrently.
+    Files whose metadata can't be retrieved are left out.
+
+    :param database_session: Database session
+    :param user: User to make the query
+    :param system_id: system id
+    :param paths: paths of files
+    :param max_workers: number of concurrent requests
+    :return: dictionary of path to metadata
+    """
     client = ApiUtils(
         database_session=database_session, user=user, base_url=settings.DESIGNSAFE_URL
     )
-    response = client.get(url=quote(f"/api/filemeta/{system_id}/{path}"))
-    response.raise_for_status()
-    meta_response = response.json()
-    meta = meta_response["value"] if "value" in meta_response else {}
-    logger.debug(f"got metadata. system_id: {system_id}, path:{path} -> {meta}")
-    return meta
+    # ensure token once here, as the database session can't be used in the threads
+    client._ensure_valid_token()
+
+    metadata = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_get_metadata, client, system_id, path): path
+            for path in paths
+        }
+        for future in concurrent.futures.as_completed(futures):
+            path = futures[future]
+            try:
+                metadata[path] = future.result()
+            except Exception:
+                logger.exception(
+                    f"Unable to get metadata. system_id: {system_id}, path:{path}"
+                )
+    return metadata
+
+
+def files_exist(
+    tapis_client: "TapisUtils", files: List[Tuple[str, str]], max_workers=5
+) -> Dict[Tuple[str, str], bool]:
+    """
+    Check if several files exist at the same time
+
+    :param tapis_client: TapisUtils client
+    :param files: list of (system_id, path) tuples
+    :param max_workers: number of concurrent listings
+    :return: dictionary of (system_id, path) to whether the file exists
+    """
+    # ensure token once here, as the database session can't be used in the threads
+    tapis_client._ensure_valid_token()
+
+    def _file_exists(system_id, path):
+        try:
+            return len(_listing(tapis_client, system_id, path)) > 0
+        except TapisListingError:
+            return False
+
+    exists = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_file_exists, system_id, path): (system_id, path)
+            for system_id, path in set(files)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            system_id, path = futures[future]
+            try:
+                exists[(system_id, path)] = future.result()
+            except Exception:
+                logger.exception(
+                    f"Unable to check if file exists. system_id: {system_id}, path:{path}"
+                )
+    return exists
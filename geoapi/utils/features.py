@@ -88,6 +88,16 @@ def is_supported_for_automatic_scraping_without_metadata(path):
     )  # if in .rqa, then only .rq file
 
 
+def is_file_type_using_metadata_geolocation(path):
+    """
+    Check if file type can use a geolocation from Tapis metadata (instead of its own, e.g. exif)
+
+    :param path: str
+    """
+    suffix = Path(path).suffix.lower().lstrip(".")
+    return suffix in IMAGE_FILE_EXTENSIONS
+
+
 def is_supported_file_type_in_rapp_folder_and_needs_metadata(path):
     """
     Check if file is in /Rapp folder and is importable and if Tapis metadata service should be used to derive
@@ -1,7 +1,13 @@
+import os
+import time
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from geoapi.utils.external_apis import get_metadata
+from geoapi.utils.external_apis import get_metadata, get_metadata_for_paths
+from geoapi.utils import features as features_util
 from geoapi.models import User
-from typing import Optional
+from geoapi.settings import settings
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -19,6 +25,12 @@ def parse_rapid_geolocation(geolocation_metadata):
     return GeoLocation(lat, lon)
 
 
+def _geolocation_from_metadata(meta: Dict) -> Optional[GeoLocation]:
+    if meta and "geolocation" in meta and len(meta["geolocation"]) > 0:
+        return parse_rapid_geolocation(meta.get("geolocation"))
+    return None
+
+
 def get_geolocation_from_file_metadata(
     database_session, user: User, system_id: str, path: str
 ) -> Optional[GeoLocation]:
@@ -33,6 +45,134 @@ def get_geolocation_from_file_metadata(
     :return: A GeoLocation object if geolocation information is found; otherwise, None.
     """
     meta = get_metadata(database_session, user, system_id, path)
-    if meta and "geolocation" in meta and len(meta["geolocation"]) > 0:
-        return parse_rapid_geolocation(meta.get("geolocation"))
-    return None
+    return _geolocation_from_metadata(meta)
+
+
+def needs_file_metadata(path: str) -> bool:
+    """
+    Check if the Tapis metadata of a file is used when importing it
+
+    i.e. files in RApp folder which need metadata for their geolocation, or files where
+    a geolocation in the metadata is preferred over the file's own (i.e. images)
+
+    :param path: str
+    """
+    return features_util.is_supported_file_type_in_rapp_folder_and_needs_metadata(
+        path
+    ) or features_util.is_file_type_using_metadata_geolocation(path)
+
+
+class _MetadataCache:
+    """Small thread-safe LRU cache (with expiration) of file metadata"""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, meta = entry
+            if time.monotonic() - created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return meta
+
+    def set(self, key, meta: Dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), meta)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Metadata of files (shared by tasks in the same worker process)
+metadata_cache = _MetadataCache(
+    max_size=settings.TAPIS_METADATA_CACHE_MAX_ENTRIES,
+    ttl=settings.TAPIS_METADATA_CACHE_TTL,
+)
+
+
+class FileMetadataResolver:
+    """
+    Resolve Tapis file metadata for the files of a directory listing
+
+    Metadata is only looked up for files which need it (see needs_file_metadata). The
+    metadata of all such files in a listing is fetched at once (see `prefetch`) and
+    cached by (system, path, lastModified) so a file is not looked up again unless it
+    has been modified.
+    """
+
+    def __init__(self, database_session, user: User, system_id: str):
+        self.database_session = database_session
+        self.user = user
+        self.system_id = system_id
+
+    def _key(self, item):
+        return self.system_id, str(item.path), item.lastModified
+
+    def _needs_metadata(self, item) -> bool:
+        return needs_file_metadata(
+            os.path.join(self.system_id, str(item.path).lstrip("/"))
+        )
+
+    def prefetch(self, listing: List):
+        """
+        Get metadata of all the files in the listing which need it (and aren't cached)
+
+        :param listing: List[TapisFileListing]
+        """
+        to_get = [
+            item
+            for item in listing
+            if self._needs_metadata(item)
+            and metadata_cache.get(self._key(item)) is None
+        ]
+        if not to_get:
+            return
+        metadata = get_metadata_for_paths(
+            self.database_session,
+            self.user,
+            self.system_id,
+            [str(item.path) for item in to_get],
+        )
+        for item in to_get:
+            if str(item.path) in metadata:
+                metadata_cache.set(self._key(item), metadata[str(item.path)])
+
+    def get_metadata(self, item) -> Dict:
+        """
+        Get metadata of a file
+
+        :param item: TapisFileListing
+        :return: dictionary containing the metadata (including geolocation) of a file
+        """
+        meta = metadata_cache.get(self._key(item))
+        if meta is None:
+            meta = get_metadata(
+                self.database_session, self.user, self.system_id, str(item.path)
+            )
+            metadata_cache.set(self._key(item), meta)
+        return meta
+
+    def get_geolocation(self, item) -> Optional[GeoLocation]:
+        """
+        Get geolocation of a file from its metadata
+
+        Returns None (without any lookup) if the file type doesn't use the geolocation
+        in metadata.
+
+        :param item: TapisFileListing
+        """
+        if not self._needs_metadata(item):
+            return None
+        return _geolocation_from_metadata(self.get_metadata(item))
@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import List
+from redis.exceptions import RedisError
+import laspy
+
+from geoapi.settings import settings
+from geoapi.log import logging
+from geoapi.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+GIB = 1024**3
+
+# reservations of a crashed worker are dropped once not renewed for this long
+RESERVATION_TIMEOUT_SECONDS = 5 * 60
+RESERVATION_RENEW_SECONDS = 60
+
+# PotreeConverter memory use grows with the number of points (8 GB LAS files can
+# use more than 50 GB)
+POTREE_BASE_MEMORY = 1 * GIB
+POTREE_MEMORY_PER_POINT = 200
+# pdal's COPC writer streams points to disk so it needs much less
+COPC_MEMORY_PER_POINT = 50
+# tiles smaller than this are not worth the overhead of a separate conversion
+MIN_POINTS_PER_CONVERSION = 1_000_000
+
+# GDAL (warp, overviews) memory use grows with the uncompressed raster size
+RASTER_BASE_MEMORY = 1 * GIB
+RASTER_MEMORY_PER_UNCOMPRESSED_BYTE = 0.25
+
+# Reserve the resources if they fit (or if nothing else is reserved, so that a
+# task larger than the host can still run on its own).
+#
+# KEYS[1]: hash of reservation id -> json {memory, cpus, expires}
+# ARGV: reservation id, memory, cpus, expires, now, memory capacity, cpu capacity
+_RESERVE_SCRIPT = """
+local reserved_memory = 0
+local reserved_cpus = 0
+local reservations = redis.call('HGETALL', KEYS[1])
+for i = 1, #reservations, 2 do
+    local reservation = cjson.decode(reservations[i + 1])
+    if reservation['expires'] < tonumber(ARGV[5]) then
+        redis.call('HDEL', KEYS[1], reservations[i])
+    else
+        reserved_memory = reserved_memory + reservation['memory']
+        reserved_cpus = reserved_cpus + reservation['cpus']
+    end
+end
+local memory = tonumber(ARGV[2])
+local cpus = tonumber(ARGV[3])
+local is_idle = reserved_memory == 0 and reserved_cpus == 0
+if is_idle or (reserved_memory + memory <= tonumber(ARGV[6])
+               and reserved_cpus + cpus <= tonumber(ARGV[7])) then
+    redis.call('HSET', KEYS[1], ARGV[1],
+               cjson.encode({memory=memory, cpus=cpus, expires=tonumber(ARGV[4])}))
+    return 1
+end
+return 0
+"""
+
+
+@dataclass
+class ResourceRequest:
+    """Memory (bytes) and cpus needed by a heavy task"""
+
+    memory: int
+    cpus: int
+
+    def __str__(self):
+        return f"{self.memory / GIB:.1f} GiB memory, {self.cpus} cpus"
+
+
+def get_host_capacity() -> ResourceRequest:
+    """Memory and cpus that heavy tasks on this host can reserve"""
+    memory = settings.HEAVY_RESOURCES_MEMORY
+    if not memory:
+        total_memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        memory = int(total_memory * 0.8)
+    cpus = settings.HEAVY_RESOURCES_CPUS or os.cpu_count()
+    return ResourceRequest(memory=memory, cpus=cpus)
+
+
+def _cpus_per_task() -> int:
+    return max(1, min(settings.HEAVY_TASK_CPUS, get_host_capacity().cpus))
+
+
+def estimate_point_cloud_resources(
+    file_paths: List[str], memory_per_point: int = POTREE_MEMORY_PER_POINT
+) -> ResourceRequest:
+    """
+    Estimate resources needed to convert point cloud files (using the point counts
+    in the LAS/LAZ headers)
+    """
+    point_count = 0
+    for file_path in file_paths:
+        with laspy.open(file_path) as las_file:
+            point_count += las_file.header.point_count
+    return ResourceRequest(
+        memory=POTREE_BASE_MEMORY + point_count * memory_per_point,
+        cpus=_cpus_per_task(),
+    )
+
+
+def get_max_points_per_conversion(
+    memory_per_point: int = POTREE_MEMORY_PER_POINT,
+) -> int:
+    """
+    Largest number of points that a point cloud conversion can handle (when running
+    POINT_CLOUD_TILE_CONCURRENCY conversions at the same time) in the host's memory.
+    Larger files are split into tiles.
+    """
+    if settings.POINT_CLOUD_TILE_MAX_POINTS:
+        return settings.POINT_CLOUD_TILE_MAX_POINTS
+    concurrency = max(1, settings.POINT_CLOUD_TILE_CONCURRENCY)
+    memory = get_host_capacity().memory / concurrency - POTREE_BASE_MEMORY
+    return max(MIN_POINTS_PER_CONVERSION, int(memory / memory_per_point))
+
+
+def estimate_tiled_point_cloud_resources(
+    max_points: int, memory_per_point: int = POTREE_MEMORY_PER_POINT
+) -> ResourceRequest:
+    """Estimate resources needed to convert the tiles of a point cloud file"""
+    concurrency = max(1, settings.POINT_CLOUD_TILE_CONCURRENCY)
+    return ResourceRequest(
+        memory=concurrency * (POTREE_BASE_MEMORY + max_points * memory_per_point),
+        cpus=_cpus_per_task(),
+    )
+
+
+def estimate_raster_resources(
+    width: int, height: int, band_count: int, bytes_per_sample: int
+) -> ResourceRequest:
+    """Estimate resources needed to convert a raster to a COG"""
+    uncompressed_size = width * height * band_count * bytes_per_sample
+    return ResourceRequest(
+        memory=int(
+            RASTER_BASE_MEMORY + uncompressed_size * RASTER_MEMORY_PER_UNCOMPRESSED_BYTE
+        ),
+        cpus=_cpus_per_task(),
+    )
+
+
+def _reservations_key() -> str:
+    return f"heavy_resources:{socket.gethostname()}"
+
+
+def _try_to_reserve(
+    reservation_id: str, request: ResourceRequest, capacity: ResourceRequest
+) -> bool:
+    client = get_redis_client()
+    now = time.time()
+    reserve = client.register_script(_RESERVE_SCRIPT)
+    return bool(
+        reserve(
+            keys=[_reservations_key()],
+            args=[
+                reservation_id,
+                request.memory,
+                request.cpus,
+                now + RESERVATION_TIMEOUT_SECONDS,
+                now,
+                capacity.memory,
+                capacity.cpus,
+            ],
+        )
+    )
+
+
+def _renew(reservation_id: str, request: ResourceRequest, stop: threading.Event):
+    while not stop.wait(RESERVATION_RENEW_SECONDS):
+        try:
+            get_redis_client().hset(
+                _reservations_key(),
+                reservation_id,
+                json.dumps(
+                    {
+                        "memory": request.memory,
+                        "cpus": request.cpus,
+                        "expires": time.time() + RESERVATION_TIMEOUT_SECONDS,
+                    }
+                ),
+            )
+        except RedisError:
+            logger.warning(f"Unable to renew resource reservation:{reservation_id}")
+
+
+class HeavyResourcesUnavailable(Exception):
+    """Raised when the resources needed by a heavy task are not available right now"""
+
+
+@contextmanager
+def reserve_heavy_resources(name: str, request: ResourceRequest):
+    """
+    Reserve `request` (if it fits in what is not yet reserved by other heavy tasks on
+    this host) and hold the reservation until exit.
+
+    A request larger than the host's capacity is admitted once nothing else is
+    running. If redis is unavailable, we log and run without a reservation.
+
+    We don't wait here (which would hold a worker slot) so callers should retry the
+    task later (after HEAVY_RESOURCES_RETRY_SECONDS) when this raises
+    HeavyResourcesUnavailable.
+
+    :param name: str name of task (for logging)
+    :param request: ResourceRequest needed resources
+    :raises HeavyResourcesUnavailable: if the request doesn't fit right now
+    """
+    capacity = get_host_capacity()
+    reservation_id = f"{name}:{uuid.uuid4()}"
+
+    try:
+        reserved = _try_to_reserve(reservation_id, request, capacity)
+    except RedisError:
+        logger.exception(
+            f"Unable to reserve resources for:{name}; continuing without reservation"
+        )
+        yield
+        return
+    if not reserved:
+        logger.info(
+            f"Resources not available for:{name} (needs {request}; capacity {capacity})"
+        )
+        raise HeavyResourcesUnavailable(f"Waiting for resources ({request})")
+
+    stop = threading.Event()
+    renewer = threading.Thread(
+        target=_renew, args=(reservation_id, request, stop), daemon=True
+    )
+    renewer.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        # so that a renewal can't re-add the reservation after it is released
+        renewer.join()
+        try:
+            get_redis_client().hdel(_reservations_key(), reservation_id)
+        except RedisError:
+            # reservation will expire on its own
+            logger.warning(f"Unable to release resource reservation:{reservation_id}")
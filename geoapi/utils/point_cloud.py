@@ -1,12 +1,25 @@
 import subprocess
 import json
+import math
+import concurrent.futures
+import warnings
 import laspy
 from shapely.geometry import MultiPolygon, Polygon
 from shapely.ops import unary_union
 from pyproj import Transformer
 from geoapi.exceptions import InvalidCoordinateReferenceSystem
+from geoapi.log import logging
 from typing import List
 
+logger = logging.getLogger(__name__)
+
+# number of files whose header is read at the same time
+BOUNDING_BOX_MAX_WORKERS = 4
+
+# tiles are sized for this fraction of the max points, as points are rarely spread
+# evenly over a file's extent
+TILE_FILL_FACTOR = 0.5
+
 
 def _transform_to_geojson(proj4, point: tuple) -> tuple:
     """
@@ -49,39 +62,110 @@ def getProj4(filePath: str):
     raise InvalidCoordinateReferenceSystem()
 
 
+def _parse_crs(header: laspy.LasHeader, filePath: str) -> str | None:
+    """
+    Get proj4 of the (horizontal) crs of a las file from the VLRs of its header
+
+    The proj4 string is the same as the one reported by `pdal info` (see getProj4)
+    :param header: las header
+    :param filePath: path of las file (for logging)
+    :return: str or None if no crs could be parsed
+    """
+    try:
+        crs = header.parse_crs()
+    except Exception:
+        logger.warning(f"Unable to parse crs from VLRs of {filePath}", exc_info=True)
+        return None
+    if crs is None:
+        return None
+    if crs.is_compound:
+        # only x/y are transformed, so drop the vertical crs
+        crs = crs.sub_crs_list[0]
+    with warnings.catch_warnings():
+        # pyproj warns that proj4 strings lose information
+        warnings.simplefilter("ignore", UserWarning)
+        return crs.to_proj4()
+
+
+def _get_bounding_box_of_file(filePath: str) -> Polygon:
+    """
+    Get 2D bounding box (in epsg:4326) of a las file using just its header
+    :param filePath
+    :return: Polygon
+    :raises InvalidCoordinateReferenceSystem
+    """
+    # laspy.open only reads the header (and VLRs); points are not decompressed
+    with laspy.open(filePath) as las_file:
+        header = las_file.header
+        mins = tuple(header.mins[:3])
+        maxs = tuple(header.maxs[:3])
+        proj4 = _parse_crs(header, filePath)
+
+    if proj4 is None:
+        # fall back to pdal which understands more (e.g. partial GeoTIFF keys)
+        proj4 = getProj4(filePath)
+
+    min_point = _transform_to_geojson(proj4=proj4, point=mins)
+    max_point = _transform_to_geojson(proj4=proj4, point=maxs)
+
+    return Polygon(
+        [
+            min_point,
+            (max_point[0], min_point[1]),
+            max_point,
+            (min_point[0], max_point[1]),
+        ]
+    )
+
+
 def get_bounding_box_2d(filePaths: List[str]) -> MultiPolygon:
     """
     Get 2D bounding box(s) from las file(s)
 
-    Bounding box is in epsg:4326
+    Bounding box is in epsg:4326. Only the headers of the files are read and
+    files are processed in parallel.
 
-    :param filePaths: List[Project]
+    :param filePaths: List[str]
     :return: MultiPolygon or Polygon
+    :raises InvalidCoordinateReferenceSystem
     """
-
-    # TODO this could all be replaced by calling `pdal info` which provides
-    #  an EPSG:4326 boundary box in our desired 4326 crs. The downside is that
-    #  pdal info takes a long time (single threaded)
-    polygons = []
-    for input_file in filePaths:
-        proj4 = getProj4(input_file)
-
-        las_file = laspy.read(input_file)
-        min_point = _transform_to_geojson(
-            proj4=proj4, point=tuple(las_file.header.mins[:3])
-        )
-        max_point = _transform_to_geojson(
-            proj4=proj4, point=tuple(las_file.header.maxs[:3])
-        )
-
-        polygons.append(
-            Polygon(
-                [
-                    min_point,
-                    (max_point[0], min_point[1]),
-                    max_point,
-                    (min_point[0], max_point[1]),
-                ]
-            )
-        )
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=BOUNDING_BOX_MAX_WORKERS
+    ) as executor:
+        polygons = list(executor.map(_get_bounding_box_of_file, filePaths))
     return polygons[0] if len(polygons) == 1 else unary_union(polygons)
+
+
+def get_point_count(filePath: str) -> int:
+    """
+    Get number of points of a las file (from its header)
+    :param filePath
+    :return: int
+    """
+    with laspy.open(filePath) as las_file:
+        return las_file.header.point_count
+
+
+def get_tiling(filePath: str, maxPoints: int) -> tuple:
+    """
+    Get square tiles (in the file's crs) that split a las file into tiles of at most
+    about `maxPoints` points (assuming points are spread evenly over its extent)
+    :param filePath
+    :param maxPoints: int
+    :return: tuple of tile length and origin (x, y)
+    """
+    with laspy.open(filePath) as las_file:
+        header = las_file.header
+        point_count = header.point_count
+        min_x, min_y = header.mins[0], header.mins[1]
+        width = header.maxs[0] - header.mins[0]
+        height = header.maxs[1] - header.mins[1]
+
+    tile_count = math.ceil(point_count / (maxPoints * TILE_FILL_FACTOR))
+    area = width * height
+    if area > 0:
+        length = math.sqrt(area / tile_count)
+    else:
+        # points along a line
+        length = max(width, height) / tile_count or 1.0
+    return length, (float(min_x), float(min_y))
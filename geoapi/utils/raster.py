@@ -0,0 +1,310 @@
+import math
+import threading
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy
+import rasterio
+import rasterio.features
+from rasterio.enums import ColorInterp
+from rasterio.errors import NotGeoreferencedWarning
+from rasterio.warp import transform, transform_bounds, transform_geom
+from rasterio.windows import Window, from_bounds
+
+from geoapi.settings import settings
+from geoapi.log import logging
+
+logger = logging.getLogger(__name__)
+
+# sample sizes of the GDAL data types that numpy has no equivalent for
+_DTYPE_SIZES = {"complex_int16": 4}
+
+
+@dataclass
+class RasterInfo:
+    """What the raster pipeline needs to know about a raster (see inspect_raster)"""
+
+    width: int
+    height: int
+    # rasterio (numpy) names of the bands' data types, e.g. "uint8"
+    dtypes: List[str]
+    crs_wkt: str | None
+    epsg: int | None
+    # GDAL order: (origin x, pixel width, row rotation, origin y, column rotation,
+    # pixel height)
+    geotransform: Tuple[float, float, float, float, float, float] | None
+    # (west, south, east, north) in EPSG:4326
+    wgs84_bounds: Tuple[float, float, float, float] | None
+    # decimation factors of the first band's overviews, e.g. [2, 4, 8]
+    overviews: List[int] = field(default_factory=list)
+    # (width, height) of the first band's blocks
+    block_size: Tuple[int, int] | None = None
+    # IMAGE_STRUCTURE LAYOUT (e.g. "COG" if GDAL found the COG ghost header)
+    layout: str | None = None
+    # TILING_SCHEME NAME written by GDAL's COG driver (e.g. "GoogleMapsCompatible")
+    tiling_scheme: str | None = None
+    # first band has a color table
+    is_paletted: bool = False
+
+    @property
+    def band_count(self) -> int:
+        return len(self.dtypes)
+
+    @property
+    def dtype(self) -> str | None:
+        return self.dtypes[0] if self.dtypes else None
+
+    @property
+    def bytes_per_sample(self) -> int:
+        """Size of the largest of the bands' data types"""
+        return max(
+            (
+                _DTYPE_SIZES.get(dtype) or numpy.dtype(dtype).itemsize
+                for dtype in self.dtypes
+            ),
+            default=1,
+        )
+
+    @property
+    def is_georeferenced(self) -> bool:
+        return self.geotransform is not None and self.wgs84_bounds is not None
+
+    @property
+    def is_web_mercator(self) -> bool:
+        return self.epsg == 3857
+
+
+def inspect_raster(path: Path | str) -> RasterInfo:
+    """
+    Read the header of a raster (opening it once, in process)
+
+    :param path: path of raster
+    :return: RasterInfo
+    :raises rasterio.errors.RasterioIOError: if the raster can't be opened
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", NotGeoreferencedWarning)
+        with rasterio.open(path) as src:
+            # rasterio reports an identity transform for rasters without one
+            geotransform = None
+            if not src.transform.is_identity:
+                geotransform = src.transform.to_gdal()
+
+            wgs84_bounds = None
+            if src.crs is not None and geotransform is not None:
+                wgs84_bounds = tuple(
+                    transform_bounds(src.crs, "EPSG:4326", *src.bounds)
+                )
+
+            block_size = None
+            if src.count:
+                block_height, block_width = src.block_shapes[0]
+                block_size = (block_width, block_height)
+
+            return RasterInfo(
+                width=src.width,
+                height=src.height,
+                dtypes=list(src.dtypes),
+                crs_wkt=src.crs.to_wkt() if src.crs else None,
+                epsg=src.crs.to_epsg() if src.crs else None,
+                geotransform=geotransform,
+                wgs84_bounds=wgs84_bounds,
+                overviews=src.overviews(1) if src.count else [],
+                block_size=block_size,
+                layout=src.tags(ns="IMAGE_STRUCTURE").get("LAYOUT"),
+                tiling_scheme=src.tags(ns="TILING_SCHEME").get("NAME"),
+                is_paletted=bool(src.count)
+                and src.colorinterp[0] == ColorInterp.palette,
+            )
+
+
+class BlockCache:
+    """
+    Least recently used blocks of rasters, up to RASTER_BLOCK_CACHE_SIZE bytes (shared
+    by the threads of a process)
+    """
+
+    def __init__(self):
+        self._blocks: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> numpy.ma.MaskedArray | None:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+            return block
+
+    def put(self, key: Tuple, block: numpy.ma.MaskedArray) -> None:
+        max_size = settings.RASTER_BLOCK_CACHE_SIZE
+        size = block.nbytes + numpy.ma.getmaskarray(block).nbytes
+        if size > max_size:
+            return
+        with self._lock:
+            if key in self._blocks:
+                return
+            self._blocks[key] = block
+            self._size += size
+            while self._size > max_size:
+                _, removed = self._blocks.popitem(last=False)
+                self._size -= removed.nbytes + numpy.ma.getmaskarray(removed).nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+            self._size = 0
+
+
+block_cache = BlockCache()
+
+
+def _value_or_none(value) -> float | None:
+    if value is numpy.ma.masked or not math.isfinite(value):
+        return None
+    return value.item()
+
+
+def sample_raster(path: Path | str, lon: float, lat: float) -> List[float | None]:
+    """
+    Get the values of the bands of a raster at a point (EPSG:4326)
+
+    Only the block containing the point is read (and kept in the block cache).
+
+    :return: value of each band (None for nodata or outside of the raster)
+    """
+    path = Path(path)
+    with rasterio.open(path) as src:
+        (x,), (y,) = transform("EPSG:4326", src.crs, [lon], [lat])
+        row, col = src.index(x, y)
+        if not (0 <= row < src.height and 0 <= col < src.width):
+            return [None] * src.count
+
+        block_height, block_width = src.block_shapes[0]
+        block_row, block_col = row // block_height, col // block_width
+        # a rebuilt raster (e.g. mosaic) has a new modification time
+        key = (str(path), path.stat().st_mtime_ns, block_row, block_col)
+        block = block_cache.get(key)
+        if block is None:
+            window = src.block_window(1, block_row, block_col)
+            block = src.read(window=window, masked=True)
+            block_cache.put(key, block)
+
+    values = block[:, row - block_row * block_height, col - block_col * block_width]
+    return [_value_or_none(value) for value in values]
+
+
+@dataclass
+class BandStatistics:
+    # number of (valid) pixels in the polygon
+    count: int
+    min: float | None = None
+    max: float | None = None
+    mean: float | None = None
+    std: float | None = None
+
+
+@dataclass
+class RasterStatistics:
+    bands: List[BandStatistics]
+    # overview level that was read (None for full resolution)
+    overview_level: int | None
+    # (width, height) of the pixels that were read, in the raster's units
+    pixel_size: Tuple[float, float]
+
+
+def _get_pixel_window(
+    bounds: Tuple[float, float, float, float], src
+) -> Tuple[int, int, int, int] | None:
+    """(col_off, row_off, width, height) of the pixels of src in bounds (or None)"""
+    window = from_bounds(*bounds, transform=src.transform)
+    col_off = max(math.floor(window.col_off), 0)
+    row_off = max(math.floor(window.row_off), 0)
+    col_end = min(math.ceil(window.col_off + window.width), src.width)
+    row_end = min(math.ceil(window.row_off + window.height), src.height)
+    if col_end <= col_off or row_end <= row_off:
+        return None
+    return col_off, row_off, col_end - col_off, row_end - row_off
+
+
+def get_raster_statistics(
+    path: Path | str, geometry: Dict, max_pixels: int | None = None
+) -> RasterStatistics:
+    """
+    Get statistics of the bands of a raster in a polygon (GeoJSON geometry in EPSG:4326)
+
+    Pixels are read from the finest resolution (full or overview) that has at most
+    `max_pixels` (RASTER_STATISTICS_MAX_PIXELS by default) pixels in the polygon's
+    extent, so large rasters are never read entirely.
+
+    :raises ValueError: if even the coarsest overview has too many pixels in the extent
+    """
+    max_pixels = (
+        settings.RASTER_STATISTICS_MAX_PIXELS if max_pixels is None else max_pixels
+    )
+    with rasterio.open(path) as src:
+        band_count = src.count
+        src_geometry = transform_geom("EPSG:4326", src.crs, geometry)
+        bounds = rasterio.features.bounds(src_geometry)
+        pixel_window = _get_pixel_window(bounds, src)
+        if pixel_window is None:
+            return RasterStatistics(
+                bands=[BandStatistics(count=0) for _ in range(band_count)],
+                overview_level=None,
+                pixel_size=src.res,
+            )
+        _, _, width, height = pixel_window
+
+        overview_level = None
+        if width * height > max_pixels:
+            for level, factor in enumerate(src.overviews(1)):
+                if width * height / factor**2 <= max_pixels:
+                    overview_level = level
+                    break
+            else:
+                raise ValueError(
+                    "Polygon is too large for the raster's resolution "
+                    f"({width * height} pixels)"
+                )
+
+    with rasterio.open(path, overview_level=overview_level) as src:
+        pixel_window = _get_pixel_window(bounds, src)
+        if pixel_window is None:
+            # polygon is smaller than a pixel of the overview
+            return RasterStatistics(
+                bands=[BandStatistics(count=0) for _ in range(band_count)],
+                overview_level=overview_level,
+                pixel_size=src.res,
+            )
+        window = Window(*pixel_window)
+        data = src.read(window=window, masked=True)
+        outside = rasterio.features.geometry_mask(
+            [src_geometry],
+            out_shape=(window.height, window.width),
+            transform=src.window_transform(window),
+        )
+        pixel_size = src.res
+
+    data = numpy.ma.masked_invalid(data)
+    data = numpy.ma.masked_array(data, mask=numpy.ma.getmaskarray(data) | outside)
+    bands = []
+    for band in data:
+        values = band.compressed().astype("float64")
+        if values.size == 0:
+            bands.append(BandStatistics(count=0))
+            continue
+        bands.append(
+            BandStatistics(
+                count=int(values.size),
+                min=float(values.min()),
+                max=float(values.max()),
+                mean=float(values.mean()),
+                std=float(values.std()),
+            )
+        )
+    return RasterStatistics(
+        bands=bands, overview_level=overview_level, pixel_size=pixel_size
+    )
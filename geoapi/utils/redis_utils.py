@@ -0,0 +1,242 @@
+import json
+import time
+import uuid
+import redis
+from contextlib import contextmanager
+from redis.exceptions import RedisError
+
+from geoapi.settings import settings
+from geoapi.log import logging
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+
+def get_redis_client() -> redis.Redis:
+    """Get (or create) the shared, synchronous redis client
+
+    Used by both the Litestar backend and the Celery workers for small pieces of
+    shared state (locks, counters, caches).
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=0,
+            socket_timeout=5,
+            socket_connect_timeout=5,
+        )
+    return _redis_client
+
+
+@contextmanager
+def non_blocking_lock(name: str, timeout: int):
+    """
+    Try to acquire a lock without waiting for it.
+
+    Yields True if lock was acquired (and releases it on exit), else False. The lock
+    expires after `timeout` seconds so a crashed worker does not hold it forever.
+
+    If redis is unavailable, we log and yield True (i.e. we prefer doing the work
+    twice over not doing it at all).
+
+    :param name: str name of lock
+    :param timeout: int seconds until lock expires
+    """
+    try:
+        lock = get_redis_client().lock(name, timeout=timeout)
+        acquired = lock.acquire(blocking=False)
+    except RedisError:
+        logger.exception(f"Unable to acquire lock:{name}; continuing without lock")
+        yield True
+        return
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except RedisError:
+                # lock will expire on its own (or it has already expired)
+                logger.warning(f"Unable to release lock:{name}")
+
+
+@contextmanager
+def concurrency_slot(name: str, limit: int, timeout: int):
+    """
+    Try to take one of `limit` slots for `name` without waiting.
+
+    Yields True if a slot was taken (and gives it back on exit), else False. Each
+    holder has its own deadline (`timeout` seconds after taking the slot) in a sorted
+    set, and holders past their deadline (e.g. a crashed worker) are removed before
+    counting, so leaked slots are reclaimed even while other holders keep taking slots.
+
+    If redis is unavailable, we log and yield True.
+
+    :param name: str name of the slots
+    :param limit: int maximum number of concurrent holders
+    :param timeout: int seconds until a slot is reclaimed
+    """
+    client = get_redis_client()
+    holder = str(uuid.uuid4())
+    now = time.time()
+    try:
+        with client.pipeline() as pipe:
+            pipe.zremrangebyscore(name, "-inf", now)
+            pipe.zadd(name, {holder: now + timeout})
+            pipe.zcard(name)
+            # only so that the set of an unused name is removed; holders are reclaimed
+            # by their own deadlines
+            pipe.expire(name, timeout)
+            _, _, count, _ = pipe.execute()
+    except RedisError:
+        logger.exception(f"Unable to take slot for:{name}; continuing without limit")
+        yield True
+        return
+
+    acquired = count <= limit
+    if not acquired:
+        try:
+            client.zrem(name, holder)
+        except RedisError:
+            logger.warning(f"Unable to give back slot for:{name}")
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                client.zrem(name, holder)
+            except RedisError:
+                logger.warning(f"Unable to give back slot for:{name}")
+
+
+class RedisCache:
+    """
+    Cache of json-serializable values shared by the backend and the Celery workers
+
+    Entries expire after `ttl` seconds and, once there are more than `max_entries`,
+    the least recently used entries are removed. Hits and misses are counted
+    (see `stats()`).
+
+    If redis is unavailable, every lookup is a miss (i.e. callers fall back to
+    getting the value themselves).
+
+    :param name: str name of cache (used as prefix of its redis keys)
+    :param ttl: int seconds until an entry expires
+    :param max_entries: int maximum number of entries
+    """
+
+    def __init__(self, name: str, ttl: int, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._index = f"cache:{name}:index"
+        self._stats = f"cache:{name}:stats"
+
+    def _key(self, key: str) -> str:
+        return f"cache:{self.name}:entry:{key}"
+
+    def get(self, key: str):
+        """Get value for `key` (or None if not cached)"""
+        try:
+            client = get_redis_client()
+            raw = client.get(self._key(key))
+            with client.pipeline() as pipe:
+                pipe.hincrby(self._stats, "hits" if raw is not None else "misses", 1)
+                if raw is not None:
+                    pipe.zadd(self._index, {key: time.time()})
+                pipe.execute()
+        except RedisError:
+            logger.warning(f"Unable to get {key} from cache:{self.name}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value):
+        """Cache `value` for `key`"""
+        try:
+            client = get_redis_client()
+            with client.pipeline() as pipe:
+                pipe.setex(self._key(key), self.ttl, json.dumps(value))
+                pipe.zadd(self._index, {key: time.time()})
+                pipe.zcard(self._index)
+                _, _, size = pipe.execute()
+            if size > self.max_entries:
+                # drop least recently used entries
+                evicted = client.zpopmin(self._index, size - self.max_entries)
+                if evicted:
+                    client.delete(*[self._key(k.decode()) for k, _ in evicted])
+        except RedisError:
+            logger.warning(f"Unable to set {key} in cache:{self.name}")
+
+    def invalidate(self, key: str):
+        """Remove `key` from cache"""
+        try:
+            with get_redis_client().pipeline() as pipe:
+                pipe.delete(self._key(key))
+                pipe.zrem(self._index, key)
+                pipe.execute()
+        except RedisError:
+            logger.exception(f"Unable to invalidate {key} in cache:{self.name}")
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"cache:{self.name}:generation:{namespace}"
+
+    def get_generation(self, namespace: str) -> int | None:
+        """
+        Get the current generation of a namespace of keys (see invalidate_generation)
+
+        Callers include the generation in the keys of the namespace, and get it before
+        getting a value to cache, so that a value read before an invalidation is never
+        found after it. Returns None if redis is unavailable.
+        """
+        key = self._generation_key(namespace)
+        try:
+            with get_redis_client().pipeline() as pipe:
+                pipe.get(key)
+                # entries are younger than the generation's last use, so once it expires
+                # all entries of its namespace have expired
+                pipe.expire(key, 2 * self.ttl)
+                raw, _ = pipe.execute()
+        except RedisError:
+            logger.warning(
+                f"Unable to get generation of {namespace} in cache:{self.name}"
+            )
+            return None
+        return int(raw) if raw is not None else 0
+
+    def invalidate_generation(self, namespace: str):
+        """Invalidate all keys of a namespace by starting a new generation"""
+        key = self._generation_key(namespace)
+        try:
+            with get_redis_client().pipeline() as pipe:
+                pipe.incr(key)
+                pipe.expire(key, 2 * self.ttl)
+                pipe.execute()
+        except RedisError:
+            logger.exception(f"Unable to invalidate {namespace} in cache:{self.name}")
+
+    def clear(self):
+        """Remove all entries (and counters) of cache"""
+        try:
+            client = get_redis_client()
+            keys = list(client.scan_iter(match=f"cache:{self.name}:*"))
+            if keys:
+                client.delete(*keys)
+        except RedisError:
+            logger.exception(f"Unable to clear cache:{self.name}")
+
+    def stats(self) -> dict:
+        """Get number of hits and misses of cache"""
+        try:
+            stats = get_redis_client().hgetall(self._stats)
+        except RedisError:
+            logger.warning(f"Unable to get stats of cache:{self.name}")
+            stats = {}
+        return {
+            "hits": int(stats.get(b"hits", 0)),
+            "misses": int(stats.get(b"misses", 0)),
+        }
@@ -0,0 +1,101 @@
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+from litestar.connection import ASGIConnection
+from geoapi.models import Feature, PointCloud, Project, User
+from geoapi.db import litestar_sqlalchemy_config
+from geoapi.services.users import UserService
+from geoapi.utils.users import is_anonymous
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+REQUEST_CONTEXT_KEY = "geoapi_request_context"
+
+
+class RequestContext:
+    """
+    Rows loaded while handling a request, shared by its guards and handler
+
+    Rows are loaded with the request's database session (the `db_session` of route
+    handlers), so they are only queried once per request.
+    """
+
+    def __init__(self, db_session: "Session"):
+        self.db_session = db_session
+        self._projects: Dict[Any, Optional[Project]] = {}
+        self._acls: Dict[Tuple[Any, int], Optional[dict]] = {}
+
+    def get_project(
+        self,
+        project_id: Optional[int] = None,
+        uuid: Optional[str] = None,
+        user: Optional[User] = None,
+    ) -> Optional[Project]:
+        """
+        Get a project (by id or uuid), like ProjectsService.get
+
+        If a (non-anonymous) user is given, the project's `deletable` is set to whether
+        the user is an admin or creator of the project.
+        """
+        if project_id is not None:
+            key = project_id
+            if key not in self._projects:
+                self._projects[key] = self.db_session.get(Project, project_id)
+        elif uuid is not None:
+            key = uuid
+            if key not in self._projects:
+                self._projects[key] = (
+                    self.db_session.query(Project).filter(Project.uuid == uuid).first()
+                )
+        else:
+            raise ValueError("project_id or uid is required")
+
+        project = self._projects[key]
+        if project and user and not is_anonymous(user):
+            acl = self.get_acl(user, project.id)
+            if acl["member"]:
+                setattr(project, "deletable", acl["admin"] or acl["creator"])
+        return project
+
+    def get_acl(self, user: User, project_id: int) -> Optional[dict]:
+        """Access of a user to a project (see UserService.get_project_acl)"""
+        key = (None if is_anonymous(user) else user.id, project_id)
+        if key not in self._acls:
+            self._acls[key] = UserService.get_project_acl(
+                self.db_session, user, project_id
+            )
+        return self._acls[key]
+
+    def can_access(self, user: User, project_id: int) -> bool:
+        """Same as UserService.canAccess"""
+        acl = self.get_acl(user, project_id)
+        return bool(acl and acl["member"])
+
+    def is_admin_or_creator(self, user: User, project_id: int) -> bool:
+        """Same as UserService.is_admin_or_creator"""
+        acl = self.get_acl(user, project_id)
+        return bool(acl and (acl["admin"] or acl["creator"]))
+
+    def get_feature(self, feature_id: int) -> Optional[Feature]:
+        # the session's identity map makes later gets of the feature free
+        return self.db_session.get(Feature, feature_id)
+
+    def get_point_cloud(self, point_cloud_id: int) -> Optional[PointCloud]:
+        return self.db_session.get(PointCloud, point_cloud_id)
+
+
+def get_request_context(connection: ASGIConnection) -> RequestContext:
+    """
+    Get the context of a request (created by the first guard or handler asking for it)
+
+    The context uses the request's database session, which is closed once the response
+    is sent.
+    """
+    state = connection.scope.setdefault("state", {})
+    context = state.get(REQUEST_CONTEXT_KEY)
+    if context is None:
+        db_session = litestar_sqlalchemy_config.provide_session(
+            connection.app.state, connection.scope
+        )
+        context = RequestContext(db_session)
+        state[REQUEST_CONTEXT_KEY] = context
+    return context
@@ -0,0 +1,204 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict
+from uuid import uuid4
+
+from geoapi.settings import settings
+from geoapi.log import logging
+
+logger = logging.getLogger(__name__)
+
+# once the cache is larger than TILE_CACHE_MAX_SIZE, least recently used tiles are
+# removed until it is this fraction of the max size
+PRUNE_TARGET_FRACTION = 0.9
+
+# file in a layer's directory with the generation of its cached tiles
+GENERATION_FILE_NAME = ".generation"
+
+
+def get_render_options_key(render_options: Dict[str, str]) -> str:
+    """Key of a layer's render options (the same for any order of the options)"""
+    encoded = json.dumps(render_options, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+
+def _get_layer_dir(project_id: int, uuid: str) -> Path:
+    return Path(settings.TILE_CACHE_DIR) / str(project_id) / str(uuid)
+
+
+def get_tile_path(
+    project_id: int,
+    uuid: str,
+    render_options: Dict[str, str],
+    z: int,
+    x: int,
+    y: int,
+    tile_format: str,
+) -> Path:
+    return (
+        _get_layer_dir(project_id, uuid)
+        / get_render_options_key(render_options)
+        / str(z)
+        / str(x)
+        / f"{y}.{tile_format}"
+    )
+
+
+def get_tile(tile_path: Path) -> bytes | None:
+    """Get a cached tile (and mark it as recently used)"""
+    try:
+        content = tile_path.read_bytes()
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(tile_path)
+    except FileNotFoundError:
+        # removed (pruned or invalidated) since it was read
+        pass
+    return content
+
+
+def _read_generation(layer_dir: Path) -> str | None:
+    try:
+        return (layer_dir / GENERATION_FILE_NAME).read_text()
+    except FileNotFoundError:
+        return None
+
+
+def get_layer_generation(project_id: int, uuid: str) -> str | None:
+    """
+    Get the generation of a layer's cached tiles (a new one once the layer is invalidated)
+
+    It is taken before a tile is rendered so that the tile is not stored if the layer is
+    invalidated while it is being rendered (see put_tile). None if the layer is being
+    invalidated.
+    """
+    layer_dir = _get_layer_dir(project_id, uuid)
+    generation = _read_generation(layer_dir)
+    if generation is not None:
+        return generation
+
+    generation = uuid4().hex
+    layer_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            dir=layer_dir, prefix=f"{GENERATION_FILE_NAME}.", suffix=".tmp"
+        )
+    except FileNotFoundError:
+        return None
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(generation)
+        # only the first of concurrent requests creates the layer's generation
+        os.link(temp_path, layer_dir / GENERATION_FILE_NAME)
+    except FileExistsError:
+        generation = _read_generation(layer_dir)
+    except FileNotFoundError:
+        generation = None
+    finally:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+    return generation
+
+
+def put_tile(tile_path: Path, content: bytes, generation: str | None) -> None:
+    """
+    Store a tile rendered for `generation` of its layer (see get_layer_generation)
+
+    The tile is discarded if the layer has been invalidated since (the layer's directory
+    is never re-created here). It is written to a temp file first so readers never see
+    partial tiles.
+    """
+    if generation is None:
+        return
+    # tile_path is <layer dir>/<render options key>/<z>/<x>/<y>.<format>
+    layer_dir = tile_path.parents[3]
+    try:
+        for directory in reversed(tile_path.parents[:3]):
+            try:
+                directory.mkdir()
+            except FileExistsError:
+                pass
+        # unique temp file as the same tile can be stored by concurrent requests
+        fd, temp_path = tempfile.mkstemp(
+            dir=tile_path.parent, prefix=f".{tile_path.name}.", suffix=".tmp"
+        )
+    except FileNotFoundError:
+        logger.debug(f"Not storing tile:{tile_path} as layer was invalidated")
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        if _read_generation(layer_dir) != generation:
+            logger.debug(f"Not storing tile:{tile_path} as layer was invalidated")
+            return
+        os.replace(temp_path, tile_path)
+    except FileNotFoundError:
+        # layer invalidated (directory removed) while the tile was being stored
+        logger.debug(f"Unable to store tile:{tile_path}")
+    finally:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def invalidate_layer(project_id: int, uuid: str) -> None:
+    """Remove the cached tiles of a layer (for all render options)"""
+    logger.info(f"Removing cached tiles of project:{project_id} layer:{uuid}")
+    shutil.rmtree(_get_layer_dir(project_id, uuid), ignore_errors=True)
+
+
+def invalidate_project(project_id: int) -> None:
+    """Remove the cached tiles of all the layers of a project"""
+    logger.info(f"Removing cached tiles of project:{project_id}")
+    shutil.rmtree(Path(settings.TILE_CACHE_DIR) / str(project_id), ignore_errors=True)
+
+
+def prune(max_size: int | None = None) -> int:
+    """
+    Remove least recently used tiles until the cache is smaller than `max_size` bytes
+    (TILE_CACHE_MAX_SIZE by default)
+
+    :return: number of removed tiles
+    """
+    max_size = settings.TILE_CACHE_MAX_SIZE if max_size is None else max_size
+    tiles = []
+    total_size = 0
+    for root, _, file_names in os.walk(settings.TILE_CACHE_DIR):
+        for file_name in file_names:
+            if file_name == GENERATION_FILE_NAME:
+                continue
+            path = os.path.join(root, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            tiles.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+    if total_size <= max_size:
+        return 0
+
+    target_size = max_size * PRUNE_TARGET_FRACTION
+    removed = 0
+    for _, size, path in sorted(tiles):
+        if total_size <= target_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+        removed += 1
+
+    logger.info(
+        f"Pruned tile cache: removed {removed} tiles ({total_size} bytes remaining)"
+    )
+    return removed